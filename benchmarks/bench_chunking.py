@@ -0,0 +1,67 @@
+"""
+Chunker benchmark: ingest time should grow linearly with document length.
+
+Usage: python -m benchmarks.bench_chunking [--pages 50 100 250 500]
+"""
+import argparse
+import json
+import time
+
+from src.backend.core.chunking import iter_chunk_spans
+from src.backend.core.config import settings
+
+PAGE_CHARS = 3000
+
+
+def synthetic_document(pages: int) -> str:
+    """Roughly PAGE_CHARS characters of prose per page, paragraphs every ~10 sentences"""
+    sentence = "The quarterly report describes revenue growth across {n} regional markets. "
+    paragraphs = []
+    chars = 0
+    n = 0
+    while chars < pages * PAGE_CHARS:
+        paragraph = "".join(sentence.format(n=n + i) for i in range(10))
+        paragraphs.append(paragraph)
+        chars += len(paragraph) + 2
+        n += 10
+    return "\n\n".join(paragraphs)
+
+
+def time_chunking(text: str, boundary: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _span in iter_chunk_spans(text, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP, boundary):
+            pass
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 100, 250, 500])
+    parser.add_argument("--boundary", default="sentence", choices=["sentence", "paragraph", "token"])
+    args = parser.parse_args()
+
+    results = []
+    for pages in args.pages:
+        text = synthetic_document(pages)
+        seconds = time_chunking(text, args.boundary)
+        results.append({
+            "pages": pages,
+            "chars": len(text),
+            "seconds": round(seconds, 5),
+            "us_per_page": round(seconds / pages * 1e6, 2)
+        })
+
+    # Linear growth means time per page stays flat as the document gets longer
+    per_page = [r["us_per_page"] for r in results]
+    print(json.dumps({
+        "boundary": args.boundary,
+        "results": results,
+        "per_page_ratio_largest_vs_smallest": round(per_page[-1] / per_page[0], 2)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
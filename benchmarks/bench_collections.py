@@ -0,0 +1,106 @@
+"""
+Vector layout benchmark: one Chroma collection per document vs one shared collection.
+
+Measures client open time and multi-document query latency at several corpus sizes.
+
+Usage: python -m benchmarks.bench_collections [--docs 10 100 1000] [--chunks 20]
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings as ChromaSettings
+
+from src.backend.core.vector_store import ChunkStore
+
+DIMENSION = 384
+
+
+def open_client(path: str):
+    return chromadb.PersistentClient(path=path, settings=ChromaSettings(anonymized_telemetry=False))
+
+
+def random_vectors(rng, count: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def populate(path: str, layout: str, docs: int, chunks: int, rng):
+    client = open_client(path)
+    store = ChunkStore(client, shards=1)
+    for d in range(docs):
+        doc_id = f"doc{d:05d}"
+        ids = [f"{doc_id}_chunk_{i}" for i in range(chunks)]
+        texts = [f"chunk {i} of {doc_id}" for i in range(chunks)]
+        metadatas = [{"chunk_index": i} for i in range(chunks)]
+        vectors = random_vectors(rng, chunks)
+        if layout == "legacy":
+            collection = client.get_or_create_collection(
+                f"doc_{doc_id}", metadata={"hnsw:space": "cosine"}, embedding_function=None
+            )
+            collection.add(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+        else:
+            store.upsert(doc_id, ids, vectors, texts, metadatas)
+
+
+def query_legacy(client, vector, doc_ids, top_k):
+    results = []
+    for doc_id in doc_ids:
+        collection = client.get_collection(f"doc_{doc_id}", embedding_function=None)
+        found = collection.query(query_embeddings=[vector], n_results=top_k, include=["distances"])
+        results.extend(zip(found["distances"][0], found["ids"][0]))
+    return sorted(results)[:top_k]
+
+
+def measure(layout: str, docs: int, chunks: int, selected: int, queries: int) -> dict:
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as path:
+        populate(path, layout, docs, chunks, rng)
+
+        started = time.perf_counter()
+        client = open_client(path)
+        store = ChunkStore(client, shards=1)
+        open_seconds = time.perf_counter() - started
+
+        doc_ids = [f"doc{d:05d}" for d in rng.choice(docs, size=min(selected, docs), replace=False)]
+        timings = []
+        for vector in random_vectors(rng, queries):
+            started = time.perf_counter()
+            if layout == "legacy":
+                query_legacy(client, vector, doc_ids, 5)
+            else:
+                store.query(vector, doc_ids, 5)
+            timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    return {
+        "layout": layout,
+        "docs": docs,
+        "open_ms": round(open_seconds * 1000, 2),
+        "query_p50_ms": round(statistics.median(timings) * 1000, 2),
+        "query_p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--chunks", type=int, default=20, help="chunks per document")
+    parser.add_argument("--selected", type=int, default=5, help="documents searched per query")
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    results = [
+        measure(layout, docs, args.chunks, args.selected, args.queries)
+        for docs in args.docs
+        for layout in ("legacy", "shared")
+    ]
+    print(json.dumps({"chunks_per_doc": args.chunks, "selected_docs": args.selected, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Lexical index benchmark: BM25 lookup latency as the corpus grows toward a million chunks.
+
+Usage: python -m benchmarks.bench_lexical [--chunks 10000 100000 1000000] [--selected 20]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from src.backend.core.lexical_index import LexicalIndex
+
+CHUNKS_PER_DOC = 200
+WORDS_PER_CHUNK = 120
+VOCABULARY = 50000
+
+
+def build_index(chunks: int, rng: random.Random) -> LexicalIndex:
+    # Zipf-like vocabulary so a few terms are very common, as in real prose
+    weights = [1.0 / (rank + 1) for rank in range(VOCABULARY)]
+    words = [f"w{rank}" for rank in range(VOCABULARY)]
+    index = LexicalIndex(compact_ratio=1.0)
+    for doc in range(chunks // CHUNKS_PER_DOC):
+        doc_chunks = []
+        for i in range(CHUNKS_PER_DOC):
+            text = " ".join(rng.choices(words, weights, k=WORDS_PER_CHUNK))
+            doc_chunks.append({"id": f"d{doc}_chunk_{i}", "text": f"{text} part-{doc}-{i}"})
+        index.index_document(f"d{doc}", doc_chunks)
+    return index
+
+
+def measure(chunks: int, selected: int, queries: int) -> dict:
+    rng = random.Random(0)
+    started = time.perf_counter()
+    index = build_index(chunks, rng)
+    build_seconds = time.perf_counter() - started
+    docs = chunks // CHUNKS_PER_DOC
+
+    timings = {"filtered": [], "all_documents": []}
+    for _ in range(queries):
+        query = " ".join([f"w{rng.randrange(5, 2000)}", f"w{rng.randrange(2000, VOCABULARY)}",
+                          f"part-{rng.randrange(docs)}-{rng.randrange(CHUNKS_PER_DOC)}"])
+        doc_ids = [f"d{rng.randrange(docs)}" for _ in range(selected)]
+        for name, scope in (("filtered", doc_ids), ("all_documents", None)):
+            started = time.perf_counter()
+            index.search(query, scope, top_k=20)
+            timings[name].append(time.perf_counter() - started)
+
+    result = {"chunks": chunks, "terms": len(index._postings), "build_seconds": round(build_seconds, 1)}
+    for name, values in timings.items():
+        values.sort()
+        result[f"{name}_p50_ms"] = round(statistics.median(values) * 1000, 3)
+        result[f"{name}_p99_ms"] = round(values[max(0, int(len(values) * 0.99) - 1)] * 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--selected", type=int, default=20, help="documents selected per query")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps([measure(chunks, args.selected, args.queries) for chunks in args.chunks], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+End-to-end pipeline benchmark: ingest a synthetic PDF/TXT/DOCX corpus, then time
+multi-document retrieval and question answering against a stub LLM provider.
+
+Reports throughput, p50/p95/p99 latency and peak RSS as JSON. With --baseline,
+every metric is compared to a stored run and the process exits with status 1
+when one regresses by more than --tolerance. Baselines are only comparable on
+the same machine and configuration; refresh one with --update-baseline.
+
+The default hashing embedder needs no model download, so runs are offline and
+reproducible; --embedder model measures the real SentenceTransformer instead.
+
+Usage: python -m benchmarks.bench_pipeline [--docs 30] [--paragraphs 40] [--queries 200]
+           [--llm-latency-ms 50] [--concurrency 8] [--embedder hashing|model]
+           [--output results.json] [--baseline benchmarks/baseline.json] [--update-baseline] [--keep]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from loguru import logger
+
+from benchmarks.corpus import CorpusGenerator, generate_corpus
+from src.backend.core import metrics
+from src.backend.core.config import settings
+
+DEFAULT_BASELINE = str(Path(__file__).with_name("baseline.json"))
+WARM_UP_QUERIES = 5
+
+
+def percentiles(values: List[float], prefix: str) -> Dict[str, float]:
+    """p50/p95/p99 in milliseconds"""
+    ordered = np.asarray(sorted(values)) * 1000
+    return {f"{prefix}_{name}_ms": round(float(np.percentile(ordered, q)), 3)
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99))}
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def run(args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        return _run(args, workdir)
+    finally:
+        if args.keep:
+            print(f"Vector DB and corpus kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run(args, workdir: str) -> Dict:
+    from src.backend.core.ai_engine import AIEngine
+    from src.backend.core.document_processor import DocumentProcessor
+    from src.backend.core.embeddings import EmbeddingBackend, HashingModel
+    from src.backend.core.llm import StubProvider
+
+    settings.VECTOR_DB_PATH = os.path.join(workdir, "vector_db")
+    settings.ANSWER_CACHE_ENABLED = False  # every question must reach retrieval and the LLM
+    settings.RERANK_ENABLED = False
+    corpus = generate_corpus(os.path.join(workdir, "corpus"), args.docs, args.paragraphs,
+                             formats=args.formats, seed=args.seed)
+
+    model = HashingModel() if args.embedder == "hashing" else None
+    processor = DocumentProcessor(embedder=EmbeddingBackend(model=model))
+    results: Dict = {"metrics": {}}
+    out = results["metrics"]
+
+    # Ingest
+    doc_ids, ingest_times, chunks_total = [], [], 0
+    started = time.perf_counter()
+    for document in corpus:
+        t0 = time.perf_counter()
+        doc_id, _, chunks = processor.process_uploaded_document(document["path"], Path(document["path"]).name)
+        ingest_times.append(time.perf_counter() - t0)
+        doc_ids.append(doc_id)
+        chunks_total += len(chunks)
+    ingest_seconds = time.perf_counter() - started
+    processor.flush()
+    out["ingest_docs_per_second"] = round(len(corpus) / ingest_seconds, 3)
+    out["ingest_chunks_per_second"] = round(chunks_total / ingest_seconds, 1)
+    out["ingest_chars_per_second"] = round(sum(d["chars"] for d in corpus) / ingest_seconds, 1)
+    out.update(percentiles(ingest_times, "ingest_doc"))
+    out["ingest_peak_rss_mb"] = peak_rss_mb()
+
+    # Retrieval across several documents per query
+    rng = random.Random(args.seed)
+    queries = CorpusGenerator(args.seed + 1).queries(args.queries + WARM_UP_QUERIES, args.docs, args.paragraphs)
+    selections = [rng.sample(doc_ids, min(args.docs_per_query, len(doc_ids))) for _ in queries]
+    retrieval_times = []
+    for i, (query, selected) in enumerate(zip(queries, selections)):
+        t0 = time.perf_counter()
+        processor.get_relevant_chunks(query, selected)
+        if i >= WARM_UP_QUERIES:
+            retrieval_times.append(time.perf_counter() - t0)
+    out["retrieval_queries_per_second"] = round(len(retrieval_times) / sum(retrieval_times), 1)
+    out.update(percentiles(retrieval_times, "retrieval"))
+
+    # Answering: retrieval + prompt packing + stub LLM, with concurrent requests
+    engine = AIEngine(document_processor=processor, llm=StubProvider(delay=args.llm_latency_ms / 1000.0))
+    answer_times = asyncio.run(_answer_all(engine, queries[WARM_UP_QUERIES:], selections[WARM_UP_QUERIES:],
+                                           args.concurrency, out))
+    out.update(percentiles(answer_times, "answer"))
+    out["peak_rss_mb"] = peak_rss_mb()
+    processor.close()
+
+    results["stages"] = _stage_means()
+    results["config"] = {
+        "docs": args.docs, "paragraphs": args.paragraphs, "formats": list(args.formats),
+        "queries": args.queries, "docs_per_query": args.docs_per_query, "concurrency": args.concurrency,
+        "llm_latency_ms": args.llm_latency_ms, "embedder": args.embedder, "seed": args.seed,
+        "chunks": chunks_total
+    }
+    results["environment"] = {
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()
+    }
+    return results
+
+
+async def _answer_all(engine, queries: List[str], selections: List[List[str]], concurrency: int,
+                      out: Dict) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    times: List[float] = []
+
+    async def answer(query, selected):
+        async with semaphore:
+            t0 = time.perf_counter()
+            await engine.answer_question(query, selected)
+            times.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(answer(q, s) for q, s in zip(queries, selections)))
+    out["answer_questions_per_second"] = round(len(queries) / (time.perf_counter() - started), 1)
+    await engine.aclose()
+    return times
+
+
+def _stage_means() -> Dict[str, Dict]:
+    """Mean milliseconds per pipeline stage, from the instrumentation histograms"""
+    return {
+        labels[0]: {"count": count, "mean_ms": round(total / count * 1000, 3) if count else 0.0}
+        for labels, (total, count) in sorted(metrics.STAGE_SECONDS.totals().items())
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Regression messages for metrics worse than baseline by more than tolerance"""
+    regressions = []
+    for name, base in baseline["metrics"].items():
+        current = results["metrics"].get(name)
+        if current is None or not base:
+            continue
+        higher_is_better = name.endswith("_per_second")
+        change = (current - base) / base
+        worse = -change if higher_is_better else change
+        marker = "REGRESSION" if worse > tolerance else "ok"
+        print(f"{marker:>10}  {name:<34} {base:>12} -> {current:<12} ({change:+.1%})", file=sys.stderr)
+        if worse > tolerance:
+            regressions.append(f"{name}: {base} -> {current} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=30)
+    parser.add_argument("--paragraphs", type=int, default=40, help="paragraphs per document (~1.6k chars each)")
+    parser.add_argument("--formats", nargs="+", default=["txt", "pdf", "docx"], choices=["txt", "pdf", "docx"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--docs-per-query", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="questions answered at once")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="stub provider delay per completion")
+    parser.add_argument("--embedder", choices=["hashing", "model"], default="hashing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here as well as to stdout")
+    parser.add_argument("--baseline", help=f"compare against this results file, e.g. {DEFAULT_BASELINE}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression per metric")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results to --baseline")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary vector DB and corpus")
+    args = parser.parse_args()
+
+    # Keep the JSON on stdout readable
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+
+    if args.baseline and args.update_baseline:
+        Path(args.baseline).write_text(text + "\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+    elif args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get("config") != results["config"]:
+            print("Baseline was recorded with a different configuration:\n"
+                  f"  baseline: {baseline.get('config')}\n  current:  {results['config']}", file=sys.stderr)
+            sys.exit(2)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
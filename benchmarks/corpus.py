@@ -0,0 +1,140 @@
+"""
+Deterministic synthetic corpora (PDF, TXT, DOCX) for the pipeline benchmark.
+
+Text is Zipf-distributed words arranged into sentences and paragraphs, plus a
+few rare identifiers per document so lexical retrieval has something to find.
+"""
+import random
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from docx import Document
+
+VOCABULARY = 20000
+WORDS_PER_SENTENCE = 18
+SENTENCES_PER_PARAGRAPH = 6
+# Lines per PDF page; about 90 characters each
+PDF_LINES_PER_PAGE = 45
+
+
+class CorpusGenerator:
+    """Builds documents of roughly `paragraphs` paragraphs from a seeded random stream"""
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.words = [_syllables(rank) for rank in range(VOCABULARY)]
+        self.cum_weights = []
+        total = 0.0
+        for rank in range(VOCABULARY):
+            total += 1.0 / (rank + 1)
+            self.cum_weights.append(total)
+
+    def paragraphs(self, count: int, doc_index: int) -> List[str]:
+        paragraphs = []
+        for p in range(count):
+            sentences = []
+            for s in range(SENTENCES_PER_PARAGRAPH):
+                words = self.rng.choices(self.words, cum_weights=self.cum_weights, k=WORDS_PER_SENTENCE)
+                if s == 0:
+                    # A unique identifier per paragraph, e.g. "ref-12-3"
+                    words.append(f"ref-{doc_index}-{p}")
+                sentences.append(" ".join(words).capitalize() + ".")
+            paragraphs.append(" ".join(sentences))
+        return paragraphs
+
+    def queries(self, count: int, docs: int, paragraphs: int) -> List[str]:
+        """Mix of prose-like questions and exact-identifier lookups"""
+        queries = []
+        for i in range(count):
+            words = self.rng.choices(self.words[:2000], k=6)
+            if i % 4 == 0:
+                words.append(f"ref-{self.rng.randrange(docs)}-{self.rng.randrange(paragraphs)}")
+            queries.append("What does the document say about " + " ".join(words) + "?")
+        return queries
+
+
+def generate_corpus(directory: str, docs: int, paragraphs: int, formats: Sequence[str] = ("txt", "pdf", "docx"),
+                    seed: int = 0) -> List[Dict]:
+    """Write `docs` files cycling through `formats`; returns [{path, format, chars}]"""
+    generator = CorpusGenerator(seed)
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    written = []
+    for index in range(docs):
+        fmt = formats[index % len(formats)]
+        content = generator.paragraphs(paragraphs, index)
+        path = root / f"doc_{index:04d}.{fmt}"
+        WRITERS[fmt](path, content)
+        written.append({"path": str(path), "format": fmt, "chars": sum(len(p) + 2 for p in content)})
+    return written
+
+
+def write_txt(path: Path, paragraphs: List[str]):
+    path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+
+def write_docx(path: Path, paragraphs: List[str]):
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(str(path))
+
+
+def write_pdf(path: Path, paragraphs: List[str]):
+    """Minimal uncompressed PDF with Helvetica text, wrapped at ~90 characters per line"""
+    lines = []
+    for paragraph in paragraphs:
+        line = ""
+        for word in paragraph.split(" "):
+            if line and len(line) + len(word) + 1 > 90:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.extend([line, ""])
+    pages = [lines[i:i + PDF_LINES_PER_PAGE] for i in range(0, len(lines), PDF_LINES_PER_PAGE)] or [[""]]
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page_lines in pages:
+        commands = ["BT /F1 10 Tf 14 TL 50 750 Td"]
+        for text in page_lines:
+            escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            commands.append(f"({escaped}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(bytes(out))
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+_CONSONANTS = "bcdfghklmnprstvz"
+_VOWELS = "aeiou"
+
+
+def _syllables(rank: int) -> str:
+    """Pronounceable, unique pseudo-word for a vocabulary rank"""
+    word = ""
+    rank += 1
+    while rank:
+        rank, digit = divmod(rank, len(_CONSONANTS) * len(_VOWELS))
+        word += _CONSONANTS[digit // len(_VOWELS)] + _VOWELS[digit % len(_VOWELS)]
+    return word
@@ -0,0 +1,296 @@
+"""
+HTTP load test: closed-loop virtual users drive a weighted mix of /upload, /ask,
+/summarize, /challenge and /evaluate while concurrency ramps up, producing a
+saturation curve (throughput and latency per concurrency level) and its knee.
+
+The knee is the lowest concurrency reaching --knee-fraction of peak throughput;
+past it, extra users mostly add queueing delay. That is the number of in-flight
+requests one backend process should be sized for.
+
+By default the app runs in-process over an ASGI transport with a stub LLM and a
+hashing embedder, so no network, keys or model download are needed. With --url
+the same scenario runs against a live server; start it with LLM_PROVIDERS=stub
+(and LLM_STUB_DELAY_SECONDS) so the LLM is not what gets measured.
+
+Usage: python -m benchmarks.load_test [--levels 1 2 4 8 16 32 64] [--stage-seconds 10]
+           [--mix ask=60,summarize=10,challenge=10,evaluate=15,upload=5] [--llm-latency-ms 200]
+           [--url http://127.0.0.1:8000] [--output results.json] [--csv curve.csv] [--keep]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+from loguru import logger
+
+from benchmarks.corpus import CorpusGenerator
+from src.backend.core.config import settings
+
+API = "/api/v1"
+DEFAULT_MIX = "ask=60,summarize=10,challenge=10,evaluate=15,upload=5"
+ENDPOINTS = ("ask", "summarize", "challenge", "evaluate", "upload")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {name!r}; expected one of {ENDPOINTS}")
+        mix[name] = float(weight)
+    if not any(mix.values()):
+        raise ValueError("Mix needs at least one positive weight")
+    return mix
+
+
+def in_process_app(llm_latency_ms: float, workdir: str):
+    """The FastAPI app wired to a store under workdir, the hashing embedder and a stub LLM"""
+    from src.backend.api.dependencies import get_ai_engine, get_job_queue
+    from src.backend.core.ai_engine import AIEngine
+    from src.backend.core.document_processor import DocumentProcessor
+    from src.backend.core.embeddings import EmbeddingBackend, HashingModel
+    from src.backend.core.jobs import IngestJobQueue
+    from src.backend.core.llm import StubProvider
+    from src.backend.main import app
+
+    settings.VECTOR_DB_PATH = os.path.join(workdir, "vector_db")
+    settings.UPLOAD_DIR = os.path.join(workdir, "uploads")
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+
+    processor = DocumentProcessor(embedder=EmbeddingBackend(model=HashingModel()))
+    engine = AIEngine(document_processor=processor, llm=StubProvider(delay=llm_latency_ms / 1000.0))
+    jobs = IngestJobQueue(processor, processor.registry)
+    app.dependency_overrides[get_ai_engine] = lambda: engine
+    app.dependency_overrides[get_job_queue] = lambda: jobs
+    return app, engine, jobs
+
+
+class Scenario:
+    """Builds requests for each endpoint from the seeded documents"""
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], paragraphs: int, seed: int):
+        self.client = client
+        self.names = [name for name, weight in mix.items() if weight > 0]
+        self.weights = [mix[name] for name in self.names]
+        self.paragraphs = paragraphs
+        self.rng = random.Random(seed)
+        self.corpus = CorpusGenerator(seed)
+        self.document_ids: List[str] = []
+        self._uploads = 0
+
+    async def seed(self, docs: int, timeout: float = 300.0):
+        """Upload documents and wait for their ingest jobs so queries have something to hit"""
+        job_ids = []
+        for _ in range(docs):
+            response = await self.upload()
+            response.raise_for_status()
+            job_ids.append(response.json()["job_id"])
+        deadline = time.monotonic() + timeout
+        for job_id in job_ids:
+            while True:
+                job = (await self.client.get(f"{API}/jobs/{job_id}")).json()
+                if job.get("status") == "completed":
+                    self.document_ids.append(job["document_id"])
+                    break
+                if job.get("status") == "failed" or time.monotonic() > deadline:
+                    raise RuntimeError(f"Seed ingest job {job_id} did not complete: {job}")
+                await asyncio.sleep(0.1)
+
+    async def request(self, name: str) -> httpx.Response:
+        return await getattr(self, name)()
+
+    def pick(self) -> str:
+        return self.rng.choices(self.names, self.weights)[0]
+
+    async def upload(self) -> httpx.Response:
+        # A fresh document each time; identical content would be deduplicated by hash
+        self._uploads += 1
+        text = "\n\n".join(self.corpus.paragraphs(self.paragraphs, 100000 + self._uploads))
+        files = {"file": (f"load_{self._uploads}.txt", text.encode(), "text/plain")}
+        return await self.client.post(f"{API}/upload", files=files)
+
+    async def ask(self) -> httpx.Response:
+        selected = self.rng.sample(self.document_ids, min(len(self.document_ids), self.rng.randint(1, 3)))
+        question = self.corpus.queries(1, len(self.document_ids), self.paragraphs)[0]
+        return await self.client.post(f"{API}/ask", json={"question": question, "document_ids": selected})
+
+    async def summarize(self) -> httpx.Response:
+        return await self.client.post(f"{API}/summarize", json={"document_id": self.rng.choice(self.document_ids)})
+
+    async def challenge(self) -> httpx.Response:
+        return await self.client.post(f"{API}/challenge",
+                                      json={"document_id": self.rng.choice(self.document_ids), "num_questions": 3})
+
+    async def evaluate(self) -> httpx.Response:
+        return await self.client.post(f"{API}/evaluate", json={
+            "session_id": "load-test",
+            "question_id": str(self.rng.randrange(3)),
+            "user_answer": self.corpus.queries(1, 1, 1)[0],
+            "document_id": self.rng.choice(self.document_ids)
+        })
+
+
+async def run_level(scenario: Scenario, concurrency: int, seconds: float) -> Dict:
+    """Closed loop: each user sends its next request as soon as the previous one returns"""
+    samples: List[tuple] = []
+    deadline = time.perf_counter() + seconds
+
+    async def user():
+        while time.perf_counter() < deadline:
+            name = scenario.pick()
+            started = time.perf_counter()
+            try:
+                ok = (await scenario.request(name)).status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            samples.append((name, time.perf_counter() - started, ok))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    level = {"concurrency": concurrency, **_summary([s[1] for s in samples], [s[2] for s in samples], elapsed)}
+    level["endpoints"] = {
+        name: _summary([s[1] for s in samples if s[0] == name], [s[2] for s in samples if s[0] == name], elapsed)
+        for name in scenario.names
+    }
+    return level
+
+
+def _summary(latencies: List[float], oks: List[bool], elapsed: float) -> Dict:
+    if not latencies:
+        return {"requests": 0, "errors": 0, "error_rate": 0.0, "throughput_rps": 0.0}
+    ms = np.asarray(latencies) * 1000
+    errors = oks.count(False)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "error_rate": round(errors / len(latencies), 4),
+        "throughput_rps": round((len(latencies) - errors) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2)
+    }
+
+
+def find_knee(levels: List[Dict], fraction: float) -> Optional[Dict]:
+    """Lowest concurrency whose successful throughput reaches `fraction` of the peak"""
+    if not levels:
+        return None
+    peak = max(level["throughput_rps"] for level in levels)
+    for level in sorted(levels, key=lambda level: level["concurrency"]):
+        if level["throughput_rps"] >= fraction * peak:
+            return {"concurrency": level["concurrency"], "throughput_rps": level["throughput_rps"],
+                    "p95_ms": level.get("p95_ms"), "peak_throughput_rps": peak}
+    return None
+
+
+def print_curve(levels: List[Dict], knee: Optional[Dict]):
+    peak = max((level["throughput_rps"] for level in levels), default=0) or 1
+    print(f"{'users':>6} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'err':>6}", file=sys.stderr)
+    for level in levels:
+        bar = "#" * int(40 * level["throughput_rps"] / peak)
+        marker = "  <- knee" if knee and level["concurrency"] == knee["concurrency"] else ""
+        print(f"{level['concurrency']:>6} {level['throughput_rps']:>9} {level.get('p50_ms', '-'):>9} "
+              f"{level.get('p95_ms', '-'):>9} {level['error_rate']:>6.1%} {bar}{marker}", file=sys.stderr)
+
+
+async def run(args) -> Dict:
+    mix = parse_mix(args.mix)
+    if args.url:
+        return await _run(args, mix, None)
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    try:
+        return await _run(args, mix, workdir)
+    finally:
+        if args.keep:
+            print(f"Vector DB and uploads kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+async def _run(args, mix: Dict[str, float], workdir: Optional[str]) -> Dict:
+    engine = jobs = None
+    if workdir is None:
+        transport, base_url = None, args.url.rstrip("/")
+    else:
+        app, engine, jobs = in_process_app(args.llm_latency_ms, workdir)
+        transport, base_url = httpx.ASGITransport(app=app), "http://loadtest"
+
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits,
+                                 timeout=args.timeout) as client:
+        scenario = Scenario(client, mix, args.paragraphs, args.seed)
+        await scenario.seed(args.seed_docs)
+        levels = []
+        for concurrency in args.levels:
+            level = await run_level(scenario, concurrency, args.stage_seconds)
+            levels.append(level)
+            print(f"{concurrency} users: {level['throughput_rps']} rps, p95 {level.get('p95_ms')} ms, "
+                  f"{level['error_rate']:.1%} errors", file=sys.stderr)
+
+    if engine is not None:
+        jobs.shutdown()
+        await engine.aclose()
+
+    knee = find_knee(levels, args.knee_fraction)
+    print_curve(levels, knee)
+    return {
+        "config": {
+            "target": args.url or "in-process", "levels": args.levels, "stage_seconds": args.stage_seconds,
+            "mix": mix, "seed_docs": args.seed_docs, "paragraphs": args.paragraphs,
+            "llm_latency_ms": None if args.url else args.llm_latency_ms, "seed": args.seed
+        },
+        "levels": levels,
+        "knee": knee
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64],
+                        help="concurrent users per stage")
+    parser.add_argument("--stage-seconds", type=float, default=10.0)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight pairs")
+    parser.add_argument("--seed-docs", type=int, default=5, help="documents ingested before the ramp")
+    parser.add_argument("--paragraphs", type=int, default=20, help="paragraphs per generated document")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="stub LLM delay (in-process only)")
+    parser.add_argument("--url", help="load a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--knee-fraction", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results JSON here as well as to stdout")
+    parser.add_argument("--csv", help="write the saturation curve as CSV for plotting")
+    parser.add_argument("--keep", action="store_true", help="keep the in-process app's temporary store")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    results = asyncio.run(run(args))
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    if args.csv:
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["concurrency", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "error_rate"])
+            for level in results["levels"]:
+                writer.writerow([level["concurrency"], level["throughput_rps"], level.get("p50_ms"),
+                                 level.get("p95_ms"), level.get("p99_ms"), level["error_rate"]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Fold legacy one-collection-per-document Chroma data into the shared chunk collection.
+
+Usage: python -m scripts.migrate_collections [--dry-run]
+"""
+import argparse
+import json
+
+from src.backend.core.document_processor import DocumentProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true", help="only list the legacy collections")
+    args = parser.parse_args()
+
+    processor = DocumentProcessor()
+    legacy = processor.store.legacy_collections()
+    if args.dry_run:
+        print(json.dumps({"legacy_collections": legacy}, indent=2))
+        return
+    print(json.dumps(processor.migrate_legacy_collections(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
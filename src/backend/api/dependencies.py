@@ -0,0 +1,40 @@
+# src/backend/api/dependencies.py
+"""
+FastAPI dependencies that hand out the shared service instances
+"""
+from fastapi import HTTPException
+
+from ..core.ai_engine import AIEngine
+from ..core.document_processor import DocumentProcessor
+from ..core.jobs import IngestJobQueue
+from ..core.services import services
+
+
+def get_services():
+    """Return the started service container, starting it lazily if the lifespan did not run"""
+    if not services.ready:
+        try:
+            services.start()
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Services unavailable: {str(e)}")
+    return services
+
+
+def _component(name: str):
+    component = getattr(get_services(), name)
+    if component is None:
+        # Shut down, or another request's start is still failing
+        raise HTTPException(status_code=503, detail=f"Services unavailable: {services.error or 'not started'}")
+    return component
+
+
+def get_document_processor() -> DocumentProcessor:
+    return _component("document_processor")
+
+
+def get_ai_engine() -> AIEngine:
+    return _component("ai_engine")
+
+
+def get_job_queue() -> IngestJobQueue:
+    return _component("jobs")
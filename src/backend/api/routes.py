@@ -1,45 +1,77 @@
 """
 FastAPI routes for the GenAI Research Assistant
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Dict
 from ..core.document_processor import DocumentProcessor
 from ..core.ai_engine import AIEngine
+from ..core.jobs import IngestJobQueue
 from ..core.config import settings
+from .dependencies import get_ai_engine, get_job_queue
+from ..utils.concurrency import run_blocking
+from ..utils.helpers import format_sse, get_safe_filename, save_upload_stream, FileTooLargeError
 from loguru import logger
+import json
 import os
-import aiofiles
 import uuid
 
 router = APIRouter()
 
-@router.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and process document"""
+# Stop proxies from buffering event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@router.post("/upload", status_code=202)
+async def upload_document(
+    file: UploadFile = File(...),
+    jobs: IngestJobQueue = Depends(get_job_queue)
+):
+    """Save the upload and queue it for background processing"""
     try:
         if not file.filename.lower().endswith(tuple(settings.ALLOWED_EXTENSIONS)):
             raise HTTPException(status_code=400, detail=f"Invalid file extension. Allowed: {settings.ALLOWED_EXTENSIONS}")
+        if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail=f"File exceeds maximum size of {settings.MAX_FILE_SIZE} bytes")
+
+        safe_filename = get_safe_filename(os.path.basename(file.filename))
+        if not safe_filename.strip("."):
+            raise HTTPException(status_code=400, detail="Invalid file name")
+
+        # One file per upload: a queued job must not see a later upload of the same name
+        file_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4().hex}{os.path.splitext(safe_filename)[1].lower()}")
+        try:
+            document_hash, _ = await save_upload_stream(
+                file, file_path, settings.MAX_FILE_SIZE, settings.UPLOAD_CHUNK_SIZE
+            )
+        except FileTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
 
-        file_path = os.path.join("uploads", file.filename)
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(await file.read())
-
-        processor = DocumentProcessor()
-        document_id = await processor.process_document(file_path, file.filename)
+        job_id = await run_blocking(jobs.submit, file_path, file.filename, document_hash)
 
         return {
-            "document_id": document_id,
+            "job_id": job_id,
+            "document_id": document_hash,
             "filename": file.filename,
-            "chunk_count": len(processor.get_document_chunks(document_id)),
+            "status": "queued",
             "success": True,
-            "message": "Document uploaded and processed successfully"
+            "message": "Document uploaded; processing in background"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error uploading document: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, jobs: IngestJobQueue = Depends(get_job_queue)):
+    """Stage-level progress and throughput for an ingest job"""
+    job = await run_blocking(jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.post("/ask")
-async def ask_question(data: dict):
+async def ask_question(data: dict, engine: AIEngine = Depends(get_ai_engine)):
     """Answer questions about the document"""
     try:
         question = data.get("question")
@@ -47,35 +79,93 @@ async def ask_question(data: dict):
         if not question or not document_ids:
             raise HTTPException(status_code=400, detail="Question and document IDs required")
 
-        engine = AIEngine()
-        response = await engine.answer_question(question, document_ids)
+        response = await engine.answer_question(question, document_ids, data.get("rerank_budget_ms"))
         return {
             "question": question,
             "answer": response["answer"],
             "source_chunks": response["source_chunks"],
+            "usage": response.get("usage"),
             "session_id": str(uuid.uuid4())
         }
     except Exception as e:
         logger.error(f"Error answering question: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/ask/stream")
+async def ask_question_stream(data: dict, engine: AIEngine = Depends(get_ai_engine)):
+    """Stream source chunks first, then answer tokens, as Server-Sent Events"""
+    question = data.get("question")
+    document_ids = data.get("document_ids", [])
+    if not question or not document_ids:
+        raise HTTPException(status_code=400, detail="Question and document IDs required")
+
+    session_id = data.get("session_id") or str(uuid.uuid4())
+
+    async def events():
+        async for event in engine.stream_answer(question, document_ids, data.get("rerank_budget_ms")):
+            if event["type"] == "done":
+                event = {**event, "question": question, "session_id": session_id}
+            yield format_sse(event.pop("type"), event)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/ask/batch")
+async def ask_question_batch(data: dict, engine: AIEngine = Depends(get_ai_engine)):
+    """Answer a list of questions; one NDJSON line per answer, in completion order, tagged with its index"""
+    questions = data.get("questions") or []
+    document_ids = data.get("document_ids", [])
+    if not questions or not document_ids or not all(isinstance(q, str) and q for q in questions):
+        raise HTTPException(status_code=400, detail="Questions and document IDs required")
+    if len(questions) > settings.ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {settings.ASK_BATCH_MAX_QUESTIONS} questions per batch")
+    max_concurrency = data.get("max_concurrency")
+    if max_concurrency is not None:
+        # Checked here: once the response starts streaming, errors can no longer change its status
+        if isinstance(max_concurrency, bool) or not isinstance(max_concurrency, int) or max_concurrency < 1:
+            raise HTTPException(status_code=400, detail="max_concurrency must be a positive integer")
+        max_concurrency = min(max_concurrency, settings.ASK_BATCH_MAX_CONCURRENCY)
+
+    async def lines():
+        try:
+            async for result in engine.answer_batch(questions, document_ids, max_concurrency,
+                                                    data.get("rerank_budget_ms")):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            logger.error(f"Error answering question batch: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=SSE_HEADERS)
+
 @router.post("/summarize")
-async def summarize_document(data: dict):
+async def summarize_document(data: dict, engine: AIEngine = Depends(get_ai_engine)):
     """Generate document summary"""
     try:
         document_id = data.get("document_id")
         if not document_id:
             raise HTTPException(status_code=400, detail="Document ID required")
 
-        engine = AIEngine()
         summary = await engine.generate_summary(document_id)
         return {"summary": summary}
     except Exception as e:
         logger.error(f"Error generating summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/summarize/stream")
+async def summarize_document_stream(data: dict, engine: AIEngine = Depends(get_ai_engine)):
+    """Stream summary tokens as Server-Sent Events"""
+    document_id = data.get("document_id")
+    if not document_id:
+        raise HTTPException(status_code=400, detail="Document ID required")
+
+    async def events():
+        async for event in engine.stream_summary(document_id):
+            yield format_sse(event.pop("type"), event)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.post("/challenge")
-async def generate_challenge(data: dict):
+async def generate_challenge(data: dict, engine: AIEngine = Depends(get_ai_engine)):
     """Generate challenge questions from the document"""
     try:
         document_id = data.get("document_id")
@@ -83,52 +173,24 @@ async def generate_challenge(data: dict):
         if not document_id:
             raise HTTPException(status_code=400, detail="Document ID required")
 
-        engine = AIEngine()
-        chunks = engine.document_processor.get_document_chunks(document_id)
-        if not chunks:
+        questions = await engine.challenge_questions(document_id, num_questions)
+        if questions is None:
             raise HTTPException(status_code=404, detail="No content available")
 
-        content = "\n".join([chunk["content"] for chunk in chunks])
-        prompt = f"Generate {num_questions} challenging questions with reasoning based on this content: {content[:1000]}"
-
-        if engine.use_anthropic:
-            response = engine.anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20240620",
-                max_tokens=500,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            questions_text = response.content[0].text
-        else:
-            response = openai.ChatCompletion.create(
-                model=settings.OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=500
-            )
-            questions_text = response.choices[0].message.content
-
-        # Parse questions (assuming AI returns numbered list)
-        questions = []
-        for i, q in enumerate(questions_text.split("\n\n")[:num_questions], 1):
-            if q.strip():
-                questions.append({
-                    "question_id": str(uuid.uuid4()),
-                    "question": q.split("\nReasoning:")[0].strip(),
-                    "reasoning": q.split("\nReasoning:")[1].strip() if "\nReasoning:" in q else "Based on document content.",
-                    "expected_answer": "Sample answer"  # Replace with actual answer generation if needed
-                })
-
         session_id = str(uuid.uuid4())
         return {
             "session_id": session_id,
             "questions": questions,
             "total_questions": len(questions)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating challenge: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/evaluate")
-async def evaluate_response(data: dict):
+async def evaluate_response(data: dict, engine: AIEngine = Depends(get_ai_engine)):
     """Evaluate user's response to challenge question"""
     try:
         session_id = data.get("session_id")
@@ -137,33 +199,45 @@ async def evaluate_response(data: dict):
         if not all([session_id, question_id, user_answer]):
             raise HTTPException(status_code=400, detail="Session ID, question ID, and user answer required")
 
-        engine = AIEngine()
         # Placeholder evaluation
         prompt = f"Evaluate this answer: '{user_answer}' for correctness and relevance to the question ID {question_id}. Provide a score (0-100), feedback, and reference chunks."
 
-        if engine.use_anthropic:
-            response = engine.anthropic_client.messages.create(
-                model="claude-3-5-sonnet-20240620",
-                max_tokens=300,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            evaluation_text = response.content[0].text
-        else:
-            response = openai.ChatCompletion.create(
-                model=settings.OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300
-            )
-            evaluation_text = response.choices[0].message.content
+        evaluation_text = await engine.complete(prompt, max_tokens=300)
 
         # Parse evaluation (assuming structured response)
         evaluation = {
             "score": 80,  # Placeholder, parse from evaluation_text if structured
             "feedback": evaluation_text,
             "expected_answer": "Sample expected answer",
-            "reference_chunks": engine.document_processor.get_document_chunks(data.get("document_id", ""))
+            "reference_chunks": await run_blocking(engine.document_processor.get_document_chunks, data.get("document_id", ""))
         }
         return evaluation
     except Exception as e:
         logger.error(f"Error evaluating response: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache/stats")
+async def answer_cache_stats(engine: AIEngine = Depends(get_ai_engine)):
+    """Hit/miss counters for the answer, rerank score, query embedding and chunk matrix caches"""
+    stats = {"enabled": False} if engine.answer_cache is None else {"enabled": True, **engine.answer_cache.stats()}
+    if engine.reranker is not None:
+        stats["rerank"] = engine.reranker.stats()
+    processor = engine.document_processor
+    if hasattr(processor.embedder, "query_cache_stats"):
+        stats["query_embeddings"] = processor.embedder.query_cache_stats()
+    if getattr(processor, "chunk_matrices", None) is not None:
+        stats["chunk_matrices"] = processor.chunk_matrices.stats()
+    return stats
+
+@router.get("/embeddings/stats")
+async def embedding_stats(engine: AIEngine = Depends(get_ai_engine)):
+    """Query embedding batcher queue depth and batch-size distribution"""
+    batcher_stats = getattr(engine.document_processor.embedder, "batcher_stats", None)
+    stats = batcher_stats() if batcher_stats else None
+    return {"enabled": False} if stats is None else {"enabled": True, **stats}
+
+@router.get("/llm/stats")
+async def llm_stats(engine: AIEngine = Depends(get_ai_engine)):
+    """Per-provider circuit state, request counters and recent latency percentiles"""
+    stats = getattr(engine.llm, "stats", None)
+    return {"providers": stats() if stats else {}}
@@ -0,0 +1,128 @@
+# src/backend/core/answer_cache.py
+"""
+Semantic answer cache keyed on question embedding and document set
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+
+
+@dataclass
+class CacheEntry:
+    scope: Tuple[str, ...]
+    embedding: np.ndarray
+    response: Dict
+    size_bytes: int
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class SemanticAnswerCache:
+    """LRU + TTL cache that matches questions by cosine similarity within one document set"""
+
+    def __init__(self, threshold: Optional[float] = None, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.threshold = threshold if threshold is not None else settings.ANSWER_CACHE_THRESHOLD
+        self.max_entries = max_entries or settings.ANSWER_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.ANSWER_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.ANSWER_CACHE_TTL_SECONDS
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._by_scope: Dict[Tuple[str, ...], List[str]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def scope_for(document_ids: List[str]) -> Tuple[str, ...]:
+        return tuple(sorted(set(document_ids)))
+
+    def lookup(self, embedding: np.ndarray, document_ids: List[str]) -> Optional[Dict]:
+        """Return the cached response for the most similar question above the threshold"""
+        scope = self.scope_for(document_ids)
+        with self._lock:
+            self._expire(self._by_scope.get(scope, []))
+            keys = self._by_scope.get(scope)
+            if keys:
+                matrix = np.stack([self._entries[key].embedding for key in keys])
+                scores = matrix @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key].response
+            self.misses += 1
+            return None
+
+    def store(self, embedding: np.ndarray, document_ids: List[str], response: Dict):
+        """Cache a response; oversized responses are skipped"""
+        size = embedding.nbytes + len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return
+        scope = self.scope_for(document_ids)
+        key = uuid.uuid4().hex
+        with self._lock:
+            self._entries[key] = CacheEntry(scope, embedding.astype(np.float32, copy=False), response, size)
+            self._by_scope.setdefault(scope, []).append(key)
+            self._bytes += size
+            self._expire(list(self._entries))
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_document(self, doc_id: str):
+        """Drop every cached answer whose document set includes doc_id"""
+        with self._lock:
+            for scope in [scope for scope in self._by_scope if doc_id in scope]:
+                for key in list(self._by_scope.get(scope, [])):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_scope.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "llm_calls_saved": self.hits,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "threshold": self.threshold
+            }
+
+    def _expire(self, keys: List[str]):
+        if not self.ttl_seconds:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [key for key in keys if self._entries[key].created_at < cutoff]
+        for key in expired:
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size_bytes
+        keys = self._by_scope[entry.scope]
+        keys.remove(key)
+        if not keys:
+            del self._by_scope[entry.scope]
@@ -0,0 +1,204 @@
+# src/backend/core/chunk_matrix.py
+"""
+Memory-mapped chunk embedding matrices for exact search over small, hot documents
+"""
+import os
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from .config import settings
+
+
+@dataclass
+class ChunkMatrix:
+    """One document's chunk embeddings (rows) with the ids, texts and metadata they belong to"""
+    matrix: np.ndarray
+    ids: List[str]
+    texts: List[str]
+    metadatas: List[Dict]
+    nbytes: int
+
+
+class ChunkMatrixCache:
+    """Per-document embedding matrices on disk, mapped into memory under a RAM budget.
+
+    A matrix is written the first time a document is searched and mapped with
+    np.load(mmap_mode='r') afterwards, so re-opening an evicted document costs
+    no Chroma read. Searching mapped documents is one matrix product per
+    document, with exact cosine distances in Chroma's convention (1 - cosine).
+
+    Only the vector store writer persists matrices. With persist=False the
+    cache maps files the writer left and builds missing matrices in memory,
+    never writing or deleting anything in the directory.
+    """
+
+    def __init__(self, directory: str, budget_bytes: Optional[int] = None, dtype: Optional[str] = None,
+                 max_chunks: Optional[int] = None, persist: bool = True):
+        self.directory = directory
+        self.persist = persist
+        self.budget_bytes = settings.CHUNK_MATRIX_BUDGET_MB * 1024 * 1024 if budget_bytes is None else budget_bytes
+        self.dtype = np.dtype(dtype or settings.CHUNK_MATRIX_DTYPE)
+        self.max_chunks = settings.CHUNK_MATRIX_MAX_CHUNKS if max_chunks is None else max_chunks
+        self._entries: "OrderedDict[str, ChunkMatrix]" = OrderedDict()
+        self._used_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, doc_id: str) -> Optional[ChunkMatrix]:
+        """The mapped matrix for doc_id, mapping it from disk if it was written before"""
+        with self._lock:
+            entry = self._entries.get(doc_id)
+            if entry is not None:
+                self._entries.move_to_end(doc_id)
+                self.hits += 1
+                return entry
+        matrix_path, meta_path = self._paths(doc_id)
+        if not os.path.exists(matrix_path) or not os.path.exists(meta_path):
+            return None
+        try:
+            matrix = np.load(matrix_path, mmap_mode='r')
+            with open(meta_path, 'rb') as file:
+                meta = pickle.load(file)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable chunk matrix for {doc_id}: {e}")
+            self._discard(doc_id)
+            return None
+        if matrix.dtype != self.dtype or matrix.shape[0] != len(meta['ids']):
+            self._discard(doc_id)
+            return None
+        return self._admit(doc_id, ChunkMatrix(matrix, meta['ids'], meta['texts'], meta['metadatas'],
+                                               _footprint(matrix, meta['texts'])))
+
+    def build(self, doc_id: str, ids: List[str], embeddings: np.ndarray, texts: List[str],
+              metadatas: List[Dict]) -> Optional[ChunkMatrix]:
+        """Write doc_id's matrix to disk and map it (or keep it in memory without persist); None when too large"""
+        if not ids or len(ids) > self.max_chunks:
+            return None
+        if not self.persist:
+            matrix = np.asarray(embeddings, dtype=self.dtype)
+            return self._admit(doc_id, ChunkMatrix(matrix, list(ids), list(texts), list(metadatas),
+                                                   _footprint(matrix, texts)))
+        matrix_path, meta_path = self._paths(doc_id)
+        # Write to uniquely named temporaries and rename so no one maps a half-written file.
+        # get() needs both files, so the metadata goes last and marks the pair complete.
+        _write_atomic(matrix_path, lambda file: np.save(file, np.asarray(embeddings, dtype=self.dtype)))
+        _write_atomic(meta_path, lambda file: pickle.dump(
+            {'ids': list(ids), 'texts': list(texts), 'metadatas': list(metadatas)}, file,
+            protocol=pickle.HIGHEST_PROTOCOL
+        ))
+        matrix = np.load(matrix_path, mmap_mode='r')
+        return self._admit(doc_id, ChunkMatrix(matrix, list(ids), list(texts), list(metadatas),
+                                               _footprint(matrix, texts)))
+
+    def invalidate(self, doc_id: str):
+        """Forget doc_id in memory and on disk, e.g. after it was re-ingested"""
+        with self._lock:
+            entry = self._entries.pop(doc_id, None)
+            if entry is not None:
+                self._used_bytes -= entry.nbytes
+        for path in self._paths(doc_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def forget(self, doc_id: str):
+        """Drop doc_id from memory only; another process owns the files and has already replaced them"""
+        with self._lock:
+            entry = self._entries.pop(doc_id, None)
+            if entry is not None:
+                self._used_bytes -= entry.nbytes
+
+    def _discard(self, doc_id: str):
+        """Drop a bad matrix; only the writer removes its files"""
+        if self.persist:
+            self.invalidate(doc_id)
+        else:
+            self.forget(doc_id)
+
+    def search(self, embeddings: np.ndarray, entries: Dict[str, ChunkMatrix], top_k: int) -> List[List[Dict]]:
+        """Exact top-k chunks across the given matrices for each row of embeddings, nearest first"""
+        queries = np.asarray(embeddings, dtype=np.float32)
+        per_row: List[List[tuple]] = [[] for _ in range(len(queries))]
+        for doc_id, entry in entries.items():
+            # float16 matrices are widened per search; BLAS has no half-precision product
+            similarities = np.asarray(entry.matrix, dtype=np.float32) @ queries.T
+            k = min(top_k, similarities.shape[0])
+            best = np.argpartition(-similarities, k - 1, axis=0)[:k]
+            for row in range(len(queries)):
+                for index in best[:, row].tolist():
+                    per_row[row].append((1.0 - float(similarities[index, row]), entry, index))
+        results = []
+        for candidates in per_row:
+            candidates.sort(key=lambda candidate: candidate[0])
+            results.append([
+                {
+                    'text': entry.texts[index],
+                    'id': entry.ids[index],
+                    'distance': distance,
+                    'metadata': entry.metadatas[index]
+                }
+                for distance, entry, index in candidates[:top_k]
+            ])
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "used_bytes": self._used_bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+    def _admit(self, doc_id: str, entry: ChunkMatrix) -> Optional[ChunkMatrix]:
+        """Track entry under the budget, evicting least recently used documents; None if it cannot fit"""
+        if entry.nbytes > self.budget_bytes:
+            return None
+        with self._lock:
+            previous = self._entries.pop(doc_id, None)
+            if previous is not None:
+                self._used_bytes -= previous.nbytes
+            while self._entries and self._used_bytes + entry.nbytes > self.budget_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._used_bytes -= evicted.nbytes
+                self.evictions += 1
+            self._entries[doc_id] = entry
+            self._used_bytes += entry.nbytes
+            self.loads += 1
+        return entry
+
+    def _paths(self, doc_id: str):
+        base = os.path.join(self.directory, doc_id)
+        return f"{base}.npy", f"{base}.meta.pkl"
+
+
+def _write_atomic(path: str, write):
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, 'wb') as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _footprint(matrix: np.ndarray, texts: Sequence[str]) -> int:
+    """Bytes charged against the budget: the matrix plus the chunk text kept alongside it"""
+    return int(matrix.nbytes) + sum(len(text) for text in texts)
@@ -0,0 +1,89 @@
+# src/backend/core/chunking.py
+"""
+Single-pass streaming chunker with exact source offsets
+"""
+import re
+from collections import deque
+from typing import Iterator, Tuple
+
+BOUNDARIES = ("sentence", "paragraph", "token")
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_TOKEN = re.compile(r"\S+\s*")
+
+
+def iter_units(text: str, boundary: str = "sentence") -> Iterator[Tuple[int, int]]:
+    """Yield contiguous (start, end) spans covering the text, split at the given boundary"""
+    if boundary == "token":
+        for match in _TOKEN.finditer(text):
+            yield match.start(), match.end()
+        return
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unsupported chunk boundary: {boundary}")
+
+    pattern = _SENTENCE_BREAK if boundary == "sentence" else _PARAGRAPH_BREAK
+    start = 0
+    for match in pattern.finditer(text):
+        yield start, match.end()
+        start = match.end()
+    if start < len(text):
+        yield start, len(text)
+
+
+def iter_chunk_spans(text: str, chunk_size: int, overlap: int = 0,
+                     boundary: str = "sentence") -> Iterator[Tuple[int, int]]:
+    """Pack boundary units into (start, end) chunk spans in one pass.
+
+    ``chunk_size`` and ``overlap`` are measured in characters, or in tokens
+    when ``boundary`` is ``"token"``. Consecutive chunks share up to
+    ``overlap`` of trailing units. Units longer than ``chunk_size`` characters
+    are hard-split so no chunk exceeds the limit.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    overlap = max(0, min(overlap, chunk_size - 1))
+    count_tokens = boundary == "token"
+
+    window = deque()
+    window_size = 0
+    last_emitted_end = -1
+
+    for unit_start, unit_end in _split_long_units(iter_units(text, boundary), chunk_size, count_tokens):
+        weight = 1 if count_tokens else unit_end - unit_start
+        if window and window_size + weight > chunk_size:
+            span = _trim(text, window[0][0], window[-1][1])
+            if span:
+                yield span
+                last_emitted_end = window[-1][1]
+            # Keep a tail of units as overlap, as long as the next unit still fits
+            while window and (window_size > overlap or window_size + weight > chunk_size):
+                dropped_start, dropped_end = window.popleft()
+                window_size -= 1 if count_tokens else dropped_end - dropped_start
+        window.append((unit_start, unit_end))
+        window_size += weight
+
+    if window and window[-1][1] != last_emitted_end:
+        span = _trim(text, window[0][0], window[-1][1])
+        if span:
+            yield span
+
+
+def _split_long_units(units: Iterator[Tuple[int, int]], chunk_size: int,
+                      count_tokens: bool) -> Iterator[Tuple[int, int]]:
+    """Break character units that are larger than a whole chunk"""
+    for start, end in units:
+        if count_tokens or end - start <= chunk_size:
+            yield start, end
+            continue
+        for piece_start in range(start, end, chunk_size):
+            yield piece_start, min(piece_start + chunk_size, end)
+
+
+def _trim(text: str, start: int, end: int):
+    """Shrink a span past leading/trailing whitespace; None if nothing is left"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
@@ -12,6 +12,7 @@ class Settings(BaseSettings):
     HOST: str = "localhost"
     PORT: int = 8000
     DEBUG: bool = True
+    SERVICES_RETRY_SECONDS: float = 5.0  # after a failed start, requests fail fast this long before retrying
     
     # OpenAI API
     OPENAI_API_KEY: Optional[str] = None
@@ -19,21 +20,104 @@ class Settings(BaseSettings):
     
     # Anthropic API (Alternative)
     ANTHROPIC_API_KEY: Optional[str] = None
+    ANTHROPIC_MODEL: str = "claude-3-5-sonnet-20240620"
+    
+    # LLM client limits
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_MAX_CONNECTIONS: int = 32
+    
+    # LLM routing: comma-separated provider order (anthropic, openai, stub); empty uses every configured key
+    LLM_PROVIDERS: str = ""
+    LLM_RETRIES: int = 2
+    LLM_RETRY_BACKOFF_SECONDS: float = 0.5
+    LLM_BREAKER_FAILURES: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_MIN_SECONDS: float = 2.0
+    LLM_ROUTE_BY_LATENCY: bool = False
+    LLM_STUB_DELAY_SECONDS: float = 0.0
+    
+    # Multi-process serving (python -m src.backend.serve); worker 0 is the only vector store writer
+    SERVE_WORKERS: int = 1
+    SERVE_TORCH_THREADS: int = 0  # intra-op threads per worker; 0 splits the cores between workers
+    VECTOR_STORE_WRITER: bool = True  # False in read-only workers, which hand ingest jobs to the writer
+    INGEST_POLL_SECONDS: float = 0.5  # how often the writer picks up jobs queued by other workers
+    WORKER_SYNC_SECONDS: float = 1.0  # how often read-only workers reload documents the writer changed
+    
+    # Thread pool for embedding, Chroma and other blocking work
+    BLOCKING_POOL_WORKERS: int = 8
     
     # File Settings
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: list = ["pdf", "txt", "docx"]
     UPLOAD_DIR: str = "uploads"
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB read/write block
+    INGEST_WORKERS: int = 2
+    
+    # PDF extraction
+    PDF_EXTRACT_WORKERS: int = max(1, (os.cpu_count() or 2) - 1)
+    PDF_PAGES_PER_TASK: int = 25
+    PDF_PARALLEL_MIN_PAGES: int = 50
+    PDF_SLOW_PAGE_SECONDS: float = 2.0
     
     # Vector Database
     VECTOR_DB_PATH: str = "data/vector_db"
+    VECTOR_COLLECTION_SHARDS: int = 1
+    VECTOR_DB_AUTO_MIGRATE: bool = True  # fold legacy per-document collections in at startup
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    CHUNK_BOUNDARY: str = "sentence"  # sentence, paragraph or token
+    CHUNK_SIZE_TOKENS: int = 256
+    CHUNK_OVERLAP_TOKENS: int = 32
+    
+    # Embeddings
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 64
+    QUERY_EMBEDDING_CACHE_SIZE: int = 2048  # recent query texts kept with their embeddings
+    EMBEDDING_BATCHING_ENABLED: bool = True  # coalesce concurrent query encodes into one forward pass
+    EMBEDDING_BATCH_WAIT_MS: float = 2.0  # how long a batch waits for more requests while they are contending
+    EMBEDDING_BATCH_MAX_TEXTS: int = 64
+    
+    # Retrieval
+    RETRIEVAL_TOP_K: int = 5
+    HYBRID_SEARCH_ENABLED: bool = True  # BM25 + vector, fused by reciprocal rank
+    HYBRID_CANDIDATES: int = 20  # per-retriever candidates fed into the fusion
+    HYBRID_RRF_K: int = 60
+    LEXICAL_INDEX_SAVE_SECONDS: float = 30.0
+    CHUNK_MATRIX_ENABLED: bool = True  # exact NumPy search over small documents instead of Chroma
+    CHUNK_MATRIX_MAX_CHUNKS: int = 5000  # larger documents always go to Chroma
+    CHUNK_MATRIX_BUDGET_MB: int = 256
+    CHUNK_MATRIX_DTYPE: str = "float32"  # or float16 to halve memory
+    
+    # Cross-encoder reranking
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 50
+    RERANK_BATCH_SIZE: int = 16
+    RERANK_BUDGET_MS: int = 300
+    RERANK_CACHE_SIZE: int = 10000
     
     # AI Settings
     MAX_TOKENS: int = 4000
+    ANSWER_MAX_TOKENS: int = 0  # output cap for answers, clamped to the model window; 0 uses MAX_TOKENS
+    CONTEXT_MAX_TOKENS: int = 3000  # retrieved context per answer prompt
+    CONTEXT_DUPLICATE_THRESHOLD: float = 0.8  # MinHash Jaccard estimate
+    ASK_BATCH_MAX_QUESTIONS: int = 200  # per /ask/batch request
+    ASK_BATCH_MAX_CONCURRENCY: int = 8  # LLM calls in flight per batch
     TEMPERATURE: float = 0.7
     SUMMARY_MAX_WORDS: int = 150
+    SUMMARY_GROUP_CHARS: int = 12000  # content per map-reduce prompt
+    SUMMARY_MAX_CONCURRENCY: int = 4
+    SUMMARY_PART_MAX_TOKENS: int = 300
+    SUMMARY_EAGER: bool = False  # precompute the summary as the last ingest stage
+    
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.95  # cosine similarity
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_MAX_BYTES: int = 50 * 1024 * 1024  # 50MB
+    ANSWER_CACHE_TTL_SECONDS: float = 3600
     
     # Challenge Mode
     NUM_CHALLENGE_QUESTIONS: int = 3
@@ -0,0 +1,179 @@
+# src/backend/core/context_builder.py
+"""
+Token-aware packing of retrieved chunks into an answer prompt
+"""
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .config import settings
+
+try:
+    import tiktoken
+except ImportError:  # counts fall back to a character heuristic
+    tiktoken = None
+
+# Input context windows of the models we ship defaults for
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4-1106-preview": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "claude-3-5-sonnet-20240620": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\w+")
+_MINHASH_PRIME = (1 << 61) - 1
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken when installed, otherwise estimates ~4 characters per token"""
+
+    def __init__(self, model: str = ""):
+        self.encoding = None
+        if tiktoken is not None:
+            # Encodings are fetched on first use, so a lookup can fail offline as well as for unknown models
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except Exception:
+                try:
+                    self.encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    logger.warning(f"No tiktoken encoding for '{model}', estimating token counts: {str(e)}")
+
+    @property
+    def exact(self) -> bool:
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+
+@dataclass
+class PackedContext:
+    chunks: List[Dict]
+    text: str
+    usage: Dict = field(default_factory=dict)
+
+
+class ContextBuilder:
+    """Packs the best chunks into a token budget, dropping overlaps and near-duplicates"""
+
+    def __init__(self, model: str = "", budget_tokens: Optional[int] = None,
+                 duplicate_threshold: Optional[float] = None, num_perm: int = 64):
+        self.model = model
+        self.counter = TokenCounter(model)
+        window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+        # Leave room for the instructions, the question and the answer
+        self.context_window = window
+        self.max_answer_tokens = settings.ANSWER_MAX_TOKENS or settings.MAX_TOKENS
+        self.budget_tokens = min(budget_tokens or settings.CONTEXT_MAX_TOKENS, window - self.max_answer_tokens - 256)
+        self.duplicate_threshold = duplicate_threshold or settings.CONTEXT_DUPLICATE_THRESHOLD
+        rng = np.random.default_rng(0)
+        self._perm_a = rng.integers(1, _MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+        self._perm_b = rng.integers(0, _MINHASH_PRIME, size=num_perm, dtype=np.uint64)
+
+    def build(self, chunks: List[Dict]) -> PackedContext:
+        """Chunks are taken in ranked order; the last one that does not fit is trimmed at a sentence boundary"""
+        selected: List[Dict] = []
+        signatures: List[np.ndarray] = []
+        spans: Dict[str, List[Tuple[int, int]]] = {}
+        used = dropped_overlap = dropped_duplicate = trimmed = 0
+
+        for chunk in chunks:
+            text = self._uncovered_text(chunk, spans)
+            if text is None:
+                dropped_overlap += 1
+                continue
+            signature = self._minhash(text)
+            if any(np.mean(signature == other) >= self.duplicate_threshold for other in signatures):
+                dropped_duplicate += 1
+                continue
+
+            tokens = self.counter.count(text)
+            remaining = self.budget_tokens - used
+            if tokens > remaining:
+                # Lower-ranked chunks never jump ahead of a partial one
+                text = self._trim_to_budget(text, remaining)
+                if text:
+                    tokens = self.counter.count(text)
+                    selected.append({**chunk, 'content': text, 'tokens': tokens})
+                    used += tokens
+                    trimmed += 1
+                break
+
+            selected.append({**chunk, 'content': text, 'tokens': tokens})
+            signatures.append(signature)
+            self._record_span(chunk, spans)
+            used += tokens
+
+        return PackedContext(
+            chunks=selected,
+            text="\n\n".join(chunk['content'] for chunk in selected),
+            usage={
+                "context_tokens": used,
+                "context_budget": self.budget_tokens,
+                "chunks_retrieved": len(chunks),
+                "chunks_used": len(selected),
+                "dropped_overlap": dropped_overlap,
+                "dropped_duplicate": dropped_duplicate,
+                "trimmed": trimmed,
+                "exact_token_counts": self.counter.exact
+            }
+        )
+
+    def answer_max_tokens(self, prompt_tokens: int) -> int:
+        """Output allowance: the configured cap, never past the model's context window"""
+        return max(64, min(self.max_answer_tokens, self.context_window - prompt_tokens))
+
+    def _uncovered_text(self, chunk: Dict, spans: Dict[str, List[Tuple[int, int]]]) -> Optional[str]:
+        """Chunk text minus parts already in the context; None if little new text remains"""
+        metadata = chunk.get('metadata') or {}
+        doc_id, start, end = metadata.get('doc_id'), metadata.get('start_char'), metadata.get('end_char')
+        text = chunk['content']
+        if doc_id is None or start is None or end is None or doc_id not in spans:
+            return text
+        # Neighbouring chunks overlap by CHUNK_OVERLAP; cut the shared region off this one
+        new_start, new_end = start, end
+        for s, e in spans[doc_id]:
+            if s <= new_start < e:
+                new_start = e
+            if s < new_end <= e:
+                new_end = s
+        if new_end - new_start < (end - start) / 2:
+            return None
+        return text[new_start - start:new_end - start].strip()
+
+    @staticmethod
+    def _record_span(chunk: Dict, spans: Dict[str, List[Tuple[int, int]]]):
+        metadata = chunk.get('metadata') or {}
+        if metadata.get('doc_id') is not None and metadata.get('start_char') is not None:
+            spans.setdefault(metadata['doc_id'], []).append((metadata['start_char'], metadata['end_char']))
+
+    def _trim_to_budget(self, text: str, budget: int) -> str:
+        """Longest run of whole sentences from the start of text that fits the budget"""
+        if budget <= 0:
+            return ""
+        kept, total = [], 0
+        for sentence in _SENTENCE_END.split(text):
+            cost = self.counter.count(sentence + " ")
+            if total + cost > budget:
+                break
+            kept.append(sentence)
+            total += cost
+        return " ".join(kept)
+
+    def _minhash(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text.lower())
+        shingles = {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p for each permutation; uint64 wraps, which is fine for a hash family
+        values = (np.outer(hashes, self._perm_a) + self._perm_b) % np.uint64(_MINHASH_PRIME)
+        return values.min(axis=0)
@@ -4,55 +4,146 @@ Document processing utilities for PDF, TXT, and DOCX files
 """
 import os
 import hashlib
+import threading
 from pathlib import Path
-from typing import List, Dict, Tuple
-import PyPDF2
-import pdfplumber
+from typing import List, Dict, Tuple, Optional, Iterator, Callable
+import numpy as np
 from docx import Document
-from sentence_transformers import SentenceTransformer
 import chromadb
+from chromadb.api.client import SharedSystemClient
 from chromadb.config import Settings as ChromaSettings
 
+from loguru import logger
+
 from .config import settings
+from . import pdf_extract
+from .chunk_matrix import ChunkMatrixCache
+from .chunking import iter_chunk_spans
+from .embeddings import EmbeddingBackend
+from .lexical_index import LexicalIndex
+from .metrics import span
+from .storage import DocumentRegistry
+from .vector_store import ChunkStore, legacy_chunk_metadata
+
+# progress(stage, fraction_done, info)
+ProgressCallback = Callable[[str, float, Dict], None]
+
+# refresh() re-reads this far back: concurrent ingests can commit slightly out of timestamp order
+SYNC_OVERLAP_SECONDS = 10.0
 
 class DocumentProcessor:
-    def __init__(self):
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.chroma_client = chromadb.PersistentClient(
+    def __init__(self, embedder: Optional[EmbeddingBackend] = None, registry: Optional[DocumentRegistry] = None):
+        # One embedding backend for ingest and search; Chroma never embeds on its own
+        self.embedder = embedder or EmbeddingBackend()
+        self.embedding_model = self.embedder.model
+        self._ingest_listeners: List[Callable[[str], None]] = []
+        self.chroma_client = self._open_chroma()
+        self.registry = registry or DocumentRegistry(str(Path(settings.VECTOR_DB_PATH) / "registry.sqlite3"))
+        self.store = ChunkStore(self.chroma_client)
+        self.lexical_index = LexicalIndex.load(
+            str(Path(settings.VECTOR_DB_PATH) / "lexical_index.pkl"),
+            save_interval=settings.LEXICAL_INDEX_SAVE_SECONDS
+        )
+        if not settings.VECTOR_STORE_WRITER:
+            # The writer owns the persisted copy; this one is only kept current in memory
+            self.lexical_index.path = None
+        # Document versions this process has loaded, for refresh()
+        self._synced_at = self.registry.last_document_update()
+        self._synced_versions: Dict[str, float] = {
+            doc['doc_id']: doc['updated_at']
+            for doc in self.registry.documents_updated_since(self._synced_at - SYNC_OVERLAP_SECONDS)
+        }
+        self._sync_lexical_index()
+        # Exact in-memory search for small documents; larger and evicted ones go to Chroma
+        self.chunk_matrices = (
+            ChunkMatrixCache(str(Path(settings.VECTOR_DB_PATH) / "chunk_matrices"),
+                             persist=settings.VECTOR_STORE_WRITER)
+            if settings.CHUNK_MATRIX_ENABLED else None
+        )
+        self._matrix_build_lock = threading.Lock()
+    
+    @staticmethod
+    def _open_chroma():
+        return chromadb.PersistentClient(
             path=settings.VECTOR_DB_PATH,
             settings=ChromaSettings(anonymized_telemetry=False)
         )
     
-    def extract_text_from_file(self, file_path: str) -> str:
+    def refresh(self) -> List[str]:
+        """Load documents another process (the serve writer) stored since the last refresh; returns their ids.
+        
+        Chroma's loaded HNSW index never sees other processes' writes, so a
+        change reopens the client; requests already running keep the old one.
+        """
+        changed = [
+            doc for doc in self.registry.documents_updated_since(self._synced_at - SYNC_OVERLAP_SECONDS)
+            if self._synced_versions.get(doc['doc_id']) != doc['updated_at']
+        ]
+        if not changed:
+            return []
+        SharedSystemClient.clear_system_cache()
+        self.chroma_client = self._open_chroma()
+        self.store.reopen(self.chroma_client)
+        
+        doc_ids = []
+        for doc in changed:
+            doc_id = doc['doc_id']
+            if self.chunk_matrices is not None:
+                self.chunk_matrices.forget(doc_id)
+            if doc['status'] == 'ready':
+                self.lexical_index.index_document(doc_id, self.get_document_chunks(doc_id))
+            for listener in self._ingest_listeners:
+                listener(doc_id)
+            self._synced_versions[doc_id] = doc['updated_at']
+            doc_ids.append(doc_id)
+        self._synced_at = max(self._synced_at, changed[-1]['updated_at'])
+        horizon = self._synced_at - SYNC_OVERLAP_SECONDS
+        self._synced_versions = {doc_id: updated for doc_id, updated in self._synced_versions.items() if updated > horizon}
+        logger.info(f"Loaded {len(doc_ids)} documents stored by another worker")
+        return doc_ids
+    
+    def extract_text_from_file(self, file_path: str, stats: Optional[Dict] = None) -> str:
         """Extract text from uploaded file based on extension"""
         file_ext = Path(file_path).suffix.lower()
         
-        if file_ext == '.pdf':
-            return self._extract_from_pdf(file_path)
-        elif file_ext == '.txt':
-            return self._extract_from_txt(file_path)
-        elif file_ext == '.docx':
-            return self._extract_from_docx(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {file_ext}")
+        with span("extract"):
+            if file_ext == '.pdf':
+                return self._extract_from_pdf(file_path, stats)
+            elif file_ext == '.txt':
+                return self._extract_from_txt(file_path)
+            elif file_ext == '.docx':
+                return self._extract_from_docx(file_path)
+        raise ValueError(f"Unsupported file format: {file_ext}")
     
-    def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF using pdfplumber for better accuracy"""
-        text = ""
+    def _extract_from_pdf(self, file_path: str, stats: Optional[Dict] = None) -> str:
+        """Extract text from PDF page by page, in parallel for long documents"""
         try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            # Fallback to PyPDF2
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            pages = pdf_extract.extract_pages(
+                file_path,
+                workers=settings.PDF_EXTRACT_WORKERS,
+                pages_per_task=settings.PDF_PAGES_PER_TASK,
+                min_parallel_pages=settings.PDF_PARALLEL_MIN_PAGES
+            )
+        except pdf_extract.PdfOpenError:
+            pages = pdf_extract.extract_all_with_pypdf2(file_path)
         
-        return text.strip()
+        slow_pages = [
+            {'page': page.index + 1, 'seconds': round(page.seconds, 3)}
+            for page in pages if page.seconds >= settings.PDF_SLOW_PAGE_SECONDS
+        ]
+        if slow_pages:
+            logger.warning(f"Slow PDF pages in {Path(file_path).name}: {slow_pages[:10]}")
+        if stats is not None:
+            stats.update({
+                'pages': len(pages),
+                'fallback_pages': sum(page.fallback for page in pages),
+                'slowest_pages': sorted(
+                    ({'page': page.index + 1, 'seconds': round(page.seconds, 3)} for page in pages),
+                    key=lambda page: page['seconds'], reverse=True
+                )[:5]
+            })
+        
+        return "\n".join(page.text for page in pages if page.text).strip()
     
     def _extract_from_txt(self, file_path: str) -> str:
         """Extract text from TXT file"""
@@ -68,117 +159,394 @@ class DocumentProcessor:
                 text.append(paragraph.text)
         return '\n'.join(text)
     
-    def chunk_document(self, text: str, doc_id: str) -> List[Dict]:
-        """Split document into chunks with metadata"""
-        # Simple sentence-based chunking
-        sentences = text.replace('\n', ' ').split('. ')
-        chunks = []
-        current_chunk = ""
-        chunk_id = 0
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) < settings.CHUNK_SIZE:
-                current_chunk += sentence + ". "
-            else:
-                if current_chunk.strip():
-                    chunks.append({
-                        'id': f"{doc_id}_chunk_{chunk_id}",
-                        'text': current_chunk.strip(),
-                        'doc_id': doc_id,
-                        'chunk_index': chunk_id,
-                        'metadata': {
-                            'start_char': len(''.join([c['text'] for c in chunks])),
-                            'end_char': len(''.join([c['text'] for c in chunks])) + len(current_chunk)
-                        }
-                    })
-                    chunk_id += 1
-                current_chunk = sentence + ". "
-        
-        # Add the last chunk
-        if current_chunk.strip():
-            chunks.append({
-                'id': f"{doc_id}_chunk_{chunk_id}",
-                'text': current_chunk.strip(),
+    def add_ingest_listener(self, listener: Callable[[str], None]):
+        """Register a callback invoked with doc_id whenever a document's chunks are (re)stored"""
+        self._ingest_listeners.append(listener)
+    
+    def iter_document_chunks(self, text: str, doc_id: str, boundary: Optional[str] = None) -> Iterator[Dict]:
+        """Lazily yield chunks with exact source offsets and the configured overlap"""
+        boundary = boundary or settings.CHUNK_BOUNDARY
+        if boundary == 'token':
+            size, overlap = settings.CHUNK_SIZE_TOKENS, settings.CHUNK_OVERLAP_TOKENS
+        else:
+            size, overlap = settings.CHUNK_SIZE, settings.CHUNK_OVERLAP
+        
+        for chunk_index, (start, end) in enumerate(iter_chunk_spans(text, size, overlap, boundary)):
+            yield {
+                'id': f"{doc_id}_chunk_{chunk_index}",
+                'text': text[start:end],
                 'doc_id': doc_id,
-                'chunk_index': chunk_id,
+                'chunk_index': chunk_index,
                 'metadata': {
-                    'start_char': len(''.join([c['text'] for c in chunks])),
-                    'end_char': len(''.join([c['text'] for c in chunks])) + len(current_chunk)
+                    'doc_id': doc_id,
+                    'chunk_index': chunk_index,
+                    'start_char': start,
+                    'end_char': end,
+                    'chunk_hash': hashlib.md5(text[start:end].encode('utf-8')).hexdigest()
                 }
-            })
-        
-        return chunks
+            }
+    
+    def chunk_document(self, text: str, doc_id: str, boundary: Optional[str] = None) -> List[Dict]:
+        """Split document into chunks with metadata"""
+        with span("chunk"):
+            return list(self.iter_document_chunks(text, doc_id, boundary))
     
-    def store_document_embeddings(self, chunks: List[Dict], doc_id: str):
-        """Store document chunks in vector database"""
-        collection_name = f"doc_{doc_id}"
+    def store_document_embeddings(self, chunks: List[Dict], doc_id: str,
+                                  progress: Optional[ProgressCallback] = None) -> Dict:
+        """Store document chunks in vector database, re-embedding only chunks whose content is new"""
+        embedded = reused = 0
+        # Work one batch at a time to keep peak memory flat
+        for start in range(0, len(chunks), self.embedder.batch_size):
+            batch = chunks[start:start + self.embedder.batch_size]
+            hashes = [chunk['metadata']['chunk_hash'] for chunk in batch]
+            known = self._load_embeddings_by_hash(hashes)
+            
+            missing = [i for i, chunk_hash in enumerate(hashes) if chunk_hash not in known]
+            with span("embed"):
+                fresh = self.embedder.encode([batch[i]['text'] for i in missing])
+            embeddings = np.empty((len(batch), self.embedder.dimension), dtype=np.float32)
+            for i, chunk_hash in enumerate(hashes):
+                if chunk_hash in known:
+                    embeddings[i] = known[chunk_hash]
+            if missing:
+                embeddings[missing] = fresh
+            embedded += len(missing)
+            reused += len(batch) - len(missing)
+            
+            self.store.upsert(
+                doc_id,
+                ids=[chunk['id'] for chunk in batch],
+                embeddings=embeddings,
+                documents=[chunk['text'] for chunk in batch],
+                metadatas=[chunk['metadata'] for chunk in batch]
+            )
+            if progress:
+                done = start + len(batch)
+                progress("embed", done / len(chunks), {"chunks_done": done, "chunks_total": len(chunks),
+                                                       "embedded": embedded, "reused": reused})
         
-        try:
-            # Delete existing collection if it exists
-            self.chroma_client.delete_collection(collection_name)
-        except:
-            pass
-        
-        collection = self.chroma_client.create_collection(
-            name=collection_name,
-            metadata={"description": f"Document chunks for {doc_id}"}
-        )
+        # Drop chunks left over from a previous version of this document
+        new_ids = {chunk['id'] for chunk in chunks}
+        self.store.delete(doc_id, [chunk_id for chunk_id in self.store.document_ids(doc_id) if chunk_id not in new_ids])
+        self.registry.replace_chunks(doc_id, chunks)
+        self.lexical_index.index_document(doc_id, chunks)
+        if self.chunk_matrices is not None:
+            self.chunk_matrices.invalidate(doc_id)
+        # Summaries and question sets were generated from the previous version
+        self.registry.delete_artifacts(doc_id)
         
-        # Prepare data for ChromaDB
-        texts = [chunk['text'] for chunk in chunks]
-        ids = [chunk['id'] for chunk in chunks]
-        metadatas = [chunk['metadata'] for chunk in chunks]
+        for listener in self._ingest_listeners:
+            listener(doc_id)
+        return {"embedded": embedded, "reused": reused}
+    
+    def _load_embeddings_by_hash(self, chunk_hashes: List[str]) -> Dict[str, np.ndarray]:
+        """Fetch stored vectors for chunk contents that were embedded before, from any document"""
+        refs = self.registry.find_chunks_by_hash(chunk_hashes)
+        by_doc: Dict[str, List[Dict]] = {}
+        for ref in refs.values():
+            by_doc.setdefault(ref['doc_id'], []).append(ref)
         
-        # Add documents to collection
-        collection.add(
-            documents=texts,
-            ids=ids,
-            metadatas=metadatas
-        )
+        vectors = {}
+        for source_doc, doc_refs in by_doc.items():
+            by_id = self.store.get_embeddings(source_doc, [ref['chunk_id'] for ref in doc_refs])
+            for ref in doc_refs:
+                if ref['chunk_id'] in by_id:
+                    vectors[ref['chunk_hash']] = by_id[ref['chunk_id']]
+        return vectors
+    
+    def _load_stored_chunks(self, doc_id: str) -> List[Dict]:
+        """Rebuild the ingest-time chunk list for an already indexed document"""
+        stored = self.store.get_document(doc_id)
+        texts = dict(zip(stored['ids'], stored['documents']))
+        metadatas = dict(zip(stored['ids'], stored['metadatas']))
+        return [
+            {
+                'id': row['chunk_id'],
+                'text': texts[row['chunk_id']],
+                'doc_id': doc_id,
+                'chunk_index': row['chunk_index'],
+                'metadata': metadatas[row['chunk_id']]
+            }
+            for row in self.registry.get_chunks(doc_id)
+            if row['chunk_id'] in texts
+        ]
+    
+    @staticmethod
+    def _reassemble_text(chunks: List[Dict]) -> str:
+        """Rebuild document text from chunk offsets; inter-chunk whitespace becomes spaces"""
+        parts, position = [], 0
+        for chunk in chunks:
+            start = chunk['metadata']['start_char']
+            if start > position:
+                parts.append(" " * (start - position))
+                position = start
+            parts.append(chunk['text'][position - start:])
+            position = max(position, chunk['metadata']['end_char'])
+        return "".join(parts)
     
     def search_relevant_chunks(self, query: str, doc_id: str, top_k: int = 5) -> List[Dict]:
         """Search for relevant chunks based on query"""
-        collection_name = f"doc_{doc_id}"
+        return self.search_documents(query, [doc_id], top_k)
+    
+    def search_documents(self, query: str, doc_ids: List[str], top_k: int = 5) -> List[Dict]:
+        """Search several documents at once: one filtered query per shard, merged by distance"""
+        try:
+            return self._dense_search(self.embedder.encode_query(query)[None, :], doc_ids, top_k)[0]
+        except Exception as e:
+            logger.error(f"Error searching chunks: {e}")
+            return []
+    
+    def get_relevant_chunks(self, query: str, doc_ids: List[str], top_k: Optional[int] = None,
+                            query_embedding: Optional[np.ndarray] = None) -> List[Dict]:
+        """Global top-k chunks across the selected documents, best first.
         
+        The query is encoded once (or ``query_embedding`` is reused) and every
+        shard holding a selected document is searched concurrently. With hybrid
+        search on, BM25 hits are fused in by reciprocal rank so exact terms
+        (part numbers, acronyms, citations) surface even when embeddings miss them.
+        """
+        doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids or []) if doc_id]
+        if not doc_ids:
+            return []
+        top_k = top_k or settings.RETRIEVAL_TOP_K
+        if query_embedding is None:
+            query_embedding = self.embedder.encode_query(query)
         try:
-            collection = self.chroma_client.get_collection(collection_name)
-            results = collection.query(
-                query_texts=[query],
-                n_results=top_k
-            )
-            
-            relevant_chunks = []
-            for i, doc in enumerate(results['documents'][0]):
-                relevant_chunks.append({
-                    'text': doc,
-                    'id': results['ids'][0][i],
-                    'distance': results['distances'][0][i] if 'distances' in results else 0,
-                    'metadata': results['metadatas'][0][i]
-                })
-            
-            return relevant_chunks
+            if not settings.HYBRID_SEARCH_ENABLED:
+                return [self._as_context_chunk(chunk)
+                        for chunk in self._dense_search(query_embedding[None, :], doc_ids, top_k)[0]]
+            candidates = max(top_k, settings.HYBRID_CANDIDATES)
+            dense = self._dense_search(query_embedding[None, :], doc_ids, candidates)[0]
+            with span("lexical_query"):
+                lexical = self.lexical_index.search(query, doc_ids, candidates)
+            return self._fuse(dense, lexical, top_k)
+        except Exception as e:
+            logger.error(f"Error retrieving chunks: {e}")
+            return []
+
+    def get_relevant_chunks_batch(self, queries: List[str], doc_ids: List[str], top_k: Optional[int] = None,
+                                  query_embeddings: Optional[np.ndarray] = None) -> List[List[Dict]]:
+        """get_relevant_chunks for many queries: one embedding batch and one vector query per shard"""
+        doc_ids = [doc_id for doc_id in dict.fromkeys(doc_ids or []) if doc_id]
+        if not doc_ids or not queries:
+            return [[] for _ in queries]
+        top_k = top_k or settings.RETRIEVAL_TOP_K
+        if query_embeddings is None:
+            query_embeddings = self.embedder.encode_queries(list(queries))
+        try:
+            if not settings.HYBRID_SEARCH_ENABLED:
+                return [
+                    [self._as_context_chunk(chunk) for chunk in dense]
+                    for dense in self._dense_search(query_embeddings, doc_ids, top_k)
+                ]
+            candidates = max(top_k, settings.HYBRID_CANDIDATES)
+            dense_batch = self._dense_search(query_embeddings, doc_ids, candidates)
+            with span("lexical_query"):
+                lexical_batch = [self.lexical_index.search(query, doc_ids, candidates) for query in queries]
+            return [self._fuse(dense, lexical, top_k) for dense, lexical in zip(dense_batch, lexical_batch)]
         except Exception as e:
-            print(f"Error searching chunks: {e}")
+            logger.error(f"Error retrieving chunks: {e}")
+            return [[] for _ in queries]
+
+    def _dense_search(self, query_embeddings: np.ndarray, doc_ids: List[str], top_k: int) -> List[List[Dict]]:
+        """Vector top-k per query row: mapped matrices for small documents, Chroma for the rest"""
+        with span("vector_query"):
+            if self.chunk_matrices is None:
+                return self.store.query_many(query_embeddings, doc_ids, top_k)
+            mapped, cold = {}, []
+            for doc_id in doc_ids:
+                entry = self._chunk_matrix(doc_id)
+                if entry is None:
+                    cold.append(doc_id)
+                else:
+                    mapped[doc_id] = entry
+            if not cold:
+                return self.chunk_matrices.search(query_embeddings, mapped, top_k)
+            if not mapped:
+                return self.store.query_many(query_embeddings, cold, top_k)
+            merged = []
+            for exact, approximate in zip(self.chunk_matrices.search(query_embeddings, mapped, top_k),
+                                          self.store.query_many(query_embeddings, cold, top_k)):
+                merged.append(sorted(exact + approximate, key=lambda chunk: chunk['distance'])[:top_k])
+            return merged
+
+    def _chunk_matrix(self, doc_id: str):
+        """Mapped matrix for doc_id, built from Chroma on first search if the document is small enough"""
+        entry = self.chunk_matrices.get(doc_id)
+        if entry is not None:
+            return entry
+        document = self.registry.get_document(doc_id)
+        if document is None or document['chunk_count'] > self.chunk_matrices.max_chunks:
+            return None
+        with self._matrix_build_lock:
+            entry = self.chunk_matrices.get(doc_id)
+            if entry is None:
+                stored = self.store.get_document(doc_id, embeddings=True)
+                if not stored['ids']:
+                    return None
+                entry = self.chunk_matrices.build(doc_id, stored['ids'], np.asarray(stored['embeddings']),
+                                                  stored['documents'], stored['metadatas'])
+        return entry
+
+    def _fuse(self, dense: List[Dict], lexical: List[Dict], top_k: int) -> List[Dict]:
+        """Reciprocal rank fusion of vector and BM25 rankings"""
+        k = settings.HYBRID_RRF_K
+        chunks = {chunk['id']: chunk for chunk in dense}
+        fused: Dict[str, float] = {}
+        for rank, chunk in enumerate(dense):
+            fused[chunk['id']] = 1.0 / (k + rank + 1)
+        for rank, hit in enumerate(lexical):
+            fused[hit['id']] = fused.get(hit['id'], 0.0) + 1.0 / (k + rank + 1)
+        
+        best = sorted(fused, key=fused.get, reverse=True)[:top_k]
+        bm25 = {hit['id']: hit['bm25'] for hit in lexical}
+        # Lexical-only hits still need their text and metadata
+        missing: Dict[str, List[str]] = {}
+        for hit in lexical:
+            if hit['id'] in best and hit['id'] not in chunks:
+                missing.setdefault(hit['doc_id'], []).append(hit['id'])
+        if missing:
+            chunks.update(self.store.get_chunks(missing))
+        
+        results = []
+        for chunk_id in best:
+            if chunk_id not in chunks:
+                continue
+            chunk = self._as_context_chunk(chunks[chunk_id])
+            chunk['score'] = round(fused[chunk_id], 6)
+            if chunk_id in bm25:
+                chunk['bm25'] = round(bm25[chunk_id], 4)
+            results.append(chunk)
+        return results
+    
+    def get_document_chunks(self, doc_id: str) -> List[Dict]:
+        """Every chunk of one document in reading order"""
+        if not doc_id:
             return []
+        stored = self.store.get_document(doc_id)
+        chunks = [
+            self._as_context_chunk({'id': chunk_id, 'text': text, 'metadata': metadata})
+            for chunk_id, text, metadata in zip(stored['ids'], stored['documents'], stored['metadatas'])
+        ]
+        chunks.sort(key=lambda chunk: chunk['metadata'].get('chunk_index', 0))
+        return chunks
+    
+    @staticmethod
+    def _as_context_chunk(chunk: Dict) -> Dict:
+        """Shape used by the engine and API: content plus cosine similarity score"""
+        result = {'content': chunk['text'], **chunk}
+        if 'distance' in chunk:
+            # Cosine distance is in [0, 2]; report similarity so higher is better
+            result['score'] = round(1.0 - chunk['distance'], 6)
+        return result
+    
+    def migrate_legacy_collections(self) -> Dict:
+        """Move chunks from old doc_{id} collections into the shared store and drop them"""
+        migrated_docs = migrated_chunks = 0
+        pending: Dict[str, List[Dict]] = {}
+        for page in self.store.iter_legacy_documents():
+            doc_id = page['doc_id']
+            metadatas = [
+                legacy_chunk_metadata(chunk_id, text, metadata)
+                for chunk_id, text, metadata in zip(page['ids'], page['documents'], page['metadatas'] or [None] * len(page['ids']))
+            ]
+            if page['ids']:
+                self.store.upsert(doc_id, page['ids'], np.asarray(page['embeddings'], dtype=np.float32),
+                                  page['documents'], metadatas)
+            pending.setdefault(doc_id, []).extend(
+                {'id': chunk_id, 'chunk_index': metadata['chunk_index'], 'metadata': metadata}
+                for chunk_id, metadata in zip(page['ids'], metadatas)
+            )
+            if page['last_page']:
+                chunks = sorted(pending.pop(doc_id), key=lambda chunk: chunk['chunk_index'])
+                self.registry.replace_chunks(doc_id, chunks)
+                existing = self.registry.get_document(doc_id)
+                self.registry.upsert_document(
+                    doc_id, existing['filename'] if existing else None, len(chunks),
+                    max((chunk['metadata']['end_char'] for chunk in chunks), default=0)
+                )
+                self.store.drop_collection(page['collection'])
+                migrated_docs += 1
+                migrated_chunks += len(chunks)
+        if migrated_docs:
+            logger.info(f"Migrated {migrated_docs} legacy collections ({migrated_chunks} chunks)")
+            self._sync_lexical_index()
+        return {"documents": migrated_docs, "chunks": migrated_chunks}
+    
+    def _sync_lexical_index(self):
+        """Index documents the persisted lexical index is missing, e.g. after a crash before its last save"""
+        indexed = self.lexical_index.documents()
+        stale = [
+            doc['doc_id'] for doc in self.registry.list_documents()
+            if doc['status'] == 'ready' and indexed.get(doc['doc_id']) != doc['chunk_count']
+        ]
+        for doc_id in stale:
+            self.lexical_index.index_document(doc_id, self.get_document_chunks(doc_id))
+        if stale:
+            logger.info(f"Rebuilt lexical index for {len(stale)} documents")
+            self.lexical_index.save()
+    
+    def flush(self):
+        """Persist in-memory indexes; called on shutdown"""
+        self.lexical_index.save()
+
+    def close(self):
+        """Stop the embedding batcher and close the registry connection.
+
+        Chroma clients are cached per path by chromadb and reused by the next
+        processor, so there is nothing of theirs to release here.
+        """
+        close_embedder = getattr(self.embedder, "close", None)
+        if close_embedder is not None:
+            close_embedder()
+        self.registry.close()
     
     def get_document_hash(self, file_path: str) -> str:
         """Generate hash for document to use as ID"""
+        file_hash = hashlib.md5()
         with open(file_path, 'rb') as f:
-            file_hash = hashlib.md5(f.read()).hexdigest()
-        return file_hash
+            for block in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b''):
+                file_hash.update(block)
+        return file_hash.hexdigest()
     
-    def process_uploaded_document(self, file_path: str) -> Tuple[str, str, List[Dict]]:
-        """Complete document processing pipeline"""
-        # Generate document ID
-        doc_id = self.get_document_hash(file_path)
+    def process_document(self, file_path: str, filename: Optional[str] = None) -> str:
+        """Ingest a file synchronously and return its document id"""
+        doc_id, _, _ = self.process_uploaded_document(file_path, filename)
+        return doc_id
+    
+    def process_uploaded_document(self, file_path: str, filename: Optional[str] = None,
+                                  doc_id: Optional[str] = None,
+                                  progress: Optional[ProgressCallback] = None) -> Tuple[str, str, List[Dict]]:
+        """Complete document processing pipeline; unchanged re-uploads return without re-indexing.
+        
+        ``progress(stage, fraction, info)`` is called as each stage
+        (extract, chunk, embed, store) advances.
+        """
+        report = progress or (lambda stage, fraction, info=None: None)
+        
+        # Generate document ID, unless the caller already hashed the file while saving it
+        doc_id = doc_id or self.get_document_hash(file_path)
+        
+        existing = self.registry.get_document(doc_id)
+        if existing and existing['status'] == 'ready':
+            chunks = self._load_stored_chunks(doc_id)
+            if chunks and len(chunks) == existing['chunk_count']:
+                report("store", 1.0, {"chunks_total": len(chunks), "skipped": True})
+                return doc_id, self._reassemble_text(chunks), chunks
         
         # Extract text
-        text = self.extract_text_from_file(file_path)
+        report("extract", 0.0, {})
+        extract_stats: Dict = {}
+        text = self.extract_text_from_file(file_path, extract_stats)
+        report("extract", 1.0, {"chars": len(text), **extract_stats})
         
         # Chunk document
         chunks = self.chunk_document(text, doc_id)
+        report("chunk", 1.0, {"chunks_total": len(chunks)})
         
         # Store embeddings
-        self.store_document_embeddings(chunks, doc_id)
+        self.store_document_embeddings(chunks, doc_id, progress=report)
+        self.registry.upsert_document(doc_id, filename or Path(file_path).name, len(chunks), len(text))
+        report("store", 1.0, {"chunks_total": len(chunks)})
         
-        return doc_id, text, chunks
\ No newline at end of file
+        return doc_id, text, chunks
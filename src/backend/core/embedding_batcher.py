@@ -0,0 +1,158 @@
+# src/backend/core/embedding_batcher.py
+"""
+Dynamic batching of concurrent embedding requests into single model calls
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from .config import settings
+from .metrics import registry
+
+BATCH_TEXTS = registry.histogram(
+    "embedding_batch_texts", "Texts per batched embedding forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+BATCH_WAIT_SECONDS = registry.histogram(
+    "embedding_batch_wait_seconds", "Time an embedding request waited to join a batch",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+
+class BatcherClosedError(RuntimeError):
+    """Raised for requests submitted to, or still queued in, a closed batcher"""
+
+
+class EmbeddingBatcher:
+    """Collects encode requests from many threads and runs them as one batch.
+
+    The worker thread takes the waiting requests, gathers more for up to
+    max_wait_ms or until max_batch texts are queued, calls encode once and
+    hands each caller its rows through a Future. The window is only held
+    open while requests are contending (the last batch or the queue had more
+    than one), so a lone request under light load is encoded immediately.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_batch: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        self._encode = encode
+        self.max_batch = max_batch or settings.EMBEDDING_BATCH_MAX_TEXTS
+        self.max_wait = (settings.EMBEDDING_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        self._queue: Deque[Tuple[List[str], Future, float]] = deque()
+        self._queued_texts = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._last_batch_requests = 0
+        self.batches = 0
+        self.texts = 0
+        # batch size -> number of batches of that size
+        self.batch_sizes: Dict[int, int] = {}
+
+    def submit(self, texts: List[str]) -> "Future[np.ndarray]":
+        """Queue texts; the future resolves to their (len(texts), dim) embeddings"""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise BatcherClosedError("Embedding batcher is closed")
+            if self._thread is None:
+                # Started on first use, so a server can build this before forking its workers
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+            self._queue.append((list(texts), future, time.perf_counter()))
+            self._queued_texts += len(texts)
+            self._cond.notify()
+        return future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Blocking submit"""
+        return self.submit(texts).result()
+
+    @property
+    def queue_depth(self) -> int:
+        """Texts waiting for a batch"""
+        with self._cond:
+            return self._queued_texts
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "queue_depth": self._queued_texts,
+                "batches": self.batches,
+                "texts": self.texts,
+                "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000
+            }
+
+    def close(self):
+        """Stop the worker; requests still queued fail with BatcherClosedError"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._dispatch(batch)
+
+    def _next_batch(self) -> Optional[List[Tuple[List[str], Future, float]]]:
+        """Block for a first request, then gather more until the window closes or the batch is full"""
+        with self._cond:
+            while not self._queue and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                for _, future, _ in self._queue:
+                    future.set_exception(BatcherClosedError("Embedding batcher is closed"))
+                self._queue.clear()
+                self._queued_texts = 0
+                return None
+            contended = self._last_batch_requests > 1 or len(self._queue) > 1
+            deadline = time.perf_counter() + (self.max_wait if contended else 0.0)
+            while self._queued_texts < self.max_batch and not self._closed:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size = [], 0
+            # Always take at least one request, even one larger than max_batch
+            while self._queue and (not batch or size + len(self._queue[0][0]) <= self.max_batch):
+                texts, future, queued_at = self._queue.popleft()
+                batch.append((texts, future, queued_at))
+                size += len(texts)
+            self._queued_texts -= size
+            self._last_batch_requests = len(batch)
+            return batch
+
+    def _dispatch(self, batch: List[Tuple[List[str], Future, float]]):
+        started = time.perf_counter()
+        texts = [text for request_texts, _, _ in batch for text in request_texts]
+        for _, _, queued_at in batch:
+            BATCH_WAIT_SECONDS.observe(started - queued_at)
+        BATCH_TEXTS.observe(len(texts))
+        with self._cond:
+            self.batches += 1
+            self.texts += len(texts)
+            self.batch_sizes[len(texts)] = self.batch_sizes.get(len(texts), 0) + 1
+        try:
+            vectors = self._encode(texts)
+        except Exception as e:
+            logger.error(f"Batched embedding of {len(texts)} texts failed: {str(e)}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        offset = 0
+        for request_texts, future, _ in batch:
+            future.set_result(vectors[offset:offset + len(request_texts)])
+            offset += len(request_texts)
@@ -0,0 +1,154 @@
+# src/backend/core/embeddings.py
+"""
+Embedding backend shared by ingest and retrieval
+"""
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from .config import settings
+from .embedding_batcher import EmbeddingBatcher
+from .metrics import span
+
+_WHITESPACE = re.compile(r"\s+")
+# Models loaded before the server forks its workers; children share the weights copy-on-write
+_preloaded: Dict[str, SentenceTransformer] = {}
+
+
+def preload_model(model_name: Optional[str] = None) -> SentenceTransformer:
+    """Load a model once for this process and any workers forked from it.
+
+    Runs no inference: torch's thread pools must not be started before fork.
+    """
+    name = model_name or settings.EMBEDDING_MODEL
+    if name not in _preloaded:
+        _preloaded[name] = SentenceTransformer(name)
+    return _preloaded[name]
+
+
+def load_model(model_name: str) -> SentenceTransformer:
+    """The preloaded instance of model_name if there is one, else a fresh load"""
+    model = _preloaded.get(model_name)
+    return model if model is not None else SentenceTransformer(model_name)
+
+
+class EmbeddingBackend:
+    """Wraps the SentenceTransformer model and produces normalized float32 vectors"""
+
+    def __init__(self, model_name: Optional[str] = None, batch_size: Optional[int] = None, model=None,
+                 query_cache_size: Optional[int] = None, batching: Optional[bool] = None):
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.model = model if model is not None else load_model(self.model_name)
+        self.query_cache_size = settings.QUERY_EMBEDDING_CACHE_SIZE if query_cache_size is None else query_cache_size
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self.query_cache_hits = 0
+        self.query_cache_misses = 0
+        # Query encodes from concurrent requests share forward passes; ingest batches on its own
+        batching = settings.EMBEDDING_BATCHING_ENABLED if batching is None else batching
+        self.batcher = EmbeddingBatcher(self.encode) if batching else None
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Encode texts into a (len(texts), dim) float32 array of unit vectors"""
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        vectors = self.model.encode(
+            texts,
+            batch_size=batch_size or self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return _normalize(np.asarray(vectors, dtype=np.float32))
+
+    def encode_query(self, text: str) -> np.ndarray:
+        """Encode a single query into a 1-D float32 unit vector"""
+        return self.encode_queries([text])[0]
+
+    def encode_queries(self, texts: List[str]) -> np.ndarray:
+        """Encode queries, reusing recent embeddings of the same whitespace-normalized text.
+
+        Misses are encoded together in one batch. Cached vectors are read-only.
+        """
+        keys = [_WHITESPACE.sub(" ", text).strip() for text in texts]
+        vectors = np.empty((len(texts), self.dimension), dtype=np.float32)
+        missing = []
+        with self._query_cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._query_cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._query_cache.move_to_end(key)
+                    vectors[i] = cached
+            self.query_cache_hits += len(texts) - len(missing)
+            self.query_cache_misses += len(missing)
+        if missing:
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            with span("query_embed"):
+                encoded = self.batcher.encode(unique) if self.batcher is not None else self.encode(unique)
+                fresh = dict(zip(unique, encoded))
+            for i in missing:
+                vectors[i] = fresh[keys[i]]
+            if self.query_cache_size:
+                with self._query_cache_lock:
+                    for key, vector in fresh.items():
+                        vector.flags.writeable = False
+                        self._query_cache[key] = vector
+                    while len(self._query_cache) > self.query_cache_size:
+                        self._query_cache.popitem(last=False)
+        return vectors
+
+    def query_cache_stats(self) -> dict:
+        with self._query_cache_lock:
+            return {
+                "hits": self.query_cache_hits,
+                "misses": self.query_cache_misses,
+                "entries": len(self._query_cache)
+            }
+
+    def batcher_stats(self) -> Optional[dict]:
+        return self.batcher.stats() if self.batcher is not None else None
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+class HashingModel:
+    """Deterministic bag-of-words stand-in for SentenceTransformer: no download, costs roughly what tokenizing does.
+
+    For offline benchmarks and tests; pass it to EmbeddingBackend(model=...).
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vectors
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place; zero rows are left untouched"""
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
@@ -0,0 +1,181 @@
+# src/backend/core/jobs.py
+"""
+Background ingestion jobs with persisted, stage-level progress
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+from .config import settings
+from .document_processor import DocumentProcessor
+from .storage import DocumentRegistry
+
+# Share of overall progress each ingest stage accounts for
+STAGE_WEIGHTS = {"extract": 0.3, "chunk": 0.05, "embed": 0.6, "store": 0.05}
+# With a post-ingest step (eager summary) it takes this share and the rest scale down
+POST_INGEST_WEIGHT = 0.15
+
+# Minimum gap between progress writes for the same job
+_PROGRESS_INTERVAL = 0.2
+
+
+class IngestJobQueue:
+    """Runs process_uploaded_document on a worker pool; job state lives in the registry.
+
+    With execute=False (read-only serve workers) submit only records the job;
+    the writer process runs it after finding it with poll_forever.
+    """
+
+    def __init__(self, processor: DocumentProcessor, registry: DocumentRegistry, max_workers: Optional[int] = None,
+                 post_ingest: Optional[Callable[[str], None]] = None, execute: bool = True):
+        self.processor = processor
+        self.registry = registry
+        self.execute = execute
+        # post_ingest(document_id) runs as a final "summarize" stage before the job completes
+        self.post_ingest = post_ingest
+        if post_ingest is None:
+            self.stage_weights = dict(STAGE_WEIGHTS)
+        else:
+            self.stage_weights = {stage: weight * (1 - POST_INGEST_WEIGHT) for stage, weight in STAGE_WEIGHTS.items()}
+            self.stage_weights["summarize"] = POST_INGEST_WEIGHT
+        self.stage_order = list(self.stage_weights)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.INGEST_WORKERS,
+            thread_name_prefix="ingest"
+        ) if execute else None
+        self._lock = threading.Lock()
+        self._active = set()
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+
+    def submit(self, file_path: str, filename: Optional[str] = None, document_id: Optional[str] = None) -> str:
+        """Queue a saved upload for ingestion and return its job id"""
+        job_id = uuid.uuid4().hex
+        self.registry.create_job(job_id, file_path, filename, document_id)
+        if self.execute:
+            self._schedule(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self.registry.get_job(job_id)
+        if job is None:
+            return None
+        job.pop('file_path', None)
+        return job
+
+    def recover(self) -> int:
+        """Re-queue jobs interrupted by a restart; jobs whose upload is gone are failed"""
+        recovered = 0
+        for job in self.registry.list_jobs(["queued", "running"]):
+            if not os.path.exists(job['file_path']):
+                self.registry.update_job(job['job_id'], status="failed", error="Upload file missing after restart",
+                                         finished_at=time.time())
+                continue
+            self.registry.update_job(job['job_id'], status="queued", stage=None, progress=0.0, stages={})
+            self._schedule(job['job_id'])
+            recovered += 1
+        if recovered:
+            logger.info(f"Recovered {recovered} ingest jobs")
+        return recovered
+
+    def start_polling(self, interval: Optional[float] = None):
+        """Run jobs other processes queue in the shared registry, checking every interval seconds"""
+        if not self.execute or self._poller is not None:
+            return
+        interval = settings.INGEST_POLL_SECONDS if interval is None else interval
+        self._poller = threading.Thread(target=self._poll, args=(interval,), name="ingest-poll", daemon=True)
+        self._poller.start()
+
+    def _poll(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                for job in self.registry.list_jobs(["queued"]):
+                    self._schedule(job['job_id'])
+            except Exception as e:
+                logger.warning(f"Polling for queued ingest jobs failed: {str(e)}")
+
+    def shutdown(self, wait: bool = False):
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _schedule(self, job_id: str):
+        with self._lock:
+            if job_id in self._active:
+                return
+            self._active.add(job_id)
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id: str):
+        job = self.registry.get_job(job_id)
+        if job is None or job['status'] != "queued":
+            # Already run, e.g. picked up again by a poll that listed it just before it started
+            with self._lock:
+                self._active.discard(job_id)
+            return
+        started = time.time()
+        self.registry.update_job(job_id, status="running", started_at=started)
+        stages: Dict[str, Dict] = {}
+        last_write = [0.0]
+
+        def progress(stage: str, fraction: float, info: Optional[Dict] = None):
+            now = time.time()
+            entry = stages.setdefault(stage, {"started_at": now})
+            entry.update(info or {})
+            entry["progress"] = round(fraction, 4)
+            entry["seconds"] = round(now - entry["started_at"], 3)
+            if stage == "embed" and entry["seconds"] > 0 and "chunks_done" in entry:
+                entry["chunks_per_second"] = round(entry["chunks_done"] / entry["seconds"], 1)
+            if stage == "extract" and entry["seconds"] > 0 and "chars" in entry:
+                entry["chars_per_second"] = round(entry["chars"] / entry["seconds"], 1)
+            # Earlier stages are complete once a later one reports
+            for earlier in self.stage_order[:self.stage_order.index(stage)]:
+                stages.setdefault(earlier, {"started_at": now, "seconds": 0.0})["progress"] = 1.0
+            if fraction < 1.0 and now - last_write[0] < _PROGRESS_INTERVAL:
+                return
+            last_write[0] = now
+            overall = sum(self.stage_weights[name] * stages.get(name, {}).get("progress", 0.0) for name in self.stage_order)
+            self.registry.update_job(job_id, stage=stage, progress=round(overall, 4), stages=stages)
+
+        try:
+            document_id, _, chunks = self.processor.process_uploaded_document(
+                job['file_path'], job['filename'], job['document_id'], progress=progress
+            )
+            if self.post_ingest is not None:
+                progress("summarize", 0.0, {})
+                try:
+                    self.post_ingest(document_id)
+                    progress("summarize", 1.0, {})
+                except Exception as e:
+                    # The document is indexed; a failed precompute only costs a later LLM call
+                    logger.warning(f"Post-ingest step for {document_id} failed: {str(e)}")
+                    progress("summarize", 1.0, {"error": str(e)})
+            self.registry.update_job(
+                job_id, status="completed", stage=self.stage_order[-1], progress=1.0, stages=stages,
+                document_id=document_id, chunk_count=len(chunks), finished_at=time.time()
+            )
+        except Exception as e:
+            logger.error(f"Ingest job {job_id} failed: {str(e)}")
+            self.registry.update_job(job_id, status="failed", error=str(e), stages=stages, finished_at=time.time())
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+            self._retire_upload(job['file_path'])
+
+    @staticmethod
+    def _retire_upload(file_path: str):
+        """Delete a finished job's saved upload; files outside UPLOAD_DIR belong to the caller"""
+        upload_dir = os.path.realpath(settings.UPLOAD_DIR)
+        if os.path.dirname(os.path.realpath(file_path)) != upload_dir:
+            return
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove upload {file_path}: {str(e)}")
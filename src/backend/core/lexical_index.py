@@ -0,0 +1,255 @@
+# src/backend/core/lexical_index.py
+"""
+In-process BM25 inverted index over document chunks.
+
+Each document's chunks get a contiguous range of integer chunk numbers, so
+posting lists stay sorted under appends and a document filter is a binary
+search per posting list rather than a scan.
+"""
+import math
+import os
+import pickle
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+_FORMAT_VERSION = 1
+_MIN_IDF = 0.05
+# Words, numbers and joined forms such as "xj-2000", "v1.2" or "rfc_9110"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_PART_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound identifiers are kept whole and also split into parts"""
+    tokens = []
+    for match in _TOKEN_RE.findall(text.lower()):
+        tokens.append(match)
+        if not match.isalnum():
+            tokens.extend(_PART_RE.findall(match))
+    return tokens
+
+
+class LexicalIndex:
+    """BM25 over chunk text with array-backed postings and per-document incremental updates"""
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75,
+                 save_interval: float = 30.0, compact_ratio: float = 0.3):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.save_interval = save_interval
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        # Serializes writers of the file; held while pickling, unlike _lock
+        self._save_lock = threading.Lock()
+        self._last_save = 0.0
+        self._dirty = False
+        self._reset()
+
+    def _reset(self):
+        # term -> (chunk numbers, term frequencies), both ascending by chunk number
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._lengths = array('I')       # tokens per chunk number
+        self._chunk_ids: List[str] = []  # chunk number -> chunk id
+        self._alive = bytearray()
+        self._docs: Dict[str, Tuple[int, int]] = {}  # doc_id -> [start, end) chunk numbers
+        self._live_chunks = 0
+        self._live_tokens = 0
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "LexicalIndex":
+        """Open the index persisted at path; a missing or unreadable file gives an empty index"""
+        index = cls(path, **kwargs)
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as file:
+                    state = pickle.load(file)
+                if state.get('version') == _FORMAT_VERSION:
+                    for name in ('_postings', '_lengths', '_chunk_ids', '_alive', '_docs',
+                                 '_live_chunks', '_live_tokens'):
+                        setattr(index, name, state[name])
+            except Exception as e:
+                logger.warning(f"Discarding unreadable lexical index {path}: {e}")
+                index._reset()
+        return index
+
+    def __len__(self) -> int:
+        return self._live_chunks
+
+    def documents(self) -> Dict[str, int]:
+        """doc_id -> number of indexed chunks"""
+        with self._lock:
+            return {doc_id: end - start for doc_id, (start, end) in self._docs.items()}
+
+    def index_document(self, doc_id: str, chunks: Sequence[Dict]):
+        """(Re)index one document's chunks, replacing any earlier version"""
+        with self._lock:
+            self._remove(doc_id)
+            start = len(self._chunk_ids)
+            for offset, chunk in enumerate(chunks):
+                chunk_no = start + offset
+                counts = Counter(tokenize(chunk['text']))
+                length = sum(counts.values())
+                for term, tf in counts.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array('I'), array('H'))
+                    postings[0].append(chunk_no)
+                    postings[1].append(min(tf, 65535))
+                self._lengths.append(length)
+                self._chunk_ids.append(chunk['id'])
+                self._alive.append(1)
+                self._live_tokens += length
+            self._docs[doc_id] = (start, len(self._chunk_ids))
+            self._live_chunks += len(chunks)
+            self._dirty = True
+            self._maybe_compact()
+        self.save(force=False)
+
+    def remove_document(self, doc_id: str):
+        with self._lock:
+            if self._remove(doc_id):
+                self._dirty = True
+                self._maybe_compact()
+        self.save(force=False)
+
+    def search(self, query: str, doc_ids: Optional[Iterable[str]] = None, top_k: int = 10) -> List[Dict]:
+        """BM25 top-k as [{id, doc_id, bm25}], optionally limited to some documents"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            if not terms or not self._live_chunks:
+                return []
+            selected = self._docs if doc_ids is None else set(doc_ids) & self._docs.keys()
+            ranges = sorted((*self._docs[doc_id], doc_id) for doc_id in selected)
+            if not ranges:
+                return []
+            starts = np.fromiter((start for start, _, _ in ranges), dtype=np.int64, count=len(ranges))
+            ends = np.fromiter((end for _, end, _ in ranges), dtype=np.int64, count=len(ranges))
+            avg_length = self._live_tokens / self._live_chunks
+
+            matched, scores = [], []
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                # Document frequency counts postings of removed chunks until the next compaction
+                df = len(postings[0])
+                idf = math.log(1.0 + (self._live_chunks - df + 0.5) / (df + 0.5))
+                if idf < _MIN_IDF:
+                    # Near-universal terms barely move BM25 but dominate the work
+                    continue
+                chunk_nos = np.frombuffer(postings[0], dtype=np.uint32)
+                lo = np.searchsorted(chunk_nos, starts)
+                hi = np.searchsorted(chunk_nos, ends)
+                counts = hi - lo
+                total = int(counts.sum())
+                if not total:
+                    del chunk_nos
+                    continue
+                # Expand the [lo, hi) spans into posting positions without a Python loop
+                positions = np.arange(total) + np.repeat(lo - (np.cumsum(counts) - counts), counts)
+                hits = chunk_nos[positions].astype(np.int64)
+                tfs = np.frombuffer(postings[1], dtype=np.uint16)[positions].astype(np.float64)
+                lengths = np.frombuffer(self._lengths, dtype=np.uint32)[hits]
+                norm = self.k1 * (1.0 - self.b + self.b * lengths / avg_length)
+                matched.append(hits)
+                scores.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+                del chunk_nos, lengths
+
+            if not matched:
+                return []
+            hits = np.concatenate(matched)
+            unique, inverse = np.unique(hits, return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate(scores))
+            if len(unique) > top_k:
+                best = np.argpartition(-totals, top_k)[:top_k]
+            else:
+                best = np.arange(len(unique))
+            best = best[np.argsort(-totals[best], kind='stable')]
+            owners = np.searchsorted(starts, unique[best], side='right') - 1
+            return [
+                {'id': self._chunk_ids[int(unique[i])], 'doc_id': ranges[owner][2], 'bm25': float(totals[i])}
+                for i, owner in zip(best.tolist(), owners.tolist())
+            ]
+
+    def save(self, force: bool = True):
+        """Persist atomically; without force, only when dirty and the save interval has passed.
+
+        State is copied under the index lock and pickled outside it, so
+        searches only wait for the copy, not for serialization and disk I/O.
+        """
+        if not self.path:
+            return
+        # A periodic save finding one already in progress leaves its changes for the next
+        if not self._save_lock.acquire(blocking=force):
+            return
+        try:
+            with self._lock:
+                if not self._dirty or (not force and time.monotonic() - self._last_save < self.save_interval):
+                    return
+                # Posting arrays grow in place on ingest; slicing copies them
+                state = {
+                    'version': _FORMAT_VERSION,
+                    '_postings': {term: (nos[:], tfs[:]) for term, (nos, tfs) in self._postings.items()},
+                    '_lengths': self._lengths[:], '_chunk_ids': list(self._chunk_ids),
+                    '_alive': bytearray(self._alive), '_docs': dict(self._docs),
+                    '_live_chunks': self._live_chunks, '_live_tokens': self._live_tokens
+                }
+                self._dirty = False
+                self._last_save = time.monotonic()
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'wb') as file:
+                    pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                with self._lock:
+                    self._dirty = True
+                raise
+        finally:
+            self._save_lock.release()
+
+    def _remove(self, doc_id: str) -> bool:
+        span = self._docs.pop(doc_id, None)
+        if span is None:
+            return False
+        start, end = span
+        for chunk_no in range(start, end):
+            self._alive[chunk_no] = 0
+            self._live_tokens -= self._lengths[chunk_no]
+        self._live_chunks -= end - start
+        return True
+
+    def _maybe_compact(self):
+        """Renumber live chunks and drop removed ones once they make up a large share of the index"""
+        total = len(self._chunk_ids)
+        if not total or (total - self._live_chunks) / total < self.compact_ratio:
+            return
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        # Old -> new chunk numbers; monotonic, so posting lists stay sorted
+        renumber = (np.cumsum(alive) - 1).astype(np.uint32)
+        compacted = {}
+        for term, (chunk_nos, tfs) in self._postings.items():
+            numbers = np.frombuffer(chunk_nos, dtype=np.uint32)
+            keep = alive[numbers]
+            if keep.any():
+                compacted[term] = (
+                    array('I', renumber[numbers[keep]].tobytes()),
+                    array('H', np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes())
+                )
+            del numbers
+        self._postings = compacted
+        self._lengths = array('I', np.frombuffer(self._lengths, dtype=np.uint32)[alive].tobytes())
+        self._chunk_ids = [chunk_id for chunk_id, live in zip(self._chunk_ids, self._alive) if live]
+        self._alive = bytearray(b"\x01" * len(self._chunk_ids))
+        self._docs = {
+            doc_id: (int(renumber[start]), int(renumber[start]) + end - start)
+            for doc_id, (start, end) in self._docs.items()
+        }
@@ -0,0 +1,447 @@
+# src/backend/core/llm.py
+"""
+Async LLM provider clients with pooled connections and concurrency limits,
+and a router that fails over, retries and hedges across them
+"""
+import asyncio
+import hashlib
+import random
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import anthropic
+import httpx
+import numpy as np
+import openai
+from loguru import logger
+
+from .config import settings
+
+
+class LLMProvider:
+    """Base class: one pooled async client, a concurrency cap and a request timeout"""
+
+    name = "base"
+
+    def __init__(self, model: str, max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        self.model = model
+        self.timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+        self._semaphore = asyncio.Semaphore(max_concurrency or settings.LLM_MAX_CONCURRENCY)
+
+    async def complete(self, prompt: str, max_tokens: int) -> str:
+        """Return the completion text, waiting for a free slot and enforcing the timeout"""
+        async with self._semaphore:
+            return await asyncio.wait_for(self._complete(prompt, max_tokens), timeout=self.timeout)
+
+    async def stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        """Yield completion text fragments as they arrive; the HTTP read timeout bounds gaps between them"""
+        async with self._semaphore:
+            async for text in self._stream(prompt, max_tokens):
+                if text:
+                    yield text
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        raise NotImplementedError
+
+    async def _stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        # Providers without native streaming send the whole completion as one fragment
+        yield await asyncio.wait_for(self._complete(prompt, max_tokens), timeout=self.timeout)
+
+    async def aclose(self):
+        """Close pooled HTTP connections"""
+
+
+def _http_client(timeout: float) -> httpx.AsyncClient:
+    """Shared keep-alive connection pool for one provider"""
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_CONNECTIONS
+        )
+    )
+
+
+class AnthropicProvider(LLMProvider):
+    name = "anthropic"
+
+    def __init__(self, api_key: str, model: Optional[str] = None, **kwargs):
+        super().__init__(model or settings.ANTHROPIC_MODEL, **kwargs)
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            timeout=self.timeout,
+            http_client=_http_client(self.timeout)
+        )
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        response = await self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.content[0].text
+
+    async def _stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        async with self.client.messages.stream(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+    async def aclose(self):
+        await self.client.close()
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str], model: Optional[str] = None, **kwargs):
+        super().__init__(model or settings.OPENAI_MODEL, **kwargs)
+        # An empty key defers the missing-credentials error to request time, as before
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key or "",
+            timeout=self.timeout,
+            http_client=_http_client(self.timeout)
+        )
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
+
+    async def _stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+    async def aclose(self):
+        await self.client.close()
+
+
+class StubProvider(LLMProvider):
+    """Local provider for development and load tests: deterministic text, no network"""
+
+    name = "stub"
+
+    def __init__(self, model: str = "stub", delay: Optional[float] = None, **kwargs):
+        super().__init__(model, **kwargs)
+        self.delay = settings.LLM_STUB_DELAY_SECONDS if delay is None else delay
+
+    async def _complete(self, prompt: str, max_tokens: int) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        digest = hashlib.md5(prompt.encode('utf-8')).hexdigest()[:8]
+        return f"Stub response {digest} to a {len(prompt)}-character prompt."
+
+    async def _stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        for word in (await self._complete(prompt, max_tokens)).split(" "):
+            yield word + " "
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Every configured provider failed or has its circuit open"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after reset_seconds one trial request may close it again"""
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_seconds: Optional[float] = None):
+        self.failure_threshold = failure_threshold or settings.LLM_BREAKER_FAILURES
+        self.reset_seconds = settings.LLM_BREAKER_RESET_SECONDS if reset_seconds is None else reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        """Whether a request may be sent now, without claiming the half-open trial"""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._trial_running)
+
+    def allow(self) -> bool:
+        """Claim permission for one request"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back a claimed trial that ended without a verdict (e.g. a cancelled hedge)"""
+        self._trial_running = False
+
+
+class LatencyHistogram:
+    """Log-spaced latency buckets with exponential decay, so percentiles track recent traffic"""
+
+    BOUNDS = np.geomspace(0.05, 120.0, 40)
+
+    def __init__(self, decay: float = 0.98):
+        self.decay = decay
+        self.counts = np.zeros(len(self.BOUNDS) + 1)
+        self.observations = 0
+
+    def observe(self, seconds: float):
+        self.counts *= self.decay
+        self.counts[np.searchsorted(self.BOUNDS, seconds)] += 1.0
+        self.observations += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile; None before any observation"""
+        total = self.counts.sum()
+        if not total:
+            return None
+        index = int(np.searchsorted(np.cumsum(self.counts), total * q / 100.0))
+        return float(self.BOUNDS[min(index, len(self.BOUNDS) - 1)])
+
+    def snapshot(self) -> Dict:
+        return {
+            "observations": self.observations,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95)
+        }
+
+
+def _failure_kind(exc: BaseException) -> str:
+    """'retry' for transient errors, 'failover' for provider-side problems, 'fatal' for bad requests"""
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TransportError,
+                        anthropic.APIConnectionError, openai.APIConnectionError)):
+        return "retry"
+    status = getattr(exc, "status_code", None)
+    if status in (408, 409, 429) or (status is not None and status >= 500):
+        return "retry"
+    if status in (401, 403, 404):
+        return "failover"
+    if status is not None:
+        # The request itself was rejected; another provider would reject it too
+        return "fatal"
+    return "failover"
+
+
+class LLMRouter(LLMProvider):
+    """Sends each request to the best available provider.
+
+    Providers are tried in configured order, or fastest recent p50 first when
+    latency routing is on. Each has a circuit breaker; transient errors are
+    retried with jittered exponential backoff before failing over. With
+    hedging, a completion still pending after the primary's p95 latency is also
+    sent to the next provider and the first answer wins. Streams fail over only
+    before their first fragment and are not hedged.
+    """
+
+    name = "router"
+
+    def __init__(self, providers: List[LLMProvider], retries: Optional[int] = None,
+                 backoff_seconds: Optional[float] = None, hedge: Optional[bool] = None,
+                 hedge_min_seconds: Optional[float] = None, route_by_latency: Optional[bool] = None,
+                 breakers: Optional[Dict[str, CircuitBreaker]] = None):
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = providers
+        # Artifacts and context budgets are keyed on the primary provider's model
+        self.model = providers[0].model
+        self.retries = settings.LLM_RETRIES if retries is None else retries
+        self.backoff_seconds = settings.LLM_RETRY_BACKOFF_SECONDS if backoff_seconds is None else backoff_seconds
+        self.hedge = settings.LLM_HEDGE_ENABLED if hedge is None else hedge
+        self.hedge_min_seconds = settings.LLM_HEDGE_MIN_SECONDS if hedge_min_seconds is None else hedge_min_seconds
+        self.route_by_latency = settings.LLM_ROUTE_BY_LATENCY if route_by_latency is None else route_by_latency
+        self.breakers = {p.name: (breakers or {}).get(p.name) or CircuitBreaker() for p in providers}
+        self.latency = {p.name: LatencyHistogram() for p in providers}
+        self.counters = {p.name: {"requests": 0, "failures": 0, "retries": 0, "hedges": 0} for p in providers}
+
+    def ordered(self) -> List[LLMProvider]:
+        """Providers whose breaker admits a request, preferred first"""
+        available = [p for p in self.providers if self.breakers[p.name].available()]
+        if self.route_by_latency:
+            # Providers without enough samples keep their configured position relative to each other
+            def recent_p50(provider):
+                histogram = self.latency[provider.name]
+                return histogram.percentile(50) if histogram.observations >= 5 else float("inf")
+            available.sort(key=recent_p50)
+        return available
+
+    async def complete(self, prompt: str, max_tokens: int) -> str:
+        candidates = self.ordered()
+        if not candidates:
+            raise ProviderUnavailableError("All LLM providers have open circuits")
+        last_error: Optional[BaseException] = None
+        position = 0
+        if self.hedge and len(candidates) > 1:
+            try:
+                return await self._hedged(candidates[0], candidates[1], prompt, max_tokens)
+            except Exception as e:
+                if _failure_kind(e) == "fatal":
+                    raise
+                last_error = e
+                position = 2
+        for provider in candidates[position:]:
+            try:
+                return await self._attempt(provider, prompt, max_tokens)
+            except Exception as e:
+                if _failure_kind(e) == "fatal":
+                    raise
+                logger.warning(f"LLM provider {provider.name} failed, trying the next one: {e!r}")
+                last_error = e
+        raise ProviderUnavailableError(f"All LLM providers failed: {last_error!r}") from last_error
+
+    async def stream(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        candidates = self.ordered()
+        if not candidates:
+            raise ProviderUnavailableError("All LLM providers have open circuits")
+        last_error: Optional[BaseException] = None
+        for provider in candidates:
+            breaker = self.breakers[provider.name]
+            if not breaker.allow():
+                continue
+            self.counters[provider.name]["requests"] += 1
+            started = False
+            try:
+                async for text in provider.stream(prompt, max_tokens):
+                    started = True
+                    yield text
+            except BaseException as e:
+                # Cancellation, a consumer that stopped reading, or a rejected request say nothing about health
+                if not isinstance(e, Exception) or _failure_kind(e) == "fatal":
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                self.counters[provider.name]["failures"] += 1
+                if started:
+                    # Fragments already reached the client; a different provider cannot continue them
+                    raise
+                logger.warning(f"LLM provider {provider.name} stream failed, trying the next one: {e!r}")
+                last_error = e
+                continue
+            breaker.record_success()
+            return
+        raise ProviderUnavailableError(f"All LLM providers failed: {last_error!r}") from last_error
+
+    async def _attempt(self, provider: LLMProvider, prompt: str, max_tokens: int) -> str:
+        """One provider with retries; raises the last error once retries are exhausted"""
+        breaker = self.breakers[provider.name]
+        counters = self.counters[provider.name]
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                raise ProviderUnavailableError(f"Circuit open for {provider.name}")
+            counters["requests"] += 1
+            start = time.perf_counter()
+            try:
+                result = await provider.complete(prompt, max_tokens)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                kind = _failure_kind(e)
+                if kind == "fatal":
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                counters["failures"] += 1
+                if kind != "retry" or attempt == self.retries:
+                    raise
+                counters["retries"] += 1
+                # Full jitter keeps retries from many requests from arriving in lockstep
+                await asyncio.sleep(random.uniform(0, self.backoff_seconds * 2 ** attempt))
+                continue
+            breaker.record_success()
+            self.latency[provider.name].observe(time.perf_counter() - start)
+            return result
+
+    async def _hedged(self, primary: LLMProvider, secondary: LLMProvider, prompt: str, max_tokens: int) -> str:
+        """Start secondary if primary is still running after its p95; first success wins"""
+        delay = max(self.hedge_min_seconds, self.latency[primary.name].percentile(95) or 0.0)
+        tasks = [asyncio.ensure_future(self._attempt(primary, prompt, max_tokens))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.counters[secondary.name]["hedges"] += 1
+                tasks.append(asyncio.ensure_future(self._attempt(secondary, prompt, max_tokens)))
+            pending = set(tasks)
+            last_error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    if _failure_kind(last_error) == "fatal":
+                        raise last_error
+            if len(tasks) == 1:
+                # Primary failed before the hedge fired; the secondary gets a normal attempt
+                return await self._attempt(secondary, prompt, max_tokens)
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            provider.name: {
+                "model": provider.model,
+                "circuit": self.breakers[provider.name].state,
+                **self.counters[provider.name],
+                **self.latency[provider.name].snapshot()
+            }
+            for provider in self.providers
+        }
+
+    async def aclose(self):
+        await asyncio.gather(*(provider.aclose() for provider in self.providers), return_exceptions=True)
+
+
+def _configured_provider(name: str) -> Optional[LLMProvider]:
+    if name == "anthropic":
+        return AnthropicProvider(settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
+    if name == "openai":
+        return OpenAIProvider(settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+    if name == "stub":
+        return StubProvider()
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def build_provider() -> LLMProvider:
+    """Router over the providers in LLM_PROVIDERS that have credentials.
+
+    With LLM_PROVIDERS empty: every provider with a key, Anthropic first, or
+    OpenAI alone (failing at request time) when no key is configured.
+    """
+    names = [name.strip().lower() for name in settings.LLM_PROVIDERS.split(",") if name.strip()]
+    if not names:
+        names = [name for name, key in (("anthropic", settings.ANTHROPIC_API_KEY),
+                                        ("openai", settings.OPENAI_API_KEY)) if key]
+    providers = [provider for provider in map(_configured_provider, names) if provider is not None]
+    if not providers:
+        providers = [OpenAIProvider(settings.OPENAI_API_KEY)]
+    return LLMRouter(providers)
@@ -0,0 +1,192 @@
+# src/backend/core/metrics.py
+"""
+In-process latency histograms, counters and request trace ids, exported in Prometheus text format
+"""
+import bisect
+import contextvars
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Seconds; stages range from sub-millisecond lookups to multi-second LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_trace_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_id", default=None)
+# Per-request stage totals, filled by span() and logged once when the request ends
+_request_spans: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("request_spans", default=None)
+
+
+class Sample(NamedTuple):
+    """A value computed at scrape time, e.g. a cache counter owned by another component"""
+    name: str
+    kind: str  # counter or gauge
+    help: str
+    labels: Dict[str, str]
+    value: float
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label combination"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[float, int]]:
+        """(sum, count) per label combination"""
+        with self._lock:
+            return {labels: (total, count) for labels, (_, total, count) in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            base = _labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = f'{base},le="{le}"' if base else f'le="{le}"'
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            lines.append(f"{self.name}_sum{_wrap(base)} {total}")
+            lines.append(f"{self.name}_count{_wrap(base)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter with one series per label combination"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_wrap(_labels(self.labelnames, labels))} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help, labelnames, buckets))
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help, labelnames))
+
+    def render(self, samples: Iterable[Sample] = ()) -> str:
+        """Prometheus text exposition of every metric plus the given scrape-time samples"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        described = set()
+        for sample in samples:
+            if sample.name not in described:
+                described.add(sample.name)
+                lines.append(f"# HELP {sample.name} {sample.help}")
+                lines.append(f"# TYPE {sample.name} {sample.kind}")
+            labels = ",".join(f'{key}="{_escape(value)}"' for key, value in sample.labels.items())
+            lines.append(f"{sample.name}{_wrap(labels)} {float(sample.value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+STAGE_SECONDS = registry.histogram("pipeline_stage_seconds", "Time spent in each pipeline stage", ("stage",))
+REQUEST_SECONDS = registry.histogram("http_request_seconds", "HTTP request latency", ("method", "route", "status"))
+LLM_TOKENS = registry.counter("llm_tokens_total", "Tokens sent to and received from LLM providers", ("kind",))
+
+
+class span:
+    """Time a pipeline stage into pipeline_stage_seconds and the current request's trace.
+
+    A plain class rather than @contextmanager: this sits on hot paths and the
+    generator machinery would nearly double its cost.
+    """
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, self.stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans[self.stage] = spans.get(self.stage, 0.0) + elapsed
+        return False
+
+
+def start_trace(trace_id: Optional[str] = None):
+    """Begin a request trace; returns tokens for end_trace"""
+    return (_trace_id.set(trace_id or uuid.uuid4().hex[:16]), _request_spans.set({}))
+
+
+def end_trace(tokens):
+    """Finish the trace started by start_trace"""
+    _trace_id.reset(tokens[0])
+    _request_spans.reset(tokens[1])
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+def current_spans() -> Dict[str, float]:
+    """Seconds per stage recorded so far in the current trace"""
+    return dict(_request_spans.get() or {})
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _wrap(labels: str) -> str:
+    return "{" + labels + "}" if labels else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,131 @@
+# src/backend/core/pdf_extract.py
+"""
+Page-level PDF text extraction, fanned out over a process pool.
+
+Kept free of heavy imports (torch, chromadb) so spawned workers start fast.
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import List, Optional
+
+import PyPDF2
+import pdfplumber
+from loguru import logger
+
+
+@dataclass
+class PageText:
+    index: int
+    text: str
+    seconds: float
+    fallback: bool = False
+
+
+class PdfOpenError(ValueError):
+    """Raised when pdfplumber cannot open a file at all"""
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def count_pages(file_path: str) -> int:
+    try:
+        with pdfplumber.open(file_path) as pdf:
+            return len(pdf.pages)
+    except Exception as e:
+        raise PdfOpenError(f"Cannot open {file_path} with pdfplumber: {str(e)}") from e
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[PageText]:
+    """Extract pages [start, end) with pdfplumber, retrying only failed pages with PyPDF2"""
+    results = []
+    fallback_reader = None
+    with pdfplumber.open(file_path) as pdf:
+        for index in range(start, end):
+            started = time.perf_counter()
+            try:
+                text = pdf.pages[index].extract_text() or ""
+                used_fallback = False
+            except Exception:
+                if fallback_reader is None:
+                    fallback_reader = PyPDF2.PdfReader(file_path)
+                try:
+                    text = fallback_reader.pages[index].extract_text() or ""
+                except Exception:
+                    text = ""
+                used_fallback = True
+            results.append(PageText(index, text, time.perf_counter() - started, used_fallback))
+    return results
+
+
+def extract_pages(file_path: str, workers: int, pages_per_task: int, min_parallel_pages: int) -> List[PageText]:
+    """Extract every page in order; large documents are split into page ranges across processes"""
+    total = count_pages(file_path)
+    if total < min_parallel_pages or workers <= 1:
+        return extract_page_range(file_path, 0, total)
+
+    try:
+        return _extract_in_pool(file_path, total, workers, pages_per_task)
+    except BrokenProcessPool:
+        # A worker died (out of memory, or a crash in pdfminer); a fresh pool gets one more try
+        logger.warning(f"PDF extraction pool broke while reading {file_path}; retrying in a new pool")
+        return _extract_in_pool(file_path, total, workers, pages_per_task)
+
+
+def _extract_in_pool(file_path: str, total: int, workers: int, pages_per_task: int) -> List[PageText]:
+    pool = _get_pool(workers)
+    try:
+        futures = [
+            pool.submit(extract_page_range, file_path, start, min(start + pages_per_task, total))
+            for start in range(0, total, pages_per_task)
+        ]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+        return pages
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+
+
+def extract_all_with_pypdf2(file_path: str) -> List[PageText]:
+    """Whole-file fallback for PDFs pdfplumber cannot open at all"""
+    pages = []
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for index, page in enumerate(reader.pages):
+            started = time.perf_counter()
+            text = page.extract_text() or ""
+            pages.append(PageText(index, text, time.perf_counter() - started, True))
+    return pages
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: safe alongside server threads and the same on Windows and Linux
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Stop a broken pool; the next _get_pool starts a new one unless another thread already has"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
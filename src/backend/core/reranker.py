@@ -0,0 +1,104 @@
+# src/backend/core/reranker.py
+"""
+Cross-encoder reranking of retrieved chunks under a latency budget
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+
+
+class CrossEncoderReranker:
+    """Scores (query, chunk) pairs in batches, caching scores per query hash and chunk"""
+
+    def __init__(self, model_name: Optional[str] = None, batch_size: Optional[int] = None,
+                 cache_size: Optional[int] = None, model=None):
+        self.model_name = model_name or settings.RERANK_MODEL
+        self.batch_size = batch_size or settings.RERANK_BATCH_SIZE
+        self.cache_size = cache_size or settings.RERANK_CACHE_SIZE
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._scores: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timeouts = 0
+
+    @property
+    def model(self):
+        """Load the cross-encoder on first use"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        self.model.predict([("warm-up", "warm-up")], show_progress_bar=False)
+
+    def rerank(self, query: str, chunks: List[Dict], top_n: int, budget_seconds: Optional[float] = None) -> List[Dict]:
+        """Return the top_n chunks by cross-encoder score.
+
+        Candidates are scored in first-stage order, one batch at a time. If the
+        budget runs out, scored chunks rank first and the rest keep their
+        first-stage order.
+        """
+        if not chunks:
+            return []
+        deadline = None if budget_seconds is None else time.perf_counter() + budget_seconds
+        query_hash = hashlib.md5(query.encode('utf-8')).hexdigest()
+        keys = [self._cache_key(query_hash, chunk) for chunk in chunks]
+
+        scores: Dict[int, float] = {}
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[i] = self._scores[key]
+            self.cache_hits += len(scores)
+
+        pending = [i for i in range(len(chunks)) if i not in scores]
+        for start in range(0, len(pending), self.batch_size):
+            if deadline is not None and time.perf_counter() >= deadline:
+                self.timeouts += 1
+                break
+            batch = pending[start:start + self.batch_size]
+            pairs = [(query, chunks[i]['content']) for i in batch]
+            batch_scores = np.asarray(self.model.predict(pairs, show_progress_bar=False), dtype=np.float32).reshape(-1)
+            with self._cache_lock:
+                self.cache_misses += len(batch)
+                for i, score in zip(batch, batch_scores.tolist()):
+                    scores[i] = score
+                    self._scores[keys[i]] = score
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+
+        scored = sorted(scores, key=scores.get, reverse=True)
+        unscored = [i for i in range(len(chunks)) if i not in scores]
+        ranked = []
+        for i in (scored + unscored)[:top_n]:
+            chunk = dict(chunks[i])
+            if i in scores:
+                chunk['rerank_score'] = round(scores[i], 6)
+            ranked.append(chunk)
+        return ranked
+
+    def stats(self) -> Dict:
+        with self._cache_lock:
+            return {
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_entries": len(self._scores),
+                "budget_timeouts": self.timeouts
+            }
+
+    @staticmethod
+    def _cache_key(query_hash: str, chunk: Dict) -> Tuple[str, str, str]:
+        # The content hash keeps a score from outliving an edited chunk with the same id
+        return query_hash, chunk['id'], chunk.get('metadata', {}).get('chunk_hash', '')
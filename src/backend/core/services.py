@@ -0,0 +1,198 @@
+# src/backend/core/services.py
+"""
+Process-wide service container shared by all API requests
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from .ai_engine import AIEngine
+from .config import settings
+from .document_processor import DocumentProcessor
+from .jobs import IngestJobQueue
+from .metrics import Sample
+
+
+class ServiceContainer:
+    """Owns the long-lived DocumentProcessor and AIEngine for the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.document_processor: Optional[DocumentProcessor] = None
+        self.ai_engine: Optional[AIEngine] = None
+        self.jobs: Optional[IngestJobQueue] = None
+        self.model_loaded = False
+        self.warmed_up = False
+        self.startup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self._failed_at: Optional[float] = None
+        # Event loop that owns the async LLM clients; needed to run coroutines from ingest workers
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Read-only serve workers reload what the writer stores
+        self._sync_stop = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> "ServiceContainer":
+        """Load the embedding model and vector store once; safe to call repeatedly.
+
+        After a failed start, calls within SERVICES_RETRY_SECONDS fail fast with
+        the same error instead of each reloading the model.
+        """
+        with self._lock:
+            if loop is not None:
+                self.loop = loop
+            if self.document_processor is not None:
+                return self
+            if self._failed_at is not None and time.monotonic() - self._failed_at < settings.SERVICES_RETRY_SECONDS:
+                raise RuntimeError(self.error)
+            started = time.perf_counter()
+            processor = engine = jobs = None
+            try:
+                # Built into locals and published together, so a failure leaves nothing half-started
+                writer = settings.VECTOR_STORE_WRITER
+                processor = DocumentProcessor()
+                self.model_loaded = True
+                if writer and settings.VECTOR_DB_AUTO_MIGRATE:
+                    processor.migrate_legacy_collections()
+                engine = AIEngine(document_processor=processor)
+                self._warm_up(processor, engine)
+                post_ingest = None
+                if settings.SUMMARY_EAGER:
+                    if self.loop is None:
+                        logger.warning("SUMMARY_EAGER needs the app event loop; summaries will be generated on demand")
+                    else:
+                        post_ingest = self._precompute_summary
+                jobs = IngestJobQueue(processor, processor.registry, post_ingest=post_ingest, execute=writer)
+            except Exception as e:
+                self.error = str(e)
+                self._failed_at = time.monotonic()
+                self.model_loaded = False
+                self.warmed_up = False
+                if jobs is not None:
+                    jobs.shutdown()
+                if processor is not None:
+                    processor.close()
+                logger.error(f"Error starting services: {self.error}")
+                raise
+            finally:
+                self.startup_seconds = time.perf_counter() - started
+            self.document_processor, self.ai_engine, self.jobs = processor, engine, jobs
+            self.warmed_up = True
+            self.error = None
+            self._failed_at = None
+            if writer:
+                # Only now: recovered jobs may need the published engine for their post-ingest step
+                try:
+                    jobs.recover()
+                except Exception as e:
+                    logger.error(f"Could not recover interrupted ingest jobs: {str(e)}")
+                if settings.SERVE_WORKERS > 1:
+                    jobs.start_polling()
+            else:
+                self._start_sync()
+            logger.info(f"Services ready in {self.startup_seconds:.2f}s")
+            return self
+
+    @staticmethod
+    def _warm_up(processor: DocumentProcessor, engine: AIEngine):
+        """Run one encode pass so the first real request does not pay for lazy init"""
+        processor.embedder.encode(["warm-up"])
+        processor.chroma_client.heartbeat()
+        if engine.reranker is not None:
+            engine.reranker.warm_up()
+
+    def _start_sync(self):
+        self._sync_stop.clear()
+        self._sync_thread = threading.Thread(target=self._sync_forever, args=(self.document_processor,),
+                                             name="store-sync", daemon=True)
+        self._sync_thread.start()
+
+    def _sync_forever(self, processor: DocumentProcessor):
+        while not self._sync_stop.wait(settings.WORKER_SYNC_SECONDS):
+            try:
+                processor.refresh()
+            except Exception as e:
+                logger.warning(f"Reloading documents from the writer failed: {str(e)}")
+
+    def _precompute_summary(self, document_id: str):
+        """Generate and persist the summary on the app loop; called from an ingest worker thread"""
+        future = asyncio.run_coroutine_threadsafe(self.ai_engine.generate_summary(document_id), self.loop)
+        future.result(timeout=settings.LLM_TIMEOUT_SECONDS * 3)
+
+    def shutdown(self):
+        """Release references so the model can be garbage collected"""
+        with self._lock:
+            self._sync_stop.set()
+            if self.jobs is not None:
+                self.jobs.shutdown()
+            if self.document_processor is not None:
+                self.document_processor.flush()
+                close = getattr(self.document_processor.embedder, "close", None)
+                if close is not None:
+                    close()
+            self.jobs = None
+            self.ai_engine = None
+            self.document_processor = None
+            self.model_loaded = False
+            self.warmed_up = False
+
+    def metric_samples(self) -> List[Sample]:
+        """Cache and provider counters owned by the services, read at scrape time"""
+        engine = self.ai_engine
+        if engine is None:
+            return []
+        caches: Dict[str, Dict] = {}
+        if engine.answer_cache is not None:
+            caches["answer"] = engine.answer_cache.stats()
+        if engine.reranker is not None:
+            stats = engine.reranker.stats()
+            caches["rerank"] = {"hits": stats["cache_hits"], "misses": stats["cache_misses"]}
+        processor = engine.document_processor
+        if hasattr(processor.embedder, "query_cache_stats"):
+            caches["query_embedding"] = processor.embedder.query_cache_stats()
+        if getattr(processor, "chunk_matrices", None) is not None:
+            stats = processor.chunk_matrices.stats()
+            caches["chunk_matrix"] = {"hits": stats["hits"], "misses": stats["loads"]}
+
+        samples = []
+        for cache, stats in caches.items():
+            lookups = stats["hits"] + stats["misses"]
+            samples.append(Sample("cache_hits_total", "counter", "Cache hits", {"cache": cache}, stats["hits"]))
+            samples.append(Sample("cache_misses_total", "counter", "Cache misses", {"cache": cache}, stats["misses"]))
+            samples.append(Sample("cache_hit_ratio", "gauge", "Cache hits over lookups since start",
+                                  {"cache": cache}, stats["hits"] / lookups if lookups else 0.0))
+        batcher_stats = getattr(processor.embedder, "batcher_stats", None)
+        batching = batcher_stats() if batcher_stats else None
+        if batching is not None:
+            samples.append(Sample("embedding_queue_depth", "gauge", "Texts waiting for an embedding batch", {},
+                                  batching["queue_depth"]))
+        provider_stats = getattr(engine.llm, "stats", None)
+        for provider, stats in (provider_stats() if provider_stats else {}).items():
+            labels = {"provider": provider}
+            samples.append(Sample("llm_provider_requests_total", "counter", "LLM provider attempts", labels,
+                                  stats["requests"]))
+            samples.append(Sample("llm_provider_failures_total", "counter", "Failed LLM provider attempts", labels,
+                                  stats["failures"]))
+            samples.append(Sample("llm_provider_circuit_open", "gauge", "1 while the provider's circuit is open",
+                                  labels, stats["circuit"] == "open"))
+        return samples
+
+    @property
+    def ready(self) -> bool:
+        return self.model_loaded and self.warmed_up and self.error is None
+
+    def status(self) -> Dict:
+        """Readiness details for the /ready probe"""
+        return {
+            "ready": self.ready,
+            "model_loaded": self.model_loaded,
+            "warmed_up": self.warmed_up,
+            "startup_seconds": self.startup_seconds,
+            "error": self.error,
+        }
+
+
+services = ServiceContainer()
@@ -0,0 +1,225 @@
+# src/backend/core/storage.py
+"""
+Persistent document registry: content hashes for documents and their chunks,
+the ingest job table, generated artifacts (summaries, question sets) and
+cached partial summaries
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    filename TEXT,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    text_length INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'ready',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    chunk_hash TEXT NOT NULL,
+    start_char INTEGER NOT NULL,
+    end_char INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_hash ON chunks(chunk_hash);
+CREATE INDEX IF NOT EXISTS idx_chunks_doc ON chunks(doc_id);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    file_path TEXT NOT NULL,
+    filename TEXT,
+    document_id TEXT,
+    chunk_count INTEGER,
+    stages TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status);
+CREATE TABLE IF NOT EXISTS artifacts (
+    key TEXT PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_doc ON artifacts(doc_id);
+CREATE TABLE IF NOT EXISTS summary_parts (
+    key TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class DocumentRegistry:
+    """SQLite-backed record of every ingested document, keyed by content hash"""
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def get_document(self, doc_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return dict(row) if row else None
+
+    def list_documents(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM documents ORDER BY created_at").fetchall()
+        return [dict(row) for row in rows]
+
+    def documents_updated_since(self, timestamp: float) -> List[Dict]:
+        """Documents written after timestamp, oldest change first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM documents WHERE updated_at > ? ORDER BY updated_at", (timestamp,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def last_document_update(self) -> float:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(updated_at) FROM documents").fetchone()
+        return row[0] or 0.0
+
+    def upsert_document(self, doc_id: str, filename: Optional[str], chunk_count: int,
+                        text_length: int, status: str = "ready"):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO documents (doc_id, filename, chunk_count, text_length, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(doc_id) DO UPDATE SET
+                    filename = COALESCE(excluded.filename, documents.filename),
+                    chunk_count = excluded.chunk_count,
+                    text_length = excluded.text_length,
+                    status = excluded.status,
+                    updated_at = excluded.updated_at
+                """,
+                (doc_id, filename, chunk_count, text_length, status, now, now)
+            )
+
+    def replace_chunks(self, doc_id: str, chunks: List[Dict]):
+        """Record the chunk hashes for a document, replacing any previous version"""
+        rows = [
+            (chunk['id'], doc_id, chunk['chunk_index'], chunk['metadata']['chunk_hash'],
+             chunk['metadata']['start_char'], chunk['metadata']['end_char'])
+            for chunk in chunks
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+            self._conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def get_chunks(self, doc_id: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM chunks WHERE doc_id = ? ORDER BY chunk_index", (doc_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def find_chunks_by_hash(self, chunk_hashes: Iterable[str]) -> Dict[str, Dict]:
+        """Map each known chunk hash to one stored chunk with that content"""
+        hashes = list(set(chunk_hashes))
+        found: Dict[str, Dict] = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT * FROM chunks WHERE chunk_hash IN ({placeholders})", batch
+                ).fetchall()
+                for row in rows:
+                    found.setdefault(row['chunk_hash'], dict(row))
+        return found
+
+    def delete_document(self, doc_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+            self._conn.execute("DELETE FROM artifacts WHERE doc_id = ?", (doc_id,))
+            self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def create_job(self, job_id: str, file_path: str, filename: Optional[str], document_id: Optional[str]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, file_path, filename, document_id, created_at) VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, file_path, filename, document_id, time.time())
+            )
+
+    def update_job(self, job_id: str, **fields):
+        """Update job columns; the stages dict is stored as JSON"""
+        if 'stages' in fields:
+            fields['stages'] = json.dumps(fields['stages'])
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job_row(row) if row else None
+
+    def list_jobs(self, statuses: Iterable[str]) -> List[Dict]:
+        statuses = list(statuses)
+        placeholders = ",".join("?" * len(statuses))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at", statuses
+            ).fetchall()
+        return [self._job_row(row) for row in rows]
+
+    @staticmethod
+    def _job_row(row) -> Dict:
+        job = dict(row)
+        job['stages'] = json.loads(job['stages'] or '{}')
+        return job
+
+    def get_artifact(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM artifacts WHERE key = ?", (key,)).fetchone()
+        return json.loads(row['payload']) if row else None
+
+    def put_artifact(self, key: str, doc_id: str, kind: str, payload: Any):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artifacts (key, doc_id, kind, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, doc_id, kind, json.dumps(payload), time.time())
+            )
+
+    def delete_artifacts(self, doc_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM artifacts WHERE doc_id = ?", (doc_id,))
+
+    def get_summary_part(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summary_parts WHERE key = ?", (key,)).fetchone()
+        return row['summary'] if row else None
+
+    def put_summary_part(self, key: str, summary: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summary_parts (key, summary, created_at) VALUES (?, ?, ?)",
+                (key, summary, time.time())
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,138 @@
+# src/backend/core/summarizer.py
+"""
+Hierarchical map-reduce summarization for documents larger than one prompt
+"""
+import asyncio
+import hashlib
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from .config import settings
+from ..utils.concurrency import run_blocking
+
+# Bump when the map/reduce prompts change so cached parts are not reused
+PROMPT_VERSION = "1"
+
+CompleteFn = Callable[[str, int], Awaitable[str]]
+
+
+class MapReduceSummarizer:
+    """Summarizes chunk groups concurrently, then reduces the partial summaries recursively.
+
+    Every intermediate summary is cached under a hash of the content it
+    covers, so re-summarizing a document, or one that shares long runs of
+    chunks with an earlier one, mostly hits the cache.
+    """
+
+    def __init__(self, complete: CompleteFn, store=None, model: str = "",
+                 group_chars: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 part_max_tokens: Optional[int] = None):
+        self.complete = complete
+        # Any object with get_summary_part(key) / put_summary_part(key, text); in-memory otherwise
+        self.store = store
+        self.model = model
+        self.group_chars = group_chars or settings.SUMMARY_GROUP_CHARS
+        self.max_concurrency = max_concurrency or settings.SUMMARY_MAX_CONCURRENCY
+        self.part_max_tokens = part_max_tokens or settings.SUMMARY_PART_MAX_TOKENS
+        self._memory: Dict[str, str] = {}
+        self.parts_generated = 0
+        self.parts_reused = 0
+
+    async def condense(self, chunks: List[Dict]) -> str:
+        """Text that covers the whole document and fits in one prompt: the content itself
+        when small enough, otherwise the reduced partial summaries"""
+        texts = [chunk['content'] for chunk in chunks]
+        hashes = [_chunk_hash(chunk) for chunk in chunks]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # This call's share of the instance-wide counters
+        counts = {'generated': 0, 'reused': 0}
+        level = 0
+        while sum(len(text) + 1 for text in texts) > self.group_chars:
+            groups = self._group(texts, hashes)
+            if len(groups) == len(texts) and level > 0:
+                if len(texts) == 1:
+                    # A single summary still longer than the budget; cut it rather than loop
+                    texts = [texts[0][:self.group_chars - 1]]
+                    break
+                # Each summary fills a group by itself; reduce them in pairs so the count keeps falling
+                groups = [list(range(i, min(i + 2, len(texts)))) for i in range(0, len(texts), 2)]
+            summaries = await asyncio.gather(*(
+                self._summarize_group([texts[i] for i in group], [hashes[i] for i in group], level, semaphore,
+                                      counts)
+                for group in groups
+            ))
+            texts = list(summaries)
+            hashes = [_text_hash(text) for text in texts]
+            level += 1
+        if level:
+            logger.info(f"Condensed {len(chunks)} chunks in {level} map-reduce levels "
+                        f"({counts['generated']} parts generated, {counts['reused']} reused)")
+        return "\n".join(texts)
+
+    def _group(self, texts: List[str], hashes: List[str]) -> List[List[int]]:
+        """Pack consecutive items into groups of at most group_chars.
+
+        Groups also close at content-defined cut points (a hash condition), so an
+        edit early in a document shifts only nearby group boundaries and later
+        groups keep their cache keys.
+        """
+        groups, current, size = [], [], 0
+        min_chars = self.group_chars // 2
+        for i, (text, content_hash) in enumerate(zip(texts, hashes)):
+            if current and size + len(text) > self.group_chars:
+                groups.append(current)
+                current, size = [], 0
+            current.append(i)
+            size += len(text) + 1
+            if size >= min_chars and int(content_hash[:8], 16) % 4 == 0:
+                groups.append(current)
+                current, size = [], 0
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _summarize_group(self, texts: List[str], hashes: List[str], level: int,
+                               semaphore: asyncio.Semaphore, counts: Dict[str, int]) -> str:
+        key = hashlib.md5(
+            f"{PROMPT_VERSION}|{self.model}|{level}|{'|'.join(hashes)}".encode('utf-8')
+        ).hexdigest()
+        cached = await self._get(key)
+        if cached is not None:
+            self.parts_reused += 1
+            counts['reused'] += 1
+            return cached
+        async with semaphore:
+            summary = (await self.complete(self._part_prompt(texts, level), self.part_max_tokens)).strip()
+        await self._put(key, summary)
+        self.parts_generated += 1
+        counts['generated'] += 1
+        return summary
+
+    @staticmethod
+    def _part_prompt(texts: List[str], level: int) -> str:
+        content = "\n".join(texts)
+        if level == 0:
+            return ("Summarize this section of a longer document. Keep key facts, figures, names and "
+                    f"conclusions; write dense prose, no preamble:\n{content}")
+        return ("Combine these partial summaries of consecutive sections into one shorter summary. "
+                f"Keep the most important facts and conclusions; no preamble:\n{content}")
+
+    async def _get(self, key: str) -> Optional[str]:
+        if self.store is not None:
+            return await run_blocking(self.store.get_summary_part, key)
+        return self._memory.get(key)
+
+    async def _put(self, key: str, summary: str):
+        if self.store is not None:
+            await run_blocking(self.store.put_summary_part, key, summary)
+        else:
+            self._memory[key] = summary
+
+
+def _chunk_hash(chunk: Dict) -> str:
+    return chunk.get('metadata', {}).get('chunk_hash') or _text_hash(chunk['content'])
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
@@ -0,0 +1,173 @@
+# src/backend/core/vector_store.py
+"""
+Shared chunk collection(s) in ChromaDB, filtered by doc_id metadata
+"""
+import hashlib
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .config import settings
+
+LEGACY_PREFIX = "doc_"
+COLLECTION_PREFIX = "chunks"
+
+
+class ChunkStore:
+    """All document chunks live in one collection (or a few hash-sharded ones) keyed by doc_id"""
+
+    def __init__(self, client, shards: Optional[int] = None):
+        self.client = client
+        self.shards = max(1, shards or settings.VECTOR_COLLECTION_SHARDS)
+        self._collections = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def reopen(self, client):
+        """Switch to a new client, e.g. one that sees writes made by another process since the last was opened"""
+        with self._lock:
+            self.client = client
+            self._collections = {}
+
+    def shard_name(self, shard: int) -> str:
+        return COLLECTION_PREFIX if self.shards == 1 else f"{COLLECTION_PREFIX}_{shard}"
+
+    def shard_for(self, doc_id: str) -> int:
+        return zlib.crc32(doc_id.encode("utf-8")) % self.shards
+
+    def collection(self, shard: int):
+        with self._lock:
+            if shard not in self._collections:
+                self._collections[shard] = self.client.get_or_create_collection(
+                    name=self.shard_name(shard),
+                    metadata={"description": "Document chunks", "hnsw:space": "cosine"},
+                    embedding_function=None
+                )
+            return self._collections[shard]
+
+    def collection_for(self, doc_id: str):
+        return self.collection(self.shard_for(doc_id))
+
+    def group_by_shard(self, doc_ids: Sequence[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = {}
+        for doc_id in dict.fromkeys(doc_ids):
+            groups.setdefault(self.shard_for(doc_id), []).append(doc_id)
+        return groups
+
+    def upsert(self, doc_id: str, ids: List[str], embeddings: np.ndarray, documents: List[str], metadatas: List[Dict]):
+        metadatas = [{**metadata, "doc_id": doc_id} for metadata in metadatas]
+        self.collection_for(doc_id).upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def document_ids(self, doc_id: str) -> List[str]:
+        return self.collection_for(doc_id).get(where={"doc_id": doc_id}, include=[])['ids']
+
+    def delete(self, doc_id: str, ids: List[str]):
+        if ids:
+            self.collection_for(doc_id).delete(ids=ids)
+
+    def get_embeddings(self, doc_id: str, ids: List[str]) -> Dict[str, np.ndarray]:
+        stored = self.collection_for(doc_id).get(ids=ids, include=["embeddings"])
+        return {chunk_id: np.asarray(vector, dtype=np.float32) for chunk_id, vector in zip(stored['ids'], stored['embeddings'])}
+
+    def get_chunks(self, ids_by_doc: Dict[str, List[str]]) -> Dict[str, Dict]:
+        """chunk id -> {text, id, metadata} for specific chunks, one get per shard"""
+        by_shard: Dict[int, List[str]] = {}
+        for doc_id, ids in ids_by_doc.items():
+            by_shard.setdefault(self.shard_for(doc_id), []).extend(ids)
+        found = {}
+        for shard, ids in by_shard.items():
+            stored = self.collection(shard).get(ids=ids, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(stored['ids'], stored['documents'], stored['metadatas']):
+                found[chunk_id] = {'text': text, 'id': chunk_id, 'metadata': metadata}
+        return found
+
+    def get_document(self, doc_id: str, embeddings: bool = False) -> Dict:
+        """Every stored chunk of one document: ids, documents and metadatas, optionally embeddings"""
+        include = ["documents", "metadatas", "embeddings"] if embeddings else ["documents", "metadatas"]
+        return self.collection_for(doc_id).get(where={"doc_id": doc_id}, include=include)
+
+    def query(self, embedding: np.ndarray, doc_ids: Sequence[str], top_k: int) -> List[Dict]:
+        """Global top-k chunks across the given documents; shards are queried concurrently"""
+        return self.query_many(np.asarray(embedding)[None, :], doc_ids, top_k)[0]
+
+    def query_many(self, embeddings: np.ndarray, doc_ids: Sequence[str], top_k: int) -> List[List[Dict]]:
+        """Top-k chunks for each row of embeddings, with one query call per shard for the whole batch"""
+        groups = self.group_by_shard(doc_ids)
+        if len(groups) <= 1:
+            per_shard = [self.query_shard(shard, embeddings, ids, top_k) for shard, ids in groups.items()]
+        else:
+            # Dedicated pool: callers usually already hold a thread of the shared blocking pool
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.shards, thread_name_prefix="chunk-shard")
+            futures = [self._executor.submit(self.query_shard, shard, embeddings, ids, top_k)
+                       for shard, ids in groups.items()]
+            per_shard = [future.result() for future in futures]
+        merged = []
+        for row in range(len(embeddings)):
+            results = [chunk for shard_results in per_shard for chunk in shard_results[row]]
+            results.sort(key=lambda chunk: chunk['distance'])
+            merged.append(results[:top_k])
+        return merged
+
+    def query_shard(self, shard: int, embeddings: np.ndarray, doc_ids: Sequence[str], top_k: int) -> List[List[Dict]]:
+        where = {"doc_id": doc_ids[0]} if len(doc_ids) == 1 else {"doc_id": {"$in": list(doc_ids)}}
+        collection = self.collection(shard)
+        if collection.count() == 0:
+            return [[] for _ in range(len(embeddings))]
+        results = collection.query(
+            query_embeddings=list(embeddings),
+            n_results=top_k,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            [
+                {
+                    'text': text,
+                    'id': results['ids'][row][i],
+                    'distance': results['distances'][row][i],
+                    'metadata': results['metadatas'][row][i]
+                }
+                for i, text in enumerate(results['documents'][row])
+            ]
+            for row in range(len(embeddings))
+        ]
+
+    def legacy_collections(self) -> List[str]:
+        """Names of old one-collection-per-document collections"""
+        names = [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+        return [name for name in names if name.startswith(LEGACY_PREFIX)]
+
+    def iter_legacy_documents(self, page_size: int = 500) -> Iterator[Dict]:
+        """Yield {doc_id, ids, embeddings, documents, metadatas} for each legacy collection, page by page"""
+        for name in self.legacy_collections():
+            doc_id = name[len(LEGACY_PREFIX):]
+            collection = self.client.get_collection(name, embedding_function=None)
+            total = collection.count()
+            for offset in range(0, total, page_size):
+                page = collection.get(
+                    limit=page_size, offset=offset,
+                    include=["embeddings", "documents", "metadatas"]
+                )
+                yield {"collection": name, "doc_id": doc_id, "last_page": offset + page_size >= total, **page}
+            if total == 0:
+                yield {"collection": name, "doc_id": doc_id, "last_page": True,
+                       "ids": [], "embeddings": [], "documents": [], "metadatas": []}
+
+    def drop_collection(self, name: str):
+        self.client.delete_collection(name)
+
+
+def legacy_chunk_metadata(chunk_id: str, text: str, metadata: Optional[Dict]) -> Dict:
+    """Fill fields older chunks were stored without"""
+    metadata = dict(metadata or {})
+    metadata.setdefault('chunk_hash', hashlib.md5(text.encode('utf-8')).hexdigest())
+    suffix = chunk_id.rsplit('_', 1)[-1]
+    metadata.setdefault('chunk_index', int(suffix) if suffix.isdigit() else 0)
+    metadata.setdefault('start_char', 0)
+    metadata.setdefault('end_char', metadata['start_char'] + len(text))
+    return metadata
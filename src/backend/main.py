@@ -2,21 +2,58 @@
 """
 FastAPI Main Application
 """
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from loguru import logger
 import uvicorn
 import os
 from pathlib import Path
 
 from .api.routes import router
 from .core.config import settings
+from .core.services import services
+from .core import metrics, pdf_extract
+from .utils.concurrency import shutdown_blocking_executor
+from .utils.helpers import configure_logger
+
+# Before anything logs: the file sink's format needs the trace id patcher
+configure_logger()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the shared services (embedding model, vector store) once per process"""
+    try:
+        await run_in_threadpool(services.start, asyncio.get_running_loop())
+    except Exception as e:
+        # Keep serving so /health and /ready can report the failure
+        logger.error(f"Service warm-up failed: {str(e)}")
+    yield
+    if services.ai_engine is not None:
+        await services.ai_engine.aclose()
+    services.shutdown()
+    shutdown_blocking_executor()
+    pdf_extract.shutdown_pool()
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records body serialization as a pipeline stage"""
+
+    def render(self, content) -> bytes:
+        with metrics.span("serialize"):
+            return super().render(content)
 
 # Create FastAPI app
 app = FastAPI(
     title="GenAI Research Assistant API",
     description="AI-powered document analysis and reasoning assistant",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse
 )
 
 # Add CORS middleware
@@ -28,6 +65,47 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Reject oversized uploads from Content-Length before the multipart body is read
+MULTIPART_OVERHEAD = 64 * 1024
+
+@app.middleware("http")
+async def limit_upload_size(request, call_next):
+    if request.method == "POST" and request.url.path.endswith("/upload"):
+        length = request.headers.get("content-length")
+        if length and length.isdigit() and int(length) > settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File exceeds maximum size of {settings.MAX_FILE_SIZE} bytes"}
+            )
+    return await call_next(request)
+
+# Trace ids supplied by a proxy are reused when they look sane
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+@app.middleware("http")
+async def trace_requests(request, call_next):
+    """Tag the request with a trace id, time it, and log its per-stage breakdown once it is answered"""
+    supplied = request.headers.get("x-request-id", "")
+    tokens = metrics.start_trace(supplied if TRACE_ID_PATTERN.match(supplied) else None)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Trace-ID"] = metrics.current_trace_id()
+        return response
+    finally:
+        # Streaming responses are timed to their first byte
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.REQUEST_SECONDS.observe(elapsed, request.method, path, str(status))
+        stages = metrics.current_spans()
+        if stages:
+            logger.info(f"{request.method} {path} {status} in {elapsed * 1000:.1f}ms | stages: "
+                        + ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in stages.items()))
+        metrics.end_trace(tokens)
+
 # Include API routes
 app.include_router(router, prefix="/api/v1")
 
@@ -36,13 +114,27 @@ app.include_router(router, prefix="/api/v1")
 async def health_check():
     return {"status": "healthy", "message": "GenAI Research Assistant API is running"}
 
+# Readiness probe: 200 once the embedding model is loaded and warmed up
+@app.get("/ready")
+async def readiness_check():
+    status = services.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(services.metric_samples()),
+                             media_type="text/plain; version=0.0.4")
+
 # Root endpoint
 @app.get("/")
 async def root():
     return {
         "message": "Welcome to GenAI Research Assistant API",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready",
+        "metrics": "/metrics"
     }
 
 if __name__ == "__main__":
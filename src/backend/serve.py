@@ -0,0 +1,157 @@
+# src/backend/serve.py
+"""
+Production server: pre-forked uvicorn workers sharing one copy of the embedding model.
+
+The master loads the model, binds the socket and forks; children inherit the
+weights copy-on-write and accept on the shared socket. Worker 0 is the only
+vector store writer: other workers record uploads as queued jobs, which the
+writer picks up from the registry, and reload what it stores.
+
+Usage: python -m src.backend.serve [--workers 4] [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+from loguru import logger
+
+from .core.config import settings
+from .core.embeddings import preload_model
+
+# Pause before replacing a crashed worker so a crash loop does not spin
+RESTART_DELAY_SECONDS = 1.0
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def prepare_store():
+    """Create the vector store and registry schemas in a throwaway child process.
+
+    Workers opening a fresh store at the same moment would race on its
+    migrations, and the master must not hold open database handles across fork.
+    """
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            from .core.document_processor import DocumentProcessor
+            from .core.storage import DocumentRegistry
+            DocumentProcessor._open_chroma().heartbeat()
+            DocumentRegistry(os.path.join(settings.VECTOR_DB_PATH, "registry.sqlite3")).close()
+            status = 0
+        except Exception as e:
+            logger.error(f"Could not prepare the vector store: {str(e)}")
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    if status != 0:
+        raise SystemExit("Vector store preparation failed")
+
+
+def torch_threads(workers: int) -> int:
+    """Intra-op threads per worker: the configured count, or the cores split evenly"""
+    return settings.SERVE_TORCH_THREADS or max(1, (os.cpu_count() or 1) // workers)
+
+
+def run_worker(index: int, sock: socket.socket, workers: int, app):
+    """Serve app on the inherited socket; called in the forked child"""
+    import torch
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    settings.VECTOR_STORE_WRITER = index == 0
+    torch.set_num_threads(torch_threads(workers))
+    logger.info(f"Worker {index} (pid {os.getpid()}) starting"
+                + (" as vector store writer" if settings.VECTOR_STORE_WRITER else ""))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="debug" if settings.DEBUG else "info"))
+    server.run(sockets=[sock])
+
+
+def serve(workers: int, host: str, port: int):
+    if not hasattr(os, "fork"):
+        raise SystemExit("Multi-worker serving needs os.fork; run src/backend/main.py instead")
+    settings.SERVE_WORKERS = workers
+
+    from .main import app
+
+    started = time.perf_counter()
+    try:
+        preload_model()
+        logger.info(f"Preloaded {settings.EMBEDDING_MODEL} in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        # Workers load it themselves and report the failure on /ready
+        logger.error(f"Could not preload {settings.EMBEDDING_MODEL}: {str(e)}")
+    prepare_store()
+    sock = bind_socket(host, port)
+    # Keep the garbage collector from touching (and so copying) objects the workers inherit
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}  # pid -> worker index
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(index, sock, workers, app)
+            finally:
+                os._exit(0)
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for index in range(workers):
+        spawn(index)
+    logger.info(f"Serving on {host}:{port} with {workers} workers, {torch_threads(workers)} torch threads each")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logger.warning(f"Worker {index} (pid {pid}) exited with status {status}; restarting")
+        time.sleep(RESTART_DELAY_SECONDS)
+        if not stopping:
+            spawn(index)
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=settings.SERVE_WORKERS)
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    args = parser.parse_args()
+    serve(max(1, args.workers), args.host, args.port)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+from src.backend.core.config import settings
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """Bounded pool for CPU-bound and blocking work (embedding, Chroma, file parsing)"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BLOCKING_POOL_WORKERS,
+            thread_name_prefix="blocking"
+        )
+    return _executor
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a blocking call on the bounded pool without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    # Copy the caller's context so the trace id and request spans follow the work into the pool
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_blocking_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+def shutdown_blocking_executor():
+    """Stop the pool; a new one is created lazily on next use"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
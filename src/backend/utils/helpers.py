@@ -1,18 +1,31 @@
 import os
+import json
+import hashlib
+import uuid
 from pathlib import Path
 from loguru import logger
-from typing import Optional
+from typing import Optional, Tuple
+import aiofiles
 from src.backend.core.config import settings
+from src.backend.core.metrics import current_trace_id
+
+_file_sink_id: Optional[int] = None
+
+def _add_trace_id(record):
+    record["extra"].setdefault("trace_id", current_trace_id() or "-")
 
 def configure_logger():
-    """Configure loguru logger with rotation and retention"""
-    logger.add(
-        "logs/app.log",
-        rotation="10 MB",
-        retention="7 days",
-        level="DEBUG" if settings.DEBUG else "INFO",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}"
-    )
+    """Configure loguru logger with rotation and retention; the file sink is added once per process"""
+    global _file_sink_id
+    if _file_sink_id is None:
+        logger.configure(patcher=_add_trace_id)
+        _file_sink_id = logger.add(
+            "logs/app.log",
+            rotation="10 MB",
+            retention="7 days",
+            level="DEBUG" if settings.DEBUG else "INFO",
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {extra[trace_id]} | {message}"
+        )
     return logger
 
 def validate_file_path(file_path: str) -> bool:
@@ -28,9 +41,44 @@ def get_safe_filename(filename: str) -> str:
     """Sanitize filename to prevent path traversal"""
     return "".join(c for c in filename if c.isalnum() or c in ('.', '_', '-')).strip()
 
+class FileTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
+
+async def save_upload_stream(upload, dest_path: str, max_bytes: int, chunk_size: int) -> Tuple[str, int]:
+    """Copy an upload to disk in fixed-size chunks, hashing as it goes.
+
+    Returns (md5 hex digest, size in bytes). The file is written to a
+    temporary name unique to this call, so concurrent uploads of the same
+    name never share it, and only moved into place once complete; on error
+    or when max_bytes is exceeded the partial file is removed.
+    """
+    digest = hashlib.md5()
+    size = 0
+    tmp_path = f"{dest_path}.{uuid.uuid4().hex}.part"
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while True:
+                block = await upload.read(chunk_size)
+                if not block:
+                    break
+                size += len(block)
+                if size > max_bytes:
+                    raise FileTooLargeError(f"File exceeds maximum size of {max_bytes} bytes")
+                digest.update(block)
+                await f.write(block)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return digest.hexdigest(), size
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 def log_api_request(endpoint: str, method: str, status_code: int, message: Optional[str] = None):
     """Log API request details"""
-    logger = configure_logger()
     logger.info(
         f"API Request | Endpoint: {endpoint} | Method: {method} | "
         f"Status: {status_code} | Message: {message or 'No additional info'}"
@@ -4,7 +4,7 @@ Ask Anything component for querying documents
 import streamlit as st
 import requests
 import json
-from frontend.utils.ui_helpers import get_api_url, show_success, show_error
+from frontend.utils.ui_helpers import get_api_url, show_success, show_error, iter_sse_events
 def render_ask_anything_section():
     """Render the Ask Anything interface"""
     st.markdown("<div style='animation: fade-in 0.5s ease-in-out;'>", unsafe_allow_html=True)
@@ -37,34 +37,49 @@ def render_ask_anything_section():
         submitted = st.form_submit_button("Ask", type="primary")
     
     if submitted and question.strip():
-        with st.spinner("Processing your question..."):
-            try:
-                payload = {
-                    "question": question,
-                    "document_ids": document_ids,
-                    "session_id": st.session_state.qa_session_id
-                }
-                response = requests.post(
-                    f"{get_api_url()}/ask",
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    st.session_state.qa_session_id = data['session_id']
-                    st.session_state.conversation_history.append({
-                        "question": question,
-                        "answer": data['answer'],
-                        "source_chunks": data['source_chunks']
-                    })
-                    show_success("Question answered successfully!")
-                    st.rerun()
-                else:
+        try:
+            payload = {
+                "question": question,
+                "document_ids": document_ids,
+                "session_id": st.session_state.qa_session_id
+            }
+            # Short connect timeout, generous read timeout: tokens keep the stream alive
+            with requests.post(
+                f"{get_api_url()}/ask/stream",
+                json=payload,
+                stream=True,
+                timeout=(5, 120)
+            ) as response:
+                if response.status_code != 200:
                     error_data = response.json()
                     show_error(f"Failed to process question: {error_data.get('detail', 'Unknown error')}")
-            except Exception as e:
-                show_error(f"Error processing question: {str(e)}")
+                else:
+                    sources_placeholder = st.empty()
+                    answer_placeholder = st.empty()
+                    answer_placeholder.markdown("_Thinking..._")
+                    source_chunks, answer_parts, done = [], [], None
+                    for event, data in iter_sse_events(response):
+                        if event == "sources":
+                            source_chunks = data["source_chunks"]
+                            sources_placeholder.caption(f"Retrieved {len(source_chunks)} source chunks")
+                        elif event == "token":
+                            answer_parts.append(data["text"])
+                            answer_placeholder.markdown("".join(answer_parts) + "▌")
+                        elif event == "done":
+                            done = data
+                        elif event == "error":
+                            show_error(f"Failed to process question: {data.get('detail', 'Unknown error')}")
+                    if done:
+                        st.session_state.qa_session_id = done['session_id']
+                        st.session_state.conversation_history.append({
+                            "question": question,
+                            "answer": done['answer'],
+                            "source_chunks": source_chunks
+                        })
+                        show_success("Question answered successfully!")
+                        st.rerun()
+        except Exception as e:
+            show_error(f"Error processing question: {str(e)}")
     
     # Searchable conversation history
     if st.session_state.conversation_history:
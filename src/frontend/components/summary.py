@@ -3,7 +3,7 @@ Summary component for document summaries
 """
 import streamlit as st
 import requests
-from frontend.utils.ui_helpers import get_api_url, show_success, show_error
+from frontend.utils.ui_helpers import get_api_url, show_success, show_error, iter_sse_events
 
 def render_summary_section():
     """Render the Document Summary interface"""
@@ -24,24 +24,35 @@ def render_summary_section():
     
     # Generate summary button
     if st.button("Generate Summary", type="primary"):
-        with st.spinner("Generating summary..."):
-            try:
-                response = requests.post(
-                    f"{get_api_url()}/summarize",
-                    json={"document_id": document_id},
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    st.session_state.document_info['summary'] = data['summary']
-                    show_success("Summary generated successfully!")
-                    st.rerun()
-                else:
+        try:
+            with requests.post(
+                f"{get_api_url()}/summarize/stream",
+                json={"document_id": document_id},
+                stream=True,
+                timeout=(5, 120)
+            ) as response:
+                if response.status_code != 200:
                     error_data = response.json()
                     show_error(f"Failed to generate summary: {error_data.get('detail', 'Unknown error')}")
-            except Exception as e:
-                show_error(f"Error generating summary: {str(e)}")
+                else:
+                    summary_placeholder = st.empty()
+                    summary_placeholder.markdown("_Summarizing..._")
+                    parts, summary = [], None
+                    for event, data in iter_sse_events(response):
+                        if event == "token":
+                            parts.append(data["text"])
+                            summary_placeholder.markdown("".join(parts) + "▌")
+                        elif event == "done":
+                            summary = data["summary"]
+                        elif event == "error":
+                            show_error(f"Failed to generate summary: {data.get('detail', 'Unknown error')}")
+                    if summary is not None:
+                        st.session_state.document_info['summary'] = summary
+                        st.session_state.document_info['document_id'] = document_id
+                        show_success("Summary generated successfully!")
+                        st.rerun()
+        except Exception as e:
+            show_error(f"Error generating summary: {str(e)}")
     
     # Display summary
     if 'summary' in st.session_state.document_info and st.session_state.document_info.get('document_id') == document_id:
@@ -46,11 +46,6 @@ def render_upload_section():
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            for i in range(100):
-                time.sleep(0.02)  # Simulate processing
-                progress_bar.progress(i + 1)
-                status_text.text(f"Processing: {i + 1}%")
-            
             try:
                 files = {'file': (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
                 response = requests.post(
@@ -59,20 +54,24 @@ def render_upload_section():
                     timeout=60
                 )
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    st.session_state.document_uploaded = True
-                    st.session_state.document_id = data['document_id']
-                    st.session_state.document_info = {
-                        'filename': data['filename'],
-                        'chunk_count': data['chunk_count']
-                    }
-                    st.session_state.uploaded_documents.append({
-                        'document_id': data['document_id'],
-                        'filename': data['filename']
-                    })
-                    show_success("Document uploaded successfully!")
-                    st.rerun()
+                if response.status_code in (200, 202):
+                    job = poll_ingest_job(response.json()['job_id'], progress_bar, status_text)
+                    if job and job['status'] == 'completed':
+                        st.session_state.document_uploaded = True
+                        st.session_state.document_id = job['document_id']
+                        st.session_state.document_info = {
+                            'document_id': job['document_id'],
+                            'filename': uploaded_file.name,
+                            'chunk_count': job['chunk_count']
+                        }
+                        st.session_state.uploaded_documents.append({
+                            'document_id': job['document_id'],
+                            'filename': uploaded_file.name
+                        })
+                        show_success("Document uploaded successfully!")
+                        st.rerun()
+                    elif job:
+                        show_error(f"Processing failed: {job.get('error') or 'Unknown error'}")
                 else:
                     error_data = response.json()
                     show_error(f"Upload failed: {error_data.get('detail', 'Unknown error')}")
@@ -82,4 +81,30 @@ def render_upload_section():
                 progress_bar.empty()
                 status_text.empty()
     
-    st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def poll_ingest_job(job_id: str, progress_bar, status_text, interval: float = 0.5, max_wait: float = 1800):
+    """Poll /jobs/{id} and mirror its real stage progress until it finishes"""
+    deadline = time.time() + max_wait
+    job = None
+    while time.time() < deadline:
+        response = requests.get(f"{get_api_url()}/jobs/{job_id}", timeout=10)
+        if response.status_code != 200:
+            show_error(f"Could not read job status: {response.json().get('detail', 'Unknown error')}")
+            return None
+        job = response.json()
+        progress_bar.progress(min(int(job['progress'] * 100), 100))
+        stage = job.get('stage') or 'queued'
+        stage_info = job['stages'].get(stage, {})
+        detail = ""
+        if stage_info.get('chunks_total'):
+            detail = f" ({stage_info.get('chunks_done', stage_info['chunks_total'])}/{stage_info['chunks_total']} chunks"
+            if stage_info.get('chunks_per_second'):
+                detail += f", {stage_info['chunks_per_second']} chunks/s"
+            detail += ")"
+        status_text.text(f"{stage.capitalize()}: {int(job['progress'] * 100)}%{detail}")
+        if job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(interval)
+    show_error("Timed out waiting for document processing")
+    return job
@@ -1,5 +1,7 @@
 import streamlit as st
+import json
 from pathlib import Path
+from typing import Dict, Iterator, Tuple
 
 def init_session_state():
     """Initialize Streamlit session state with default values"""
@@ -34,6 +36,23 @@ def show_error(message: str):
     """Display an error message with consistent styling"""
     st.error(message, icon="❌")
 
+def iter_sse_events(response) -> Iterator[Tuple[str, Dict]]:
+    """Parse a streaming requests response into (event, data) pairs"""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+    if data_lines:
+        yield event, json.loads("\n".join(data_lines))
+
 def toggle_theme():
     """Toggle between light and dark theme"""
     if st.session_state.theme == 'light':
@@ -0,0 +1,57 @@
+import pytest
+from src.backend.core.config import settings
+from src.backend.core import embeddings
+from src.backend.core.embeddings import EmbeddingBackend
+
+class HashingModel(embeddings.HashingModel):
+    """The shared hashing model at a small dimension, recording the size of each encode call"""
+
+    def __init__(self, dim: int = 64):
+        super().__init__(dim)
+        self.encode_calls = []
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.encode_calls.append(len(texts))
+        return super().encode(texts, batch_size, **kwargs)
+
+@pytest.fixture
+def fake_embedder():
+    """EmbeddingBackend backed by the hashing model"""
+    return EmbeddingBackend(model=HashingModel(), batch_size=4)
+
+@pytest.fixture
+def fake_processor(tmp_path, fake_embedder, monkeypatch):
+    """DocumentProcessor with a temporary vector DB and the hashing embedder"""
+    from src.backend.core.document_processor import DocumentProcessor
+    monkeypatch.setattr(settings, "VECTOR_DB_PATH", str(tmp_path / "vector_db"))
+    return DocumentProcessor(embedder=fake_embedder)
+
+def make_pdf(pages) -> bytes:
+    """Build a minimal multi-page PDF (Helvetica, one text line per page)"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
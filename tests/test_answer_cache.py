@@ -0,0 +1,84 @@
+import time
+import numpy as np
+import pytest
+from src.backend.core.ai_engine import AIEngine
+from src.backend.core.answer_cache import SemanticAnswerCache
+from src.backend.core.llm import LLMProvider
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+@pytest.fixture
+def cache():
+    return SemanticAnswerCache(threshold=0.9, max_entries=10, max_bytes=1_000_000, ttl_seconds=0)
+
+def test_similar_question_hits_within_scope(cache):
+    """Near-identical embeddings hit; order of document ids does not matter"""
+    cache.store(unit(1, 0, 0), ["b", "a"], {"answer": "cached"})
+    assert cache.lookup(unit(1, 0.1, 0), ["a", "b"]) == {"answer": "cached"}
+    assert cache.lookup(unit(0, 1, 0), ["a", "b"]) is None
+    assert cache.lookup(unit(1, 0, 0), ["a"]) is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+def test_lru_eviction_by_entries_and_bytes():
+    """Least recently used entries go first when caps are exceeded"""
+    cache = SemanticAnswerCache(threshold=0.99, max_entries=2, max_bytes=1_000_000, ttl_seconds=0)
+    cache.store(unit(1, 0, 0), ["d"], {"answer": "x"})
+    cache.store(unit(0, 1, 0), ["d"], {"answer": "y"})
+    cache.lookup(unit(1, 0, 0), ["d"])  # touch x
+    cache.store(unit(0, 0, 1), ["d"], {"answer": "z"})
+    assert cache.lookup(unit(0, 1, 0), ["d"]) is None
+    assert cache.lookup(unit(1, 0, 0), ["d"]) == {"answer": "x"}
+    assert cache.stats()["evictions"] == 1
+
+    small = SemanticAnswerCache(threshold=0.99, max_entries=100, max_bytes=200, ttl_seconds=0)
+    small.store(unit(1, 0, 0), ["d"], {"answer": "a" * 100})
+    small.store(unit(0, 1, 0), ["d"], {"answer": "b" * 100})
+    assert small.stats()["entries"] == 1
+    assert small.stats()["bytes"] <= 200
+
+def test_ttl_expiry():
+    """Entries older than the TTL miss"""
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=0.01)
+    cache.store(unit(1, 0), ["d"], {"answer": "old"})
+    time.sleep(0.02)
+    assert cache.lookup(unit(1, 0), ["d"]) is None
+
+def test_invalidate_document(cache):
+    """Re-ingesting a document drops every scope that contains it"""
+    cache.store(unit(1, 0), ["a", "b"], {"answer": "ab"})
+    cache.store(unit(1, 0), ["c"], {"answer": "c"})
+    cache.invalidate_document("a")
+    assert cache.lookup(unit(1, 0), ["a", "b"]) is None
+    assert cache.lookup(unit(1, 0), ["c"]) == {"answer": "c"}
+
+class CountingProvider(LLMProvider):
+    name = "counting"
+
+    def __init__(self):
+        super().__init__("count-model")
+        self.calls = 0
+
+    async def _complete(self, prompt, max_tokens):
+        self.calls += 1
+        return "Machine learning learns from data."
+
+@pytest.mark.asyncio
+async def test_engine_skips_llm_on_repeat_question(fake_processor):
+    """A repeated question is served from the cache and invalidated on re-ingest"""
+    chunks = fake_processor.chunk_document("Machine learning enables systems to learn from data.", "doc")
+    fake_processor.store_document_embeddings(chunks, "doc")
+    provider = CountingProvider()
+    engine = AIEngine(document_processor=fake_processor, llm=provider, answer_cache=SemanticAnswerCache(threshold=0.95))
+
+    first = await engine.answer_question("What is machine learning?", ["doc"])
+    second = await engine.answer_question("what is machine learning", ["doc"])
+    assert second == first
+    assert provider.calls == 1
+
+    fake_processor.store_document_embeddings(chunks, "doc")
+    await engine.answer_question("What is machine learning?", ["doc"])
+    assert provider.calls == 2
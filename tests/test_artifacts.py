@@ -0,0 +1,55 @@
+import pytest
+from src.backend.core.ai_engine import AIEngine
+from src.backend.core.llm import LLMProvider
+
+class CountingProvider(LLMProvider):
+    name = "counting"
+
+    def __init__(self, model="count-model"):
+        super().__init__(model)
+        self.calls = 0
+
+    async def _complete(self, prompt, max_tokens):
+        self.calls += 1
+        return "Question one?\nReasoning: first.\n\nQuestion two?\nReasoning: second."
+
+def ingest(processor, text="Solar panels convert sunlight into electricity. Efficiency depends on temperature."):
+    chunks = processor.chunk_document(text, "doc")
+    processor.store_document_embeddings(chunks, "doc")
+    return chunks
+
+@pytest.mark.asyncio
+async def test_summary_served_from_disk_until_reingest(fake_processor):
+    """Repeat summaries skip the LLM; re-ingesting the document regenerates"""
+    ingest(fake_processor)
+    provider = CountingProvider()
+    engine = AIEngine(document_processor=fake_processor, llm=provider)
+
+    first = await engine.generate_summary("doc")
+    assert await engine.generate_summary("doc") == first
+    events = [e async for e in engine.stream_summary("doc")]
+    assert events[-1] == {"type": "done", "summary": first, "cached": True}
+    assert provider.calls == 1
+
+    ingest(fake_processor)
+    await engine.generate_summary("doc")
+    assert provider.calls == 2
+
+@pytest.mark.asyncio
+async def test_artifacts_keyed_by_model_and_parameters(fake_processor):
+    """Question sets are cached per question count, and never shared across models"""
+    ingest(fake_processor)
+    provider = CountingProvider()
+    engine = AIEngine(document_processor=fake_processor, llm=provider)
+
+    questions = await engine.challenge_questions("doc", 2)
+    assert [q["question"] for q in questions] == ["Question one?", "Question two?"]
+    assert await engine.challenge_questions("doc", 2) == questions
+    assert provider.calls == 1
+    await engine.challenge_questions("doc", 1)
+    assert provider.calls == 2
+
+    other = CountingProvider(model="other-model")
+    await AIEngine(document_processor=fake_processor, llm=other).challenge_questions("doc", 2)
+    assert other.calls == 1
+    assert await engine.challenge_questions("missing", 2) is None
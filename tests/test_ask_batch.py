@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+import pytest
+import pytest_asyncio
+import httpx
+from src.backend.main import app
+from src.backend.api.dependencies import get_ai_engine
+from src.backend.core.ai_engine import AIEngine
+from src.backend.core.config import settings
+from src.backend.core.llm import LLMProvider
+from src.backend.core.embeddings import EmbeddingBackend
+from tests.conftest import HashingModel
+
+class DelayProvider(LLMProvider):
+    """Answers after a delay taken from the question text, e.g. 'slow' questions take longer"""
+    name = "delay"
+
+    def __init__(self):
+        super().__init__("delay-model")
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _complete(self, prompt, max_tokens):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.3 if "slow" in prompt else 0.05)
+            return "answer"
+        finally:
+            self.in_flight -= 1
+
+class BatchProcessor:
+    embedder = EmbeddingBackend(model=HashingModel())
+
+    def __init__(self):
+        self.batch_calls = []
+
+    def get_relevant_chunks_batch(self, queries, document_ids, top_k=None, query_embeddings=None):
+        self.batch_calls.append((list(queries), query_embeddings.shape))
+        return [[{"content": f"Context for {q}", "id": f"c{i}", "distance": 0.1, "metadata": {}}]
+                for i, q in enumerate(queries)]
+
+@pytest.fixture
+def engine():
+    return AIEngine(document_processor=BatchProcessor(), llm=DelayProvider())
+
+@pytest_asyncio.fixture
+async def client(engine):
+    app.dependency_overrides[get_ai_engine] = lambda: engine
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_batch_answers_stream_in_completion_order(engine):
+    """Fast questions come back before the slow one, each tagged with its original index"""
+    questions = ["slow question", "quick one", "quick two", "quick three"]
+    started = time.perf_counter()
+    results = [r async for r in engine.answer_batch(questions, ["doc"], max_concurrency=4)]
+    elapsed = time.perf_counter() - started
+
+    assert [r["index"] for r in results][-1] == 0
+    assert sorted(r["index"] for r in results) == [0, 1, 2, 3]
+    assert all(r["question"] == questions[r["index"]] for r in results)
+    assert elapsed < 0.5  # sequential would take 0.45s of LLM time alone
+    # One retrieval call, with every question embedded together
+    assert engine.document_processor.batch_calls == [(questions, (4, 64))]
+
+@pytest.mark.asyncio
+async def test_batch_respects_concurrency_limit(engine):
+    results = [r async for r in engine.answer_batch([f"quick {i}" for i in range(10)], ["doc"], max_concurrency=3)]
+    assert len(results) == 10
+    assert engine.llm.peak == 3
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_returns_ndjson(client):
+    response = await client.post("/api/v1/ask/batch", json={"questions": ["quick a", "quick b"], "document_ids": ["doc"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.strip().split("\n")]
+    assert sorted(line["index"] for line in lines) == [0, 1]
+    assert all(line["answer"] == "answer" for line in lines)
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_validates_input(client):
+    response = await client.post("/api/v1/ask/batch", json={"questions": [], "document_ids": ["doc"]})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_rejects_invalid_concurrency(client):
+    """Zero, negative and non-integer limits are refused before streaming starts"""
+    for value in (0, -1, 2.5, "4", True):
+        response = await client.post("/api/v1/ask/batch",
+                                     json={"questions": ["quick a"], "document_ids": ["doc"], "max_concurrency": value})
+        assert response.status_code == 400, value
+
+@pytest.mark.asyncio
+async def test_batch_endpoint_clamps_concurrency(client, engine, monkeypatch):
+    monkeypatch.setattr(settings, "ASK_BATCH_MAX_CONCURRENCY", 2)
+    response = await client.post("/api/v1/ask/batch",
+                                 json={"questions": [f"quick {i}" for i in range(6)], "document_ids": ["doc"],
+                                       "max_concurrency": 50})
+    assert response.status_code == 200
+    assert engine.llm.peak == 2
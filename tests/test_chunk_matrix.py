@@ -0,0 +1,74 @@
+import numpy as np
+from src.backend.core.chunk_matrix import ChunkMatrixCache
+from tests.test_vector_store import store_text
+
+def unit_rows(rows, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def build(cache, doc_id, vectors):
+    ids = [f"{doc_id}_{i}" for i in range(len(vectors))]
+    return cache.build(doc_id, ids, vectors, [f"text {i}" for i in ids], [{"doc_id": doc_id}] * len(ids))
+
+def test_search_matches_brute_force(tmp_path):
+    """Exact top-k with Chroma-style cosine distances, merged across documents"""
+    cache = ChunkMatrixCache(str(tmp_path), budget_bytes=1 << 20, dtype="float32", max_chunks=100)
+    a, b = unit_rows(20, seed=1), unit_rows(30, seed=2)
+    entries = {"a": build(cache, "a", a), "b": build(cache, "b", b)}
+    queries = unit_rows(3, seed=3)
+
+    results = cache.search(queries, entries, top_k=5)
+    everything = np.vstack([a, b])
+    ids = [f"a_{i}" for i in range(20)] + [f"b_{i}" for i in range(30)]
+    for row, hits in enumerate(results):
+        expected = np.argsort(-(everything @ queries[row]))[:5]
+        assert [hit["id"] for hit in hits] == [ids[i] for i in expected]
+        assert abs(hits[0]["distance"] - (1 - float(everything[expected[0]] @ queries[row]))) < 1e-5
+
+def test_budget_evicts_least_recently_used(tmp_path):
+    """Documents beyond the RAM budget are evicted but can be re-mapped from disk"""
+    one_doc = unit_rows(10).nbytes + sum(len(f"text d_{i}") for i in range(10))
+    cache = ChunkMatrixCache(str(tmp_path), budget_bytes=2 * one_doc + 16, dtype="float32", max_chunks=100)
+    for doc_id in ["x", "y"]:
+        build(cache, doc_id, unit_rows(10))
+    cache.get("x")  # x is now the most recently used
+    build(cache, "z", unit_rows(10))
+
+    assert cache.stats()["evictions"] == 1
+    assert list(cache._entries) == ["x", "z"]
+    assert cache.get("y") is not None  # mapped again from its file
+    assert cache.build("big", [str(i) for i in range(101)], unit_rows(101), ["t"] * 101, [{}] * 101) is None
+
+def test_processor_uses_matrix_and_invalidates_on_reingest(fake_processor):
+    """Small documents are searched from their matrix; re-ingesting rebuilds it"""
+    store_text(fake_processor, "a", ["Photosynthesis converts light into chemical energy."])
+    store_text(fake_processor, "b", ["Compilers translate source code into machine code."])
+
+    results = fake_processor.get_relevant_chunks("compilers machine code", ["a", "b"], top_k=1)
+    assert results[0]["metadata"]["doc_id"] == "b"
+    assert set(fake_processor.chunk_matrices._entries) == {"a", "b"}
+
+    store_text(fake_processor, "b", ["Glaciers carve valleys over millennia."])
+    assert "b" not in fake_processor.chunk_matrices._entries
+    results = fake_processor.get_relevant_chunks("glaciers valleys", ["b"], top_k=1)
+    assert results[0]["content"].startswith("Glaciers")
+
+def test_query_embeddings_are_cached(fake_embedder):
+    """Repeated queries differing only in whitespace are encoded once"""
+    first = fake_embedder.encode_query("What is  photosynthesis?")
+    again = fake_embedder.encode_queries(["What is photosynthesis? ", "What is photosynthesis?"])
+    assert np.allclose(again, first)
+    assert fake_embedder.model.encode_calls == [1]
+    assert fake_embedder.query_cache_stats()["hits"] == 2
+
+def test_large_documents_fall_back_to_chroma(fake_processor):
+    """Mapped and Chroma results are merged by distance when only some documents are small"""
+    store_text(fake_processor, "small", ["Compilers translate source code into machine code."])
+    big = store_text(fake_processor, "big", [f"Volcanic sentence number {i} about magma chambers." for i in range(200)])
+    assert len(big) > 1
+    fake_processor.chunk_matrices.max_chunks = 1
+
+    results = fake_processor.get_relevant_chunks("compilers machine code", ["small", "big"], top_k=3)
+    assert results[0]["metadata"]["doc_id"] == "small"
+    assert {r["metadata"]["doc_id"] for r in results} == {"small", "big"}
+    assert set(fake_processor.chunk_matrices._entries) == {"small"}
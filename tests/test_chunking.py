@@ -0,0 +1,55 @@
+import pytest
+from src.backend.core.chunking import iter_chunk_spans, iter_units
+
+@pytest.fixture
+def long_text():
+    """Several paragraphs of short sentences"""
+    paragraph = " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(40))
+    return "\n\n".join([paragraph] * 5)
+
+def test_units_cover_text_exactly(long_text):
+    """Boundary units are contiguous and cover the whole text"""
+    for boundary in ("sentence", "paragraph", "token"):
+        units = list(iter_units(long_text, boundary))
+        assert units[0][0] == 0
+        assert units[-1][1] == len(long_text)
+        assert all(a[1] == b[0] for a, b in zip(units, units[1:]))
+
+def test_unknown_boundary_rejected():
+    """Unsupported boundaries raise ValueError"""
+    with pytest.raises(ValueError, match="Unsupported chunk boundary"):
+        list(iter_units("text", "chapter"))
+
+def test_spans_respect_size_and_overlap(long_text):
+    """Chunks stay within size and consecutive chunks overlap"""
+    spans = list(iter_chunk_spans(long_text, chunk_size=300, overlap=80))
+    assert len(spans) > 1
+    assert all(end - start <= 300 for start, end in spans)
+    assert all(b[0] < a[1] for a, b in zip(spans, spans[1:]))
+    assert all(b[0] > a[0] for a, b in zip(spans, spans[1:]))
+    assert spans[-1][1] == len(long_text.rstrip())
+
+def test_no_overlap_partitions_text(long_text):
+    """With zero overlap the chunks never share characters"""
+    spans = list(iter_chunk_spans(long_text, chunk_size=300, overlap=0))
+    assert all(b[0] >= a[1] for a, b in zip(spans, spans[1:]))
+
+def test_long_unit_is_hard_split():
+    """A single unit larger than the chunk size is split"""
+    text = "x" * 2500
+    spans = list(iter_chunk_spans(text, chunk_size=1000, overlap=100))
+    assert [end - start for start, end in spans] == [1000, 1000, 500]
+
+def test_token_boundary_counts_tokens(long_text):
+    """Token mode measures size in whitespace tokens"""
+    spans = list(iter_chunk_spans(long_text, chunk_size=50, overlap=10, boundary="token"))
+    assert all(len(long_text[s:e].split()) <= 50 for s, e in spans)
+    assert len(long_text[spans[0][0]:spans[0][1]].split()) == 50
+
+def test_chunk_document_offsets_match_source(fake_processor, long_text):
+    """Chunk text equals the source slice named by its offsets"""
+    chunks = fake_processor.chunk_document(long_text, "doc")
+    assert [c["chunk_index"] for c in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        meta = chunk["metadata"]
+        assert long_text[meta["start_char"]:meta["end_char"]] == chunk["text"]
@@ -0,0 +1,67 @@
+from src.backend.core import context_builder
+from src.backend.core.context_builder import ContextBuilder, TokenCounter
+from src.backend.core.config import settings
+
+def chunk(chunk_id, text, doc_id="doc", start=None):
+    metadata = {"doc_id": doc_id}
+    if start is not None:
+        metadata.update(start_char=start, end_char=start + len(text))
+    return {"id": chunk_id, "content": text, "text": text, "metadata": metadata}
+
+SENTENCES = " ".join(f"Finding {i} reports a distinct measurement of value {i * 7}." for i in range(40))
+
+def test_packs_within_budget_and_trims_at_sentence_boundary():
+    """Whole chunks go in by rank; the one that overflows is cut at a sentence end"""
+    builder = ContextBuilder(budget_tokens=120)
+    packed = builder.build([chunk("a", SENTENCES[:200]), chunk("b", SENTENCES[200:1600]), chunk("c", "Never reached.")])
+    assert packed.usage["context_tokens"] <= 120
+    assert [c["id"] for c in packed.chunks] == ["a", "b"]
+    assert packed.chunks[1]["content"].endswith(".")
+    assert packed.usage["trimmed"] == 1
+
+def test_drops_near_duplicates_and_overlaps():
+    """Near-identical chunks and chunks already covered by a neighbour are skipped"""
+    builder = ContextBuilder(budget_tokens=2000)
+    base = SENTENCES[:600]
+    packed = builder.build([
+        chunk("a", base, start=0),
+        chunk("a-overlap", SENTENCES[100:500], start=100),
+        chunk("copy", base.replace("Finding 3 ", "Finding three "), doc_id="other"),
+        chunk("next", SENTENCES[500:1100], start=500),
+    ])
+    assert [c["id"] for c in packed.chunks] == ["a", "next"]
+    assert packed.usage["dropped_overlap"] == 1
+    assert packed.usage["dropped_duplicate"] == 1
+    # The shared 100 characters are cut from the neighbouring chunk
+    assert packed.chunks[1]["content"] == SENTENCES[600:1100].strip()
+
+def test_answer_tokens_clamped_to_context_window():
+    """Output allowance never exceeds what the model window leaves"""
+    builder = ContextBuilder(model="unknown-model")
+    assert builder.answer_max_tokens(100) <= builder.context_window - 100
+    assert builder.answer_max_tokens(builder.context_window) == 64
+    assert TokenCounter().count("abcd" * 10) > 0
+
+def test_counter_falls_back_when_encodings_cannot_load(monkeypatch):
+    """A tiktoken that cannot fetch its encodings leaves the character estimate in place"""
+    class OfflineTiktoken:
+        @staticmethod
+        def encoding_for_model(model):
+            raise ConnectionError("offline")
+
+        @staticmethod
+        def get_encoding(name):
+            raise ConnectionError("offline")
+
+    monkeypatch.setattr(context_builder, "tiktoken", OfflineTiktoken)
+    counter = TokenCounter("gpt-4o")
+    assert not counter.exact
+    assert counter.count("abcd" * 10) == 10
+
+def test_answer_cap_defaults_to_max_tokens(monkeypatch):
+    """Without ANSWER_MAX_TOKENS the answer allowance follows MAX_TOKENS"""
+    monkeypatch.setattr(settings, "ANSWER_MAX_TOKENS", 0)
+    monkeypatch.setattr(settings, "MAX_TOKENS", 4000)
+    assert ContextBuilder(model="gpt-4o").answer_max_tokens(100) == 4000
+    monkeypatch.setattr(settings, "ANSWER_MAX_TOKENS", 1024)
+    assert ContextBuilder(model="gpt-4o").answer_max_tokens(100) == 1024
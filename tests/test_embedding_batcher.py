@@ -0,0 +1,97 @@
+import threading
+import time
+import numpy as np
+import pytest
+from src.backend.core.embedding_batcher import BatcherClosedError, EmbeddingBatcher
+from src.backend.core.embeddings import EmbeddingBackend
+from tests.conftest import HashingModel
+
+class SlowEncoder:
+    """Encodes text length into one column and records each call's batch size"""
+
+    def __init__(self, seconds: float = 0.02):
+        self.seconds = seconds
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(len(texts))
+        time.sleep(self.seconds)
+        return np.array([[len(text)] for text in texts], dtype=np.float32)
+
+@pytest.fixture
+def encoder():
+    return SlowEncoder()
+
+@pytest.fixture
+def batcher(encoder):
+    batcher = EmbeddingBatcher(encoder, max_batch=8, max_wait_ms=5)
+    yield batcher
+    batcher.close()
+
+def encode_concurrently(batcher, requests):
+    results = [None] * len(requests)
+
+    def run(i):
+        results[i] = batcher.encode(requests[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_requests_share_batches(batcher, encoder):
+    """Many concurrent callers are served by far fewer encode calls, each getting its own rows"""
+    requests = [["x" * (i + 1)] for i in range(24)]
+    results = encode_concurrently(batcher, requests)
+
+    assert [float(result[0, 0]) for result in results] == [float(i + 1) for i in range(24)]
+    assert len(encoder.calls) < 24
+    assert max(encoder.calls) <= 8
+    stats = batcher.stats()
+    assert stats["texts"] == 24
+    assert stats["batches"] == len(encoder.calls)
+    assert sum(stats["batch_sizes"].values()) == stats["batches"]
+    assert stats["queue_depth"] == 0
+
+def test_lone_request_is_not_delayed(encoder):
+    """Without contention the wait window is skipped"""
+    batcher = EmbeddingBatcher(encoder, max_batch=8, max_wait_ms=500)
+    try:
+        started = time.perf_counter()
+        batcher.encode(["only"])
+        assert time.perf_counter() - started < 0.4
+    finally:
+        batcher.close()
+
+def test_multi_text_requests_keep_their_rows(batcher):
+    """Requests with several texts get back exactly their slice, in order"""
+    results = encode_concurrently(batcher, [["a", "bb", "ccc"], ["dddd"], ["ee", "f"]])
+    assert results[0][:, 0].tolist() == [1, 2, 3]
+    assert results[1][:, 0].tolist() == [4]
+    assert results[2][:, 0].tolist() == [2, 1]
+
+def test_encode_errors_reach_every_caller_in_the_batch():
+    """A failed forward pass fails each request's future"""
+    def broken(texts):
+        raise RuntimeError("out of memory")
+
+    batcher = EmbeddingBatcher(broken, max_batch=8, max_wait_ms=5)
+    try:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            batcher.encode(["a"])
+    finally:
+        batcher.close()
+    with pytest.raises(BatcherClosedError):
+        batcher.submit(["b"])
+
+def test_backend_routes_query_encodes_through_batcher():
+    """encode_queries uses the batcher; results match direct encoding"""
+    backend = EmbeddingBackend(model=HashingModel(), batching=True, query_cache_size=0)
+    try:
+        batched = backend.encode_queries(["alpha beta", "gamma"])
+        assert np.allclose(batched, backend.encode(["alpha beta", "gamma"]))
+        assert backend.batcher_stats()["texts"] == 2
+    finally:
+        backend.close()
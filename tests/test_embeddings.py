@@ -0,0 +1,33 @@
+import numpy as np
+
+def test_encode_returns_normalized_float32(fake_embedder):
+    """Embeddings are float32 unit vectors"""
+    vectors = fake_embedder.encode(["machine learning", "neural networks and data"])
+    assert vectors.dtype == np.float32
+    assert vectors.shape == (2, 64)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+def test_encode_empty_input(fake_embedder):
+    """No texts gives an empty (0, dim) array"""
+    assert fake_embedder.encode([]).shape == (0, 64)
+
+def test_ingest_encodes_in_batches(fake_processor):
+    """Chunks are embedded one configured batch at a time"""
+    chunks = [
+        {"id": f"d_chunk_{i}", "text": f"text {i}", "doc_id": "d", "chunk_index": i,
+         "metadata": {"start_char": i, "end_char": i + 1, "chunk_hash": f"h{i}"}}
+        for i in range(7)
+    ]
+    fake_processor.store_document_embeddings(chunks, "d")
+    assert fake_processor.embedder.model.encode_calls == [4, 3]
+
+def test_store_and_search_use_project_embeddings(fake_processor):
+    """Chroma receives our vectors, so search ranks by the project's model"""
+    text = "This is a test document about AI. It discusses machine learning."
+    chunks = [
+        {"id": "d_chunk_0", "text": "Cooking pasta with tomato sauce.", "doc_id": "d", "chunk_index": 0, "metadata": {"start_char": 0, "end_char": 32, "chunk_hash": "h0"}},
+        {"id": "d_chunk_1", "text": text, "doc_id": "d", "chunk_index": 1, "metadata": {"start_char": 32, "end_char": 99, "chunk_hash": "h1"}},
+    ]
+    fake_processor.store_document_embeddings(chunks, "d")
+    results = fake_processor.search_relevant_chunks("machine learning", "d", top_k=1)
+    assert results[0]["id"] == "d_chunk_1"
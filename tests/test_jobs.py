@@ -0,0 +1,90 @@
+import time
+import pytest
+from src.backend.core.config import settings
+from src.backend.core.jobs import IngestJobQueue
+
+def wait_for(queue, job_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.02)
+    pytest.fail("job did not finish")
+
+@pytest.fixture
+def sample_txt(tmp_path):
+    path = tmp_path / "report.txt"
+    path.write_text("Quarterly revenue grew in every region. " * 200, encoding="utf-8")
+    return path
+
+@pytest.fixture
+def queue(fake_processor):
+    queue = IngestJobQueue(fake_processor, fake_processor.registry, max_workers=2)
+    yield queue
+    queue.shutdown(wait=True)
+
+def test_job_reports_stage_progress(queue, sample_txt):
+    """A completed job records every stage and the resulting document"""
+    job_id = queue.submit(str(sample_txt), "report.txt")
+    job = wait_for(queue, job_id)
+
+    assert job["status"] == "completed"
+    assert job["progress"] == 1.0
+    assert job["chunk_count"] > 0
+    assert job["document_id"]
+    assert set(job["stages"]) == {"extract", "chunk", "embed", "store"}
+    assert job["stages"]["embed"]["chunks_done"] == job["chunk_count"]
+    assert "file_path" not in job
+
+def test_failed_job_records_error(queue, tmp_path):
+    """Extraction errors mark the job failed with the message"""
+    bad = tmp_path / "image.jpg"
+    bad.write_bytes(b"not a document")
+    job = wait_for(queue, queue.submit(str(bad), "image.jpg"))
+    assert job["status"] == "failed"
+    assert "Unsupported file format" in job["error"]
+
+def test_recover_requeues_interrupted_jobs(fake_processor, sample_txt, tmp_path):
+    """Jobs left queued or running by a previous process are resumed or failed"""
+    registry = fake_processor.registry
+    registry.create_job("interrupted", str(sample_txt), "report.txt", None)
+    registry.update_job("interrupted", status="running")
+    registry.create_job("orphaned", str(tmp_path / "gone.txt"), "gone.txt", None)
+
+    queue = IngestJobQueue(fake_processor, registry, max_workers=1)
+    try:
+        assert queue.recover() == 1
+        assert wait_for(queue, "interrupted")["status"] == "completed"
+        orphaned = queue.get("orphaned")
+        assert orphaned["status"] == "failed"
+        assert "missing" in orphaned["error"]
+    finally:
+        queue.shutdown(wait=True)
+
+def test_post_ingest_runs_as_final_stage(fake_processor, sample_txt):
+    """An eager post-ingest step is reported as the summarize stage before completion"""
+    seen = []
+    queue = IngestJobQueue(fake_processor, fake_processor.registry, max_workers=1, post_ingest=seen.append)
+    try:
+        job = wait_for(queue, queue.submit(str(sample_txt), "report.txt"))
+    finally:
+        queue.shutdown(wait=True)
+    assert job["status"] == "completed"
+    assert seen == [job["document_id"]]
+    assert job["stage"] == "summarize"
+    assert job["stages"]["summarize"]["progress"] == 1.0
+
+def test_finished_jobs_retire_their_upload(queue, sample_txt, tmp_path, monkeypatch):
+    """Saved uploads are deleted once ingested; files outside UPLOAD_DIR are left alone"""
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(upload_dir))
+    saved = upload_dir / "0123abcd.txt"
+    saved.write_text(sample_txt.read_text(encoding="utf-8"), encoding="utf-8")
+
+    assert wait_for(queue, queue.submit(str(saved), "report.txt"))["status"] == "completed"
+    assert wait_for(queue, queue.submit(str(sample_txt), "report.txt"))["status"] == "completed"
+    queue.shutdown(wait=True)
+    assert not saved.exists()
+    assert sample_txt.exists()
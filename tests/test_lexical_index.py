@@ -0,0 +1,98 @@
+import threading
+from src.backend.core.lexical_index import LexicalIndex, tokenize
+
+def chunks_for(doc_id, texts):
+    return [{"id": f"{doc_id}_chunk_{i}", "text": text} for i, text in enumerate(texts)]
+
+def test_tokenize_keeps_identifiers_whole():
+    """Part numbers and versions are indexed whole and by their parts"""
+    tokens = tokenize("Replace valve XJ-2000 per RFC 9110, v1.2")
+    assert "xj-2000" in tokens and "xj" in tokens and "2000" in tokens
+    assert "v1.2" in tokens and "rfc" in tokens
+
+def test_bm25_ranks_exact_terms_and_filters_documents():
+    """Rare exact terms win; results are limited to the requested documents"""
+    index = LexicalIndex()
+    index.index_document("a", chunks_for("a", ["The pump uses valve XJ-2000.", "General maintenance notes."]))
+    index.index_document("b", chunks_for("b", ["Valve XJ-2000 is also listed here."]))
+
+    hits = index.search("XJ-2000 valve", ["a"], top_k=5)
+    assert [h["id"] for h in hits] == ["a_chunk_0"]
+    assert hits[0]["doc_id"] == "a"
+    assert {h["doc_id"] for h in index.search("xj-2000", None, top_k=5)} == {"a", "b"}
+    assert index.search("nonexistent", ["a"]) == []
+
+def test_reindex_replaces_document_and_compacts():
+    """Re-indexing a document drops its old chunks, and compaction keeps results intact"""
+    index = LexicalIndex(compact_ratio=0.3)
+    index.index_document("a", chunks_for("a", ["alpha beta", "gamma delta"]))
+    index.index_document("b", chunks_for("b", ["beta epsilon"]))
+    index.index_document("a", chunks_for("a", ["zeta only"]))
+
+    assert index.search("gamma", ["a"]) == []
+    assert [h["id"] for h in index.search("zeta", ["a"])] == ["a_chunk_0"]
+    assert [h["id"] for h in index.search("beta", ["a", "b"])] == ["b_chunk_0"]
+    assert len(index) == 2
+
+def test_persists_and_reloads(tmp_path):
+    """Saved index loads back with identical results"""
+    path = str(tmp_path / "lexical.pkl")
+    index = LexicalIndex(path)
+    index.index_document("a", chunks_for("a", ["citation Smith2020 appears here"]))
+    index.save()
+    reloaded = LexicalIndex.load(path)
+    assert reloaded.search("smith2020", ["a"]) == index.search("smith2020", ["a"])
+
+def test_search_does_not_wait_for_save(tmp_path, monkeypatch):
+    """Pickling runs outside the index lock on a snapshot; searches and ingest proceed meanwhile"""
+    from src.backend.core import lexical_index
+
+    index = LexicalIndex(str(tmp_path / "lexical.pkl"))
+    index.index_document("a", chunks_for("a", ["torque spec T-450 applies"]))
+    index.index_document("b", chunks_for("b", ["left for the next save"]))
+    started, release = threading.Event(), threading.Event()
+    real_dump = lexical_index.pickle.dump
+
+    def slow_dump(*args, **kwargs):
+        started.set()
+        if not release.wait(2):
+            raise TimeoutError("search waited for the save")
+        real_dump(*args, **kwargs)
+
+    monkeypatch.setattr(lexical_index.pickle, "dump", slow_dump)
+    saver = threading.Thread(target=index.save)
+    saver.start()
+    assert started.wait(5)
+    assert [h["id"] for h in index.search("t-450", ["a"])] == ["a_chunk_0"]
+    index.index_document("c", chunks_for("c", ["added during the save"]))
+    release.set()
+    saver.join()
+
+    monkeypatch.setattr(lexical_index.pickle, "dump", real_dump)
+    assert LexicalIndex.load(index.path).documents() == {"a": 1, "b": 1}
+    index.save()
+    assert LexicalIndex.load(index.path).documents() == {"a": 1, "b": 1, "c": 1}
+
+def test_hybrid_retrieval_surfaces_exact_term(fake_processor):
+    """A chunk that only matches lexically is fused into the results"""
+    texts = [f"General discussion of topic number {i} in plain prose." for i in range(30)]
+    texts.append("Order part ZX-4471B before the audit.")
+    text = " ".join(texts)
+    chunks = fake_processor.chunk_document(text, "doc")
+    fake_processor.store_document_embeddings(chunks, "doc")
+
+    results = fake_processor.get_relevant_chunks("ZX-4471B", ["doc"], top_k=3)
+    assert any("ZX-4471B" in chunk["content"] for chunk in results)
+    assert all("score" in chunk for chunk in results)
+
+def test_lexical_index_rebuilt_from_registry(fake_processor, fake_embedder):
+    """A processor whose lexical index file is missing re-indexes registered documents"""
+    from src.backend.core.document_processor import DocumentProcessor
+    chunks = fake_processor.chunk_document("Acronym NASA appears once.", "doc")
+    fake_processor.store_document_embeddings(chunks, "doc")
+    fake_processor.registry.upsert_document("doc", "doc.txt", len(chunks), 27)
+
+    reopened = DocumentProcessor(embedder=fake_embedder, registry=fake_processor.registry)
+    reopened.lexical_index = LexicalIndex()
+    reopened._sync_lexical_index()
+    assert reopened.lexical_index.search("nasa", ["doc"])[0]["id"] == chunks[0]["id"]
@@ -0,0 +1,61 @@
+import asyncio
+import time
+import pytest
+from src.backend.core.ai_engine import AIEngine
+from src.backend.core.llm import LLMProvider
+from src.backend.core.embeddings import EmbeddingBackend
+from tests.conftest import HashingModel
+
+class SlowProvider(LLMProvider):
+    """Provider that sleeps instead of calling an API"""
+    name = "slow"
+
+    def __init__(self, delay: float, **kwargs):
+        super().__init__("slow-model", **kwargs)
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def _complete(self, prompt, max_tokens):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return f"answer to: {prompt[-20:]}"
+        finally:
+            self.in_flight -= 1
+
+class FakeRetrievalProcessor:
+    embedder = EmbeddingBackend(model=HashingModel())
+
+    def get_relevant_chunks(self, question, document_ids, top_k=None, query_embedding=None):
+        time.sleep(0.05)  # blocking work must run off the event loop
+        return [{"content": "Machine learning enables systems to learn from data.", "id": "c0", "distance": 0.1, "metadata": {}}]
+
+@pytest.mark.asyncio
+async def test_provider_enforces_concurrency_limit():
+    """No more than max_concurrency calls are in flight"""
+    provider = SlowProvider(0.02, max_concurrency=3)
+    results = await asyncio.gather(*[provider.complete(f"q{i}", 10) for i in range(10)])
+    assert len(results) == 10
+    assert provider.peak == 3
+
+@pytest.mark.asyncio
+async def test_provider_timeout():
+    """Slow completions raise TimeoutError"""
+    provider = SlowProvider(1.0, timeout=0.05)
+    with pytest.raises(asyncio.TimeoutError):
+        await provider.complete("q", 10)
+
+@pytest.mark.asyncio
+async def test_answer_question_keeps_event_loop_responsive():
+    """Concurrent questions overlap instead of running one after another"""
+    engine = AIEngine(document_processor=FakeRetrievalProcessor(), llm=SlowProvider(0.1))
+    started = time.perf_counter()
+    results = await asyncio.gather(*[engine.answer_question("What is ML?", ["doc"]) for _ in range(8)])
+    elapsed = time.perf_counter() - started
+
+    assert all(r["answer"].startswith("answer to") for r in results)
+    assert all(r["source_chunks"] for r in results)
+    assert all(r["usage"]["context_tokens"] > 0 for r in results)
+    assert elapsed < 0.8  # sequential would take 8 * 0.15s
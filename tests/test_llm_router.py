@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from src.backend.core.llm import (CircuitBreaker, LatencyHistogram, LLMProvider, LLMRouter,
+                                  ProviderUnavailableError, StubProvider)
+
+class ScriptedProvider(LLMProvider):
+    """Provider that fails a set number of times, then answers after a delay"""
+
+    def __init__(self, name, failures=0, delay=0.0, error=None):
+        super().__init__(f"{name}-model")
+        self.name = name
+        self.failures = failures
+        self.delay = delay
+        self.error = error or asyncio.TimeoutError()
+        self.calls = 0
+
+    async def _complete(self, prompt, max_tokens):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise self.error
+        return f"{self.name}: {prompt}"
+
+class RejectedRequest(Exception):
+    status_code = 400
+
+def router(*providers, **kwargs):
+    kwargs.setdefault("backoff_seconds", 0.001)
+    kwargs.setdefault("hedge", False)
+    kwargs.setdefault("route_by_latency", False)
+    return LLMRouter(list(providers), **kwargs)
+
+@pytest.mark.asyncio
+async def test_retries_then_fails_over():
+    """Transient errors are retried on the same provider before moving to the next"""
+    flaky, backup = ScriptedProvider("flaky", failures=10), ScriptedProvider("backup")
+    gateway = router(flaky, backup, retries=2)
+    assert await gateway.complete("q", 10) == "backup: q"
+    assert flaky.calls == 3
+    assert gateway.stats()["flaky"]["retries"] == 2
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_provider():
+    """After enough failures the provider is skipped until its reset period passes"""
+    broken, backup = ScriptedProvider("broken", failures=100), ScriptedProvider("backup")
+    gateway = router(broken, backup, retries=0,
+                     breakers={"broken": CircuitBreaker(failure_threshold=2, reset_seconds=60)})
+    for _ in range(4):
+        await gateway.complete("q", 10)
+    assert broken.calls == 2
+    assert gateway.stats()["broken"]["circuit"] == "open"
+
+def test_half_open_breaker_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+@pytest.mark.asyncio
+async def test_rejected_request_is_not_failed_over():
+    """A 4xx rejection would fail everywhere, so it is raised straight away"""
+    bad, backup = ScriptedProvider("bad", failures=1, error=RejectedRequest()), ScriptedProvider("backup")
+    with pytest.raises(RejectedRequest):
+        await router(bad, backup).complete("q", 10)
+    assert backup.calls == 0
+
+@pytest.mark.asyncio
+async def test_hedge_returns_faster_provider():
+    """A slow primary is hedged after the hedge delay and the first answer wins"""
+    slow, fast = ScriptedProvider("slow", delay=1.0), ScriptedProvider("fast", delay=0.01)
+    gateway = router(slow, fast, hedge=True, hedge_min_seconds=0.05)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert await gateway.complete("q", 10) == "fast: q"
+    assert loop.time() - started < 0.5
+    assert gateway.stats()["fast"]["hedges"] == 1
+    assert gateway.breakers["slow"].state == "closed"
+
+@pytest.mark.asyncio
+async def test_latency_routing_prefers_faster_provider():
+    first, second = ScriptedProvider("first"), ScriptedProvider("second")
+    gateway = router(first, second, route_by_latency=True)
+    for _ in range(5):
+        gateway.latency["first"].observe(2.0)
+        gateway.latency["second"].observe(0.1)
+    assert [p.name for p in gateway.ordered()] == ["second", "first"]
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_first_fragment():
+    class BrokenStream(ScriptedProvider):
+        async def _stream(self, prompt, max_tokens):
+            raise asyncio.TimeoutError()
+            yield
+
+    gateway = router(BrokenStream("broken"), StubProvider())
+    text = "".join([t async for t in gateway.stream("q", 10)])
+    assert text.startswith("Stub response")
+
+@pytest.mark.asyncio
+async def test_all_providers_failing_raises_unavailable():
+    with pytest.raises(ProviderUnavailableError):
+        await router(ScriptedProvider("a", failures=9), retries=0).complete("q", 10)
+
+def test_histogram_percentiles_track_observations():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+    for _ in range(95):
+        histogram.observe(0.1)
+    for _ in range(5):
+        histogram.observe(10.0)
+    assert histogram.percentile(50) < 0.2
+    assert histogram.percentile(99) >= 10.0
@@ -0,0 +1,86 @@
+import os
+import time
+import numpy as np
+import pytest
+from src.backend.core import embeddings
+from src.backend.core.config import settings
+from src.backend.core.document_processor import DocumentProcessor
+from src.backend.core.jobs import IngestJobQueue
+from tests.conftest import HashingModel
+from tests.test_jobs import wait_for
+
+@pytest.fixture
+def sample_txt(tmp_path):
+    path = tmp_path / "manual.txt"
+    path.write_text("Replace the flux capacitor FC-2291 every spring. " * 100, encoding="utf-8")
+    return path
+
+@pytest.fixture
+def reader(fake_processor, fake_embedder, monkeypatch):
+    """A read-only worker's processor over the same store as fake_processor"""
+    monkeypatch.setattr(settings, "VECTOR_STORE_WRITER", False)
+    return DocumentProcessor(embedder=fake_embedder)
+
+def test_read_only_queue_leaves_jobs_to_the_writer(fake_processor, sample_txt):
+    """Jobs submitted without execute stay queued until the polling writer runs them"""
+    submitter = IngestJobQueue(fake_processor, fake_processor.registry, execute=False)
+    job_id = submitter.submit(str(sample_txt), "manual.txt")
+    time.sleep(0.1)
+    assert submitter.get(job_id)["status"] == "queued"
+
+    writer = IngestJobQueue(fake_processor, fake_processor.registry, max_workers=1)
+    writer.start_polling(interval=0.02)
+    try:
+        job = wait_for(writer, job_id)
+    finally:
+        writer.shutdown(wait=True)
+        submitter.shutdown()
+    assert job["status"] == "completed"
+    assert job["chunk_count"] > 0
+
+def test_finished_job_is_not_run_twice(fake_processor, sample_txt):
+    """A job listed by a poll just before it ran is skipped the second time"""
+    queue = IngestJobQueue(fake_processor, fake_processor.registry, max_workers=1)
+    try:
+        job_id = queue.submit(str(sample_txt), "manual.txt")
+        finished = wait_for(queue, job_id)
+        queue._schedule(job_id)
+        time.sleep(0.1)
+        assert queue.get(job_id)["finished_at"] == finished["finished_at"]
+    finally:
+        queue.shutdown(wait=True)
+
+def test_reader_refresh_loads_documents_from_the_writer(fake_processor, reader, sample_txt):
+    """refresh() indexes what the writer stored since the last call, once"""
+    assert reader.lexical_index.path is None
+    doc_id = fake_processor.process_document(str(sample_txt), "manual.txt")
+    assert reader.lexical_index.search("FC-2291", [doc_id], 5) == []
+
+    invalidated = []
+    reader.add_ingest_listener(invalidated.append)
+    assert reader.refresh() == [doc_id]
+    assert invalidated == [doc_id]
+    assert reader.lexical_index.search("FC-2291", [doc_id], 5)
+    assert reader.get_relevant_chunks("flux capacitor FC-2291", [doc_id])
+    assert reader.refresh() == []
+
+def test_preloaded_model_is_shared(monkeypatch):
+    """Backends built after preload reuse the same model object"""
+    model = HashingModel()
+    monkeypatch.setitem(embeddings._preloaded, "shared-model", model)
+    assert embeddings.preload_model("shared-model") is model
+    assert embeddings.EmbeddingBackend(model_name="shared-model").model is model
+
+def test_reader_keeps_chunk_matrices_in_memory(fake_processor, reader, sample_txt):
+    """Readers build missing matrices without writing files, and map the ones the writer saved"""
+    doc_id = fake_processor.process_document(str(sample_txt), "manual.txt")
+    reader.refresh()
+    directory = reader.chunk_matrices.directory
+    assert reader.get_relevant_chunks("flux capacitor FC-2291", [doc_id])
+    assert doc_id in reader.chunk_matrices._entries
+    assert os.listdir(directory) == []
+
+    fake_processor.get_relevant_chunks("flux capacitor FC-2291", [doc_id])
+    assert sorted(os.listdir(directory)) == [f"{doc_id}.meta.pkl", f"{doc_id}.npy"]
+    reader.chunk_matrices.forget(doc_id)
+    assert isinstance(reader.chunk_matrices.get(doc_id).matrix, np.memmap)
@@ -0,0 +1,71 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from tests.conftest import make_pdf
+from src.backend.core import pdf_extract
+from src.backend.core.config import settings
+
+@pytest.fixture
+def long_pdf(tmp_path):
+    path = tmp_path / "long.pdf"
+    path.write_bytes(make_pdf([f"Page {i} discusses topic {i}." for i in range(12)]))
+    return path
+
+def test_extract_page_range_keeps_order(long_pdf):
+    """Pages come back with their index, text and timing"""
+    pages = pdf_extract.extract_page_range(str(long_pdf), 3, 6)
+    assert [page.index for page in pages] == [3, 4, 5]
+    assert pages[0].text == "Page 3 discusses topic 3."
+    assert all(page.seconds >= 0 and not page.fallback for page in pages)
+
+def test_parallel_extraction_matches_serial(long_pdf):
+    """Fanning page ranges over processes reassembles pages in order"""
+    try:
+        parallel = pdf_extract.extract_pages(str(long_pdf), workers=2, pages_per_task=5, min_parallel_pages=1)
+    finally:
+        pdf_extract.shutdown_pool()
+    serial = pdf_extract.extract_pages(str(long_pdf), workers=1, pages_per_task=5, min_parallel_pages=1)
+    assert [page.index for page in parallel] == list(range(12))
+    assert [page.text for page in parallel] == [page.text for page in serial]
+
+def test_failed_page_falls_back_per_page(long_pdf, monkeypatch):
+    """One broken pdfplumber page is retried with PyPDF2 without re-parsing the rest"""
+    original = pdf_extract.pdfplumber.page.Page.extract_text
+
+    def flaky(page, *args, **kwargs):
+        if page.page_number == 2:
+            raise RuntimeError("bad content stream")
+        return original(page, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_extract.pdfplumber.page.Page, "extract_text", flaky)
+    pages = pdf_extract.extract_page_range(str(long_pdf), 0, 4)
+    assert [page.fallback for page in pages] == [False, True, False, False]
+    assert "Page 1 discusses topic 1" in pages[1].text
+
+def test_processor_reports_page_stats(fake_processor, long_pdf):
+    """extract_text_from_file joins pages and fills the stats dict"""
+    stats = {}
+    text = fake_processor.extract_text_from_file(str(long_pdf), stats)
+    assert text.splitlines()[0] == "Page 0 discusses topic 0."
+    assert len(text.splitlines()) == 12
+    assert stats["pages"] == 12
+    assert stats["fallback_pages"] == 0
+    assert len(stats["slowest_pages"]) == 5
+
+def test_broken_pool_is_replaced(long_pdf):
+    """A pool whose worker died is discarded, and extraction succeeds in a fresh one"""
+    try:
+        broken = pdf_extract._get_pool(2)
+        with pytest.raises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+        pages = pdf_extract.extract_pages(str(long_pdf), workers=2, pages_per_task=5, min_parallel_pages=1)
+        assert [page.index for page in pages] == list(range(12))
+        assert pdf_extract._pool is not broken
+    finally:
+        pdf_extract.shutdown_pool()
+
+def test_unreadable_pdf_raises_open_error(tmp_path):
+    path = tmp_path / "broken.pdf"
+    path.write_bytes(b"not a pdf")
+    with pytest.raises(pdf_extract.PdfOpenError):
+        pdf_extract.extract_pages(str(path), workers=2, pages_per_task=5, min_parallel_pages=1)
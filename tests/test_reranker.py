@@ -0,0 +1,78 @@
+import time
+import numpy as np
+import pytest
+from src.backend.core.ai_engine import AIEngine
+from src.backend.core.llm import LLMProvider
+from src.backend.core.reranker import CrossEncoderReranker
+
+class OverlapModel:
+    """Cross-encoder stand-in: score is word overlap with the query"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = []
+
+    def predict(self, pairs, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        time.sleep(self.delay)
+        return np.array([len(set(q.lower().split()) & set(t.lower().split())) for q, t in pairs], dtype=np.float32)
+
+def candidates(texts):
+    return [{"id": f"c{i}", "content": text, "text": text, "metadata": {"chunk_hash": f"h{i}"}} for i, text in enumerate(texts)]
+
+def test_rerank_orders_by_cross_encoder_in_batches():
+    """Candidates are scored in batches and the best few returned"""
+    model = OverlapModel()
+    reranker = CrossEncoderReranker(model=model, batch_size=2, cache_size=100)
+    chunks = candidates(["unrelated text", "solar panel efficiency", "panel", "solar panel efficiency gains"])
+    ranked = reranker.rerank("solar panel efficiency gains", chunks, top_n=2)
+    assert [c["id"] for c in ranked] == ["c3", "c1"]
+    assert model.batches == [2, 2]
+    assert "rerank_score" in ranked[0]
+
+def test_scores_are_cached_per_query_and_chunk():
+    """A repeated query scores nothing new; an edited chunk is rescored"""
+    model = OverlapModel()
+    reranker = CrossEncoderReranker(model=model, batch_size=8, cache_size=100)
+    chunks = candidates(["alpha beta", "beta gamma"])
+    reranker.rerank("beta", chunks, top_n=2)
+    reranker.rerank("beta", chunks, top_n=2)
+    assert model.batches == [2]
+
+    chunks[0]["metadata"]["chunk_hash"] = "edited"
+    reranker.rerank("beta", chunks, top_n=2)
+    assert model.batches == [2, 1]
+    assert reranker.stats()["cache_hits"] == 3
+
+def test_budget_returns_partial_ranking():
+    """When the budget runs out, scored chunks come first and the rest keep retrieval order"""
+    model = OverlapModel(delay=0.05)
+    reranker = CrossEncoderReranker(model=model, batch_size=2, cache_size=100)
+    chunks = candidates(["one", "two", "three match", "four match", "five", "six"])
+    ranked = reranker.rerank("match", chunks, top_n=4, budget_seconds=0.01)
+    assert model.batches == [2]
+    assert [c["id"] for c in ranked] == ["c0", "c1", "c2", "c3"]
+    assert "rerank_score" not in ranked[2]
+    assert reranker.stats()["budget_timeouts"] == 1
+
+class EchoProvider(LLMProvider):
+    name = "echo"
+
+    def __init__(self):
+        super().__init__("echo-model")
+
+    async def _complete(self, prompt, max_tokens):
+        return prompt
+
+@pytest.mark.asyncio
+async def test_engine_puts_reranked_chunks_in_prompt(fake_processor):
+    """With a reranker the engine over-retrieves and prompts with the top chunks only"""
+    text = " ".join(f"Sentence {i} mentions generic filler material." for i in range(60)) + " Turbine blade erosion is severe."
+    chunks = fake_processor.chunk_document(text, "doc")
+    fake_processor.store_document_embeddings(chunks, "doc")
+    engine = AIEngine(document_processor=fake_processor, llm=EchoProvider(), answer_cache=None,
+                      reranker=CrossEncoderReranker(model=OverlapModel(), batch_size=4, cache_size=100))
+
+    response = await engine.answer_question("turbine blade erosion", ["doc"], rerank_budget_ms=1000)
+    assert "Turbine blade erosion" in response["source_chunks"][0]["content"]
+    assert len(response["source_chunks"]) <= 5
@@ -0,0 +1,145 @@
+import pytest
+from src.backend.core import services as services_module
+from src.backend.core.services import ServiceContainer
+from src.backend.core.storage import DocumentRegistry
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return [[0.0] * 3 for _ in texts]
+
+class FakeEmbedder:
+    def __init__(self):
+        self.model = FakeModel()
+
+    def encode(self, texts):
+        return self.model.encode(texts)
+
+class FakeClient:
+    def heartbeat(self):
+        return 1
+
+class FakeProcessor:
+    instances = 0
+    registry_path = None
+    last = None
+
+    def __init__(self):
+        self.registry = DocumentRegistry(FakeProcessor.registry_path)
+        FakeProcessor.instances += 1
+        FakeProcessor.last = self
+        self.closed = False
+        self.embedder = FakeEmbedder()
+        self.embedding_model = self.embedder.model
+        self.chroma_client = FakeClient()
+
+    def migrate_legacy_collections(self):
+        return {"documents": 0, "chunks": 0}
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+        self.registry.close()
+
+class FakeEngine:
+    def __init__(self, document_processor=None):
+        self.document_processor = document_processor
+        self.reranker = None
+
+@pytest.fixture
+def container(monkeypatch, tmp_path):
+    """ServiceContainer wired to fake processor/engine classes"""
+    FakeProcessor.instances = 0
+    FakeProcessor.registry_path = str(tmp_path / "registry.sqlite3")
+    monkeypatch.setattr(services_module, "DocumentProcessor", FakeProcessor)
+    monkeypatch.setattr(services_module, "AIEngine", FakeEngine)
+    return ServiceContainer()
+
+def test_start_loads_once_and_warms_up(container):
+    """Repeated starts reuse the same processor and engine"""
+    assert not container.ready
+    container.start()
+    container.start()
+
+    assert FakeProcessor.instances == 1
+    assert container.ready
+    assert container.ai_engine.document_processor is container.document_processor
+    assert container.document_processor.embedding_model.calls == 1
+
+def test_status_reports_readiness(container):
+    """Status reflects the lifecycle"""
+    assert container.status()["ready"] is False
+    container.start()
+    status = container.status()
+    assert status["ready"] is True
+    assert status["model_loaded"] is True
+    assert status["startup_seconds"] is not None
+    container.shutdown()
+    assert container.status()["ready"] is False
+
+def test_failed_start_can_be_retried(container, monkeypatch):
+    """A transient failure after the processor is built leaves nothing half-started"""
+    attempts = []
+
+    class FlakyEngine(FakeEngine):
+        def __init__(self, document_processor=None):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("transient")
+            super().__init__(document_processor)
+
+    monkeypatch.setattr(services_module, "AIEngine", FlakyEngine)
+    monkeypatch.setattr(services_module.settings, "SERVICES_RETRY_SECONDS", 0)
+    with pytest.raises(RuntimeError):
+        container.start()
+    assert container.document_processor is None and container.ai_engine is None
+    assert container.status()["error"] == "transient"
+    assert container.status()["model_loaded"] is False
+    assert FakeProcessor.last.closed
+
+    container.start()
+    assert container.ready
+    assert container.ai_engine is not None and container.jobs is not None
+    assert container.status()["error"] is None
+    container.shutdown()
+
+def test_failed_start_is_not_retried_immediately(container, monkeypatch):
+    """Requests arriving just after a failed start get its error without reloading the model"""
+    class BrokenEngine(FakeEngine):
+        def __init__(self, document_processor=None):
+            raise RuntimeError("no model")
+
+    monkeypatch.setattr(services_module, "AIEngine", BrokenEngine)
+    monkeypatch.setattr(services_module.settings, "SERVICES_RETRY_SECONDS", 60)
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="no model"):
+            container.start()
+    assert FakeProcessor.instances == 1
+
+def test_recovered_jobs_see_the_engine(container, monkeypatch):
+    """Interrupted jobs are re-queued only once the engine their post-ingest step uses is published"""
+    seen = []
+    monkeypatch.setattr(services_module.IngestJobQueue, "recover",
+                        lambda queue: seen.append(container.ai_engine) or 0)
+    container.start()
+    assert seen == [container.ai_engine] and seen[0] is not None
+    container.shutdown()
+
+def test_dependencies_raise_503_without_services(monkeypatch):
+    """Route dependencies report an unstarted container as unavailable, not as a None engine"""
+    from fastapi import HTTPException
+    from src.backend.api import dependencies
+
+    def failing_start(*args, **kwargs):
+        raise RuntimeError("model missing")
+
+    monkeypatch.setattr(dependencies.services, "model_loaded", False)
+    monkeypatch.setattr(dependencies.services, "start", failing_start)
+    with pytest.raises(HTTPException) as excinfo:
+        dependencies.get_ai_engine()
+    assert excinfo.value.status_code == 503
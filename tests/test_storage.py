@@ -0,0 +1,61 @@
+import pytest
+from src.backend.core.storage import DocumentRegistry
+
+@pytest.fixture
+def registry(tmp_path):
+    return DocumentRegistry(str(tmp_path / "registry.sqlite3"))
+
+@pytest.fixture
+def sample_txt(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text(
+        "Neural networks learn layered representations. " * 30 + "\n\n" +
+        "Gradient descent updates the weights iteratively. " * 30,
+        encoding="utf-8"
+    )
+    return path
+
+def make_chunk(doc_id, index, chunk_hash):
+    return {"id": f"{doc_id}_chunk_{index}", "chunk_index": index,
+            "metadata": {"chunk_hash": chunk_hash, "start_char": index * 10, "end_char": index * 10 + 9}}
+
+def test_registry_round_trip(registry, tmp_path):
+    """Documents and chunk hashes persist across connections"""
+    registry.upsert_document("abc", "a.txt", 2, 100)
+    registry.replace_chunks("abc", [make_chunk("abc", 0, "h0"), make_chunk("abc", 1, "h1")])
+    registry.close()
+
+    reopened = DocumentRegistry(str(tmp_path / "registry.sqlite3"))
+    assert reopened.get_document("abc")["chunk_count"] == 2
+    assert [c["chunk_hash"] for c in reopened.get_chunks("abc")] == ["h0", "h1"]
+    assert reopened.find_chunks_by_hash(["h1", "zz"])["h1"]["chunk_id"] == "abc_chunk_1"
+
+def test_replace_chunks_drops_old_version(registry):
+    """Replacing a document's chunks removes the previous rows"""
+    registry.replace_chunks("abc", [make_chunk("abc", 0, "h0"), make_chunk("abc", 1, "h1")])
+    registry.replace_chunks("abc", [make_chunk("abc", 0, "h2")])
+    assert [c["chunk_hash"] for c in registry.get_chunks("abc")] == ["h2"]
+    assert registry.find_chunks_by_hash(["h0"]) == {}
+
+def test_identical_reupload_skips_embedding(fake_processor, sample_txt):
+    """A second upload of the same bytes does no extraction or encoding"""
+    doc_id, text, chunks = fake_processor.process_uploaded_document(str(sample_txt))
+    calls = len(fake_processor.embedding_model.encode_calls)
+    fake_processor.extract_text_from_file = lambda path: pytest.fail("should not re-extract")
+
+    again_id, again_text, again_chunks = fake_processor.process_uploaded_document(str(sample_txt))
+    assert again_id == doc_id
+    assert [c["id"] for c in again_chunks] == [c["id"] for c in chunks]
+    assert again_text.split() == text.split()
+    assert len(fake_processor.embedding_model.encode_calls) == calls
+
+def test_edited_document_reembeds_only_changed_chunks(fake_processor, sample_txt):
+    """Chunks whose content hash is already indexed reuse their stored vectors"""
+    _, text, chunks = fake_processor.process_uploaded_document(str(sample_txt))
+    edited = fake_processor.chunk_document(text + "\n\nA brand new closing paragraph.", "edited")
+
+    stats = fake_processor.store_document_embeddings(edited, "edited")
+    assert stats["embedded"] >= 1
+    assert stats["reused"] == len(edited) - stats["embedded"]
+    assert stats["reused"] >= len(chunks) - 1
+    assert len(fake_processor.store.document_ids("edited")) == len(edited)
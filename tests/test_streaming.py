@@ -0,0 +1,87 @@
+import json
+import pytest
+import pytest_asyncio
+import httpx
+from src.backend.main import app
+from src.backend.api.dependencies import get_ai_engine
+from src.backend.core.ai_engine import AIEngine
+from src.backend.core.llm import LLMProvider
+from src.backend.core.embeddings import EmbeddingBackend
+from tests.conftest import HashingModel
+
+class TokenProvider(LLMProvider):
+    """Provider that streams a fixed answer word by word"""
+    name = "tokens"
+
+    def __init__(self, text: str):
+        super().__init__("token-model")
+        self.text = text
+
+    async def _complete(self, prompt, max_tokens):
+        return self.text
+
+    async def _stream(self, prompt, max_tokens):
+        for word in self.text.split(" "):
+            yield word + " "
+
+class FakeProcessor:
+    embedder = EmbeddingBackend(model=HashingModel())
+
+    def get_relevant_chunks(self, question, document_ids, top_k=None, query_embedding=None):
+        return [{"content": "Neural networks learn representations.", "id": "c0", "distance": 0.2, "metadata": {}}]
+
+    def get_document_chunks(self, document_id):
+        return [{"content": "Neural networks learn representations.", "id": "c0", "distance": 0.0, "metadata": {}}]
+
+@pytest.fixture
+def engine():
+    return AIEngine(document_processor=FakeProcessor(), llm=TokenProvider("Networks learn representations."))
+
+@pytest_asyncio.fixture
+async def client(engine):
+    app.dependency_overrides[get_ai_engine] = lambda: engine
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+@pytest.mark.asyncio
+async def test_stream_answer_event_order(engine):
+    """Sources come first, then tokens, then the full answer"""
+    events = [e async for e in engine.stream_answer("What do networks learn?", ["doc"])]
+    assert events[0]["type"] == "sources"
+    assert events[0]["usage"]["chunks_used"] == len(events[0]["source_chunks"])
+    assert [e["type"] for e in events[1:-1]] == ["token"] * 3
+    assert events[-1] == {"type": "done", "answer": "Networks learn representations. "}
+
+@pytest.mark.asyncio
+async def test_ask_stream_endpoint(client):
+    """/ask/stream emits SSE events ending with the session id"""
+    response = await client.post("/api/v1/ask/stream", json={"question": "What?", "document_ids": ["doc"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert events[0][0] == "sources"
+    assert events[-1][0] == "done"
+    assert events[-1][1]["session_id"]
+    assert events[-1][1]["question"] == "What?"
+
+@pytest.mark.asyncio
+async def test_summarize_stream_endpoint(client):
+    """/summarize/stream emits tokens and the final summary"""
+    response = await client.post("/api/v1/summarize/stream", json={"document_id": "doc"})
+    events = parse_sse(response.text)
+    assert events[0][0] == "token"
+    assert events[-1] == ("done", {"summary": "Networks learn representations. "})
+
+@pytest.mark.asyncio
+async def test_ask_stream_requires_question(client):
+    """Missing fields are rejected before streaming starts"""
+    response = await client.post("/api/v1/ask/stream", json={"document_ids": ["doc"]})
+    assert response.status_code == 400
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import pytest
+from src.backend.core.storage import DocumentRegistry
+from src.backend.core.summarizer import MapReduceSummarizer
+
+class RecordingLLM:
+    """Returns a short deterministic summary and tracks concurrency"""
+
+    def __init__(self):
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+
+    async def __call__(self, prompt, max_tokens):
+        self.prompts.append(prompt)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return f"summary-{len(self.prompts)} " + "x" * 40
+
+def make_chunks(count, prefix="Section"):
+    return [{"id": f"c{i}", "content": f"{prefix} {i}: " + "detail " * 30, "metadata": {}} for i in range(count)]
+
+@pytest.mark.asyncio
+async def test_short_document_is_passed_through():
+    """Content that fits one prompt is not summarized in pieces"""
+    llm = RecordingLLM()
+    summarizer = MapReduceSummarizer(llm, group_chars=10000)
+    chunks = make_chunks(3)
+    assert await summarizer.condense(chunks) == "\n".join(c["content"] for c in chunks)
+    assert llm.prompts == []
+
+@pytest.mark.asyncio
+async def test_long_document_is_reduced_with_bounded_parallelism():
+    """Groups are summarized concurrently up to the limit and reduced below the budget"""
+    llm = RecordingLLM()
+    summarizer = MapReduceSummarizer(llm, group_chars=1000, max_concurrency=3)
+    condensed = await summarizer.condense(make_chunks(60))
+    assert len(condensed) <= 1000
+    assert 1 < llm.peak <= 3
+    assert summarizer.parts_generated == len(llm.prompts)
+
+@pytest.mark.asyncio
+async def test_parts_are_reused_across_runs_and_documents(tmp_path):
+    """Cached parts persist in the registry; an appended document reuses earlier groups"""
+    registry = DocumentRegistry(str(tmp_path / "registry.sqlite3"))
+    chunks = make_chunks(60)
+    first = MapReduceSummarizer(RecordingLLM(), store=registry, group_chars=1000)
+    await first.condense(chunks)
+
+    llm = RecordingLLM()
+    again = MapReduceSummarizer(llm, store=registry, group_chars=1000)
+    await again.condense(chunks)
+    assert llm.prompts == []
+
+    extended = MapReduceSummarizer(RecordingLLM(), store=registry, group_chars=1000)
+    await extended.condense(chunks + make_chunks(5, prefix="Appendix"))
+    assert extended.parts_reused > extended.parts_generated
+
+@pytest.mark.asyncio
+async def test_store_is_used_off_the_event_loop():
+    """Part cache reads and writes run on the blocking pool, not the loop thread"""
+    loop_thread = threading.get_ident()
+    threads = set()
+
+    class Store(dict):
+        def get_summary_part(self, key):
+            threads.add(threading.get_ident())
+            return self.get(key)
+
+        def put_summary_part(self, key, text):
+            threads.add(threading.get_ident())
+            self[key] = text
+
+    store = Store()
+    await MapReduceSummarizer(RecordingLLM(), store=store, group_chars=1000).condense(make_chunks(20))
+    assert store
+    assert threads and loop_thread not in threads
+
+@pytest.mark.asyncio
+async def test_summaries_that_do_not_shrink_are_still_bounded():
+    """Parts as long as a group are reduced in pairs, and the last one cut, to fit the budget"""
+    class VerboseLLM(RecordingLLM):
+        async def __call__(self, prompt, max_tokens):
+            await super().__call__(prompt, max_tokens)
+            return "y" * 600
+
+    llm = VerboseLLM()
+    condensed = await MapReduceSummarizer(llm, group_chars=1000).condense(make_chunks(40))
+    assert len(condensed) < 1000
+    assert len(llm.prompts) < 80
@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+import pytest_asyncio
+import httpx
+from src.backend.main import app
+from src.backend.api.dependencies import get_job_queue
+from src.backend.core.config import settings
+from src.backend.utils.helpers import save_upload_stream, FileTooLargeError
+
+class FakeUpload:
+    """Minimal async reader standing in for UploadFile"""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+        self.reads = []
+
+    async def read(self, size: int = -1) -> bytes:
+        block = self._buffer.read(size)
+        self.reads.append(len(block))
+        return block
+
+class RecordingQueue:
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, file_path, filename=None, document_id=None):
+        self.calls.append((file_path, filename, document_id))
+        return "job-1"
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+@pytest.fixture
+def processor():
+    return RecordingQueue()
+
+@pytest_asyncio.fixture
+async def client(processor, upload_dir):
+    app.dependency_overrides[get_job_queue] = lambda: processor
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+@pytest.mark.asyncio
+async def test_save_upload_stream_hashes_in_chunks(tmp_path):
+    """Data is copied in fixed blocks and hashed in the same pass"""
+    data = os.urandom(10_000)
+    upload = FakeUpload(data)
+    dest = tmp_path / "out.bin"
+    digest, size = await save_upload_stream(upload, str(dest), max_bytes=20_000, chunk_size=4096)
+    assert digest == hashlib.md5(data).hexdigest()
+    assert size == len(data)
+    assert dest.read_bytes() == data
+    assert max(upload.reads) <= 4096
+
+@pytest.mark.asyncio
+async def test_save_upload_stream_enforces_limit(tmp_path):
+    """Exceeding the limit raises and leaves no partial file behind"""
+    dest = tmp_path / "out.bin"
+    with pytest.raises(FileTooLargeError):
+        await save_upload_stream(FakeUpload(b"x" * 5000), str(dest), max_bytes=4000, chunk_size=1024)
+    assert list(tmp_path.iterdir()) == []
+
+@pytest.mark.asyncio
+async def test_concurrent_saves_to_one_name_do_not_mix(tmp_path):
+    """Each save streams into its own temporary file, so the result is one complete upload"""
+    first, second = os.urandom(50_000), os.urandom(50_000)
+    dest = tmp_path / "same.bin"
+    digests = await asyncio.gather(
+        save_upload_stream(FakeUpload(first), str(dest), max_bytes=100_000, chunk_size=1024),
+        save_upload_stream(FakeUpload(second), str(dest), max_bytes=100_000, chunk_size=1024)
+    )
+    assert [digest for digest, _ in digests] == [hashlib.md5(first).hexdigest(), hashlib.md5(second).hexdigest()]
+    assert dest.read_bytes() in (first, second)
+    assert [path.name for path in tmp_path.iterdir()] == ["same.bin"]
+
+@pytest.mark.asyncio
+async def test_upload_sanitizes_name_and_queues_job(client, processor, upload_dir):
+    """The stored name is sanitized and the streamed hash becomes the document id"""
+    content = b"Plain text document for upload."
+    response = await client.post("/api/v1/upload", files={"file": ("../my notes!.txt", content, "text/plain")})
+    assert response.status_code == 202
+    data = response.json()
+    assert data["document_id"] == hashlib.md5(content).hexdigest()
+    assert data["job_id"] == "job-1"
+    file_path, _, document_id = processor.calls[0]
+    assert document_id == data["document_id"]
+    assert os.path.dirname(file_path) == str(upload_dir)
+    assert file_path.endswith(".txt")
+    assert os.path.exists(file_path)
+
+@pytest.mark.asyncio
+async def test_same_name_uploads_get_separate_files(client, processor, upload_dir):
+    """A second upload of the same name cannot overwrite the file a queued job will read"""
+    for content in (b"first version", b"second version"):
+        response = await client.post("/api/v1/upload", files={"file": ("notes.txt", content, "text/plain")})
+        assert response.status_code == 202
+    (first_path, first_name, first_id), (second_path, second_name, _) = processor.calls
+    assert first_path != second_path
+    assert first_name == second_name == "notes.txt"
+    with open(first_path, "rb") as file:
+        assert hashlib.md5(file.read()).hexdigest() == first_id
+
+@pytest.mark.asyncio
+async def test_upload_too_large_returns_413(client, processor, monkeypatch):
+    """Oversized uploads are rejected with 413 and never processed"""
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 1000)
+    response = await client.post("/api/v1/upload", files={"file": ("big.txt", b"x" * 5000, "text/plain")})
+    assert response.status_code == 413
+    assert processor.calls == []
+
+    response = await client.post("/api/v1/upload", files={"file": ("big.txt", b"x" * 200_000, "text/plain")})
+    assert response.status_code == 413
@@ -0,0 +1,89 @@
+from src.backend.core.vector_store import ChunkStore
+
+def store_text(processor, doc_id, sentences):
+    text = " ".join(sentences)
+    chunks = processor.chunk_document(text, doc_id)
+    processor.store_document_embeddings(chunks, doc_id)
+    processor.registry.upsert_document(doc_id, f"{doc_id}.txt", len(chunks), len(text))
+    return chunks
+
+def test_documents_share_one_collection(fake_processor):
+    """Every document lands in the single shared collection, tagged with doc_id"""
+    store_text(fake_processor, "a", ["Photosynthesis converts light into chemical energy."])
+    store_text(fake_processor, "b", ["Compilers translate source code into machine code."])
+    names = [c if isinstance(c, str) else c.name for c in fake_processor.chroma_client.list_collections()]
+    assert names == ["chunks"]
+    assert fake_processor.store.get_document("b")["metadatas"][0]["doc_id"] == "b"
+
+def test_multi_document_search_is_filtered(fake_processor):
+    """A multi-document search only returns chunks from the selected documents"""
+    store_text(fake_processor, "a", ["Photosynthesis converts light into chemical energy."])
+    store_text(fake_processor, "b", ["Compilers translate source code into machine code."])
+    store_text(fake_processor, "c", ["Compilers and photosynthesis both appear here."])
+
+    results = fake_processor.search_documents("compilers machine code", ["a", "b"], top_k=5)
+    assert {r["metadata"]["doc_id"] for r in results} <= {"a", "b"}
+    assert results[0]["metadata"]["doc_id"] == "b"
+
+def test_sharded_store_merges_results(fake_processor, fake_embedder):
+    """With several shards, results from each shard are merged by distance"""
+    store = ChunkStore(fake_processor.chroma_client, shards=4)
+    for doc_id in ["alpha", "beta", "gamma", "delta"]:
+        vector = fake_embedder.encode([f"{doc_id} topic"])
+        store.upsert(doc_id, [f"{doc_id}_chunk_0"], vector, [f"{doc_id} topic"], [{"chunk_index": 0}])
+    assert len(store.group_by_shard(["alpha", "beta", "gamma", "delta"])) > 1
+
+    results = store.query(fake_embedder.encode_query("gamma topic"), ["alpha", "beta", "gamma", "delta"], top_k=2)
+    assert len(results) == 2
+    assert results[0]["id"] == "gamma_chunk_0"
+
+def test_batch_retrieval_matches_single_queries(fake_processor):
+    """One batched retrieval returns the same chunks as querying each question alone"""
+    store_text(fake_processor, "a", ["Photosynthesis converts light into chemical energy."])
+    store_text(fake_processor, "b", ["Compilers translate source code into machine code."])
+    questions = ["How do compilers work?", "What does photosynthesis convert?"]
+
+    batched = fake_processor.get_relevant_chunks_batch(questions, ["a", "b"], top_k=1)
+    single = [fake_processor.get_relevant_chunks(q, ["a", "b"], top_k=1) for q in questions]
+    assert [[c["id"] for c in r] for r in batched] == [[c["id"] for c in r] for r in single]
+    assert batched[0][0]["metadata"]["doc_id"] == "b"
+
+def test_migrates_legacy_per_document_collections(fake_processor, fake_embedder):
+    """Old doc_{id} collections are copied into the shared store, registered and dropped"""
+    texts = ["Legacy chunk about rivers.", "Legacy chunk about mountains."]
+    legacy = fake_processor.chroma_client.get_or_create_collection("doc_old", embedding_function=None)
+    legacy.add(
+        ids=["old_chunk_0", "old_chunk_1"],
+        embeddings=fake_embedder.encode(texts),
+        documents=texts,
+        metadatas=[{"start_char": 0, "end_char": 26}, {"start_char": 27, "end_char": 56}]
+    )
+
+    assert fake_processor.migrate_legacy_collections() == {"documents": 1, "chunks": 2}
+    assert fake_processor.store.legacy_collections() == []
+    assert [c["chunk_index"] for c in fake_processor.registry.get_chunks("old")] == [0, 1]
+    results = fake_processor.search_relevant_chunks("mountains", "old", top_k=1)
+    assert results[0]["id"] == "old_chunk_1"
+
+def test_get_relevant_chunks_merges_across_documents(fake_processor):
+    """One global top-k over many selected documents, in the engine's chunk shape"""
+    for i in range(25):
+        store_text(fake_processor, f"doc{i}", [f"Filler sentence number {i} about unrelated things."])
+    store_text(fake_processor, "target", ["Quantum entanglement links distant particles."])
+    doc_ids = [f"doc{i}" for i in range(25)] + ["target", "target", ""]
+
+    chunks = fake_processor.get_relevant_chunks("quantum entanglement particles", doc_ids, top_k=3)
+    assert len(chunks) == 3
+    assert chunks[0]["metadata"]["doc_id"] == "target"
+    assert chunks[0]["content"] == chunks[0]["text"]
+    assert [c["score"] for c in chunks] == sorted((c["score"] for c in chunks), reverse=True)
+    assert fake_processor.get_relevant_chunks("anything", []) == []
+
+def test_get_document_chunks_in_reading_order(fake_processor):
+    """Whole-document retrieval returns every chunk ordered by chunk_index"""
+    text = " ".join(f"Sentence {i} describes a separate idea in some detail." for i in range(80))
+    chunks = store_text(fake_processor, "long", [text])
+    stored = fake_processor.get_document_chunks("long")
+    assert [c["id"] for c in stored] == [c["id"] for c in chunks]
+    assert all("content" in c for c in stored)
+    assert fake_processor.get_document_chunks("missing") == []